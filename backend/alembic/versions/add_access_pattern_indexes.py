@@ -0,0 +1,69 @@
+"""add indexes for the per-user list and lookup queries
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8b9c0d1e2f3'
+down_revision: Union[str, Sequence[str], None] = 'f7a8b9c0d1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Newest-first per-user lists: /portfolio and the cursor pages in utils.pagination
+NEWEST_FIRST = {
+    'ix_documents_user_id_created_at': 'documents',
+    'ix_extractions_user_id_created_at': 'extractions',
+    'ix_payments_user_id_created_at': 'payments',
+}
+LOOKUPS = {
+    'ix_extractions_document_id': ('extractions', ['document_id']),
+    'ix_payments_stripe_session_id': ('payments', ['stripe_session_id']),
+    'ix_state_regulations_state_code_category': ('state_regulations', ['state_code', 'regulation_category']),
+    'ix_user_credits_user_id': ('user_credits', ['user_id']),
+    'ix_user_credentials_user_id': ('user_credentials', ['user_id']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # Tables that only create_all makes (user_credentials) get these from the models
+    existing = set(sa.inspect(bind).get_table_names())
+    if bind.dialect.name == 'postgresql':
+        # Postgres sorts NULLs first in a descending index, the list order wants them
+        # last. SQLite sorts NULLs lowest, so it reads the ascending index backwards.
+        newest_first = [sa.text('created_at DESC NULLS LAST'), sa.text('id DESC')]
+    else:
+        newest_first = ['created_at', 'id']
+
+    # Build without holding a write lock on the live tables
+    with op.get_context().autocommit_block():
+        for name, table in NEWEST_FIRST.items():
+            if table not in existing:
+                continue
+            op.create_index(name, table, ['user_id', *newest_first], unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+        for name, (table, columns) in LOOKUPS.items():
+            if table not in existing:
+                continue
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, (table, _) in reversed(list(LOOKUPS.items())):
+        if table in existing:
+            op.drop_index(name, table_name=table, if_exists=True)
+    for name, table in reversed(list(NEWEST_FIRST.items())):
+        if table in existing:
+            op.drop_index(name, table_name=table, if_exists=True)
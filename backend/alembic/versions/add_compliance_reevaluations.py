@@ -0,0 +1,88 @@
+"""add compliance_reevaluations and extractions.state_code
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.compliance_checker import state_from_address
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e2f3a4b5c6'
+down_revision: Union[str, Sequence[str], None] = 'c0d1e2f3a4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+extractions = sa.table(
+    'extractions',
+    sa.column('id', sa.Integer()),
+    sa.column('property_address', sa.String()),
+    sa.column('state_code', sa.String()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('compliance_reevaluations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('state_code', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.Column('last_extraction_id', sa.Integer(), nullable=False),
+    sa.Column('scanned', sa.Integer(), nullable=False),
+    sa.Column('updated', sa.Integer(), nullable=False),
+    sa.Column('lease_owner', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_compliance_reevaluations_id'), 'compliance_reevaluations', ['id'], unique=False)
+    op.create_index('ix_compliance_reevaluations_status_id', 'compliance_reevaluations', ['status', 'id'], unique=False)
+
+    bind = op.get_bind()
+    # The runtime table repair may already have added it
+    if 'state_code' not in {c['name'] for c in sa.inspect(bind).get_columns('extractions')}:
+        op.add_column('extractions', sa.Column('state_code', sa.String(), nullable=True))
+
+    # Resolve the state of existing rows, in id order
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(extractions.c.id, extractions.c.property_address)
+            .where(extractions.c.id > last_id)
+            .order_by(extractions.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            state_code = state_from_address(row.property_address)
+            if state_code:
+                bind.execute(extractions.update().where(extractions.c.id == row.id).values(state_code=state_code))
+        last_id = rows[-1].id
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_extractions_state_code_id', 'extractions', ['state_code', 'id'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_extractions_state_code_id', table_name='extractions', if_exists=True)
+    with op.batch_alter_table('extractions') as batch_op:
+        batch_op.drop_column('state_code')
+    op.drop_index('ix_compliance_reevaluations_status_id', table_name='compliance_reevaluations')
+    op.drop_index(op.f('ix_compliance_reevaluations_id'), table_name='compliance_reevaluations')
+    op.drop_table('compliance_reevaluations')
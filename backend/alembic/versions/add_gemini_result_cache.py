@@ -0,0 +1,51 @@
+"""add gemini_result_cache table
+
+Revision ID: c4d5e6f7a8b9
+Revises: b7c1d2e3f4a5
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d5e6f7a8b9'
+down_revision: Union[str, Sequence[str], None] = 'b7c1d2e3f4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Content-addressed cache of Gemini extraction results
+    op.create_table('gemini_result_cache',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('cache_key', sa.String(), nullable=False),
+    sa.Column('file_sha256', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt_version', sa.String(), nullable=False),
+    sa.Column('extracted_data', sa.Text(), nullable=False),
+    sa.Column('source_map', sa.Text(), nullable=True),
+    sa.Column('pages_meta', sa.Text(), nullable=True),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('full_text', sa.Text(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cache_key')
+    )
+    op.create_index(op.f('ix_gemini_result_cache_id'), 'gemini_result_cache', ['id'], unique=False)
+    # LRU eviction deletes the least recently read rows first
+    op.create_index('ix_gemini_result_cache_last_accessed_at', 'gemini_result_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_gemini_result_cache_last_accessed_at', table_name='gemini_result_cache')
+    op.drop_index(op.f('ix_gemini_result_cache_id'), table_name='gemini_result_cache')
+    op.drop_table('gemini_result_cache')
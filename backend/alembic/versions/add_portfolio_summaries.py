@@ -0,0 +1,61 @@
+"""add portfolio_summaries and the lease end date index
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0d1e2f3a4b5'
+down_revision: Union[str, Sequence[str], None] = 'b9c0d1e2f3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+extractions = sa.table(
+    'extractions',
+    sa.column('id', sa.Integer()),
+    sa.column('user_id', sa.String()),
+    sa.column('monthly_rent', sa.Float()),
+    sa.column('security_deposit', sa.Float()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-user totals, kept in step by ExtractionsService writes
+    summaries = op.create_table('portfolio_summaries',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('lease_count', sa.Integer(), nullable=False),
+    sa.Column('total_monthly_rent', sa.Float(), nullable=False),
+    sa.Column('total_deposits', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(summaries.insert().from_select(
+        ['user_id', 'lease_count', 'total_monthly_rent', 'total_deposits', 'updated_at'],
+        sa.select(
+            extractions.c.user_id,
+            sa.func.count(extractions.c.id),
+            sa.func.coalesce(sa.func.sum(extractions.c.monthly_rent), 0),
+            sa.func.coalesce(sa.func.sum(extractions.c.security_deposit), 0),
+            sa.literal(datetime.now(timezone.utc), sa.DateTime(timezone=True)),
+        ).group_by(extractions.c.user_id),
+    ))
+
+    # Status buckets and upcoming lease ends are range scans on this
+    with op.get_context().autocommit_block():
+        op.create_index('ix_extractions_user_id_lease_end_on', 'extractions', ['user_id', 'lease_end_on'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_extractions_user_id_lease_end_on', table_name='extractions', if_exists=True)
+    op.drop_table('portfolio_summaries')
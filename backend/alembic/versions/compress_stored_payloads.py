@@ -0,0 +1,86 @@
+"""compress stored files and large JSON columns at rest
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.codec import decode_bytes, decode_text, encode_large_bytes, encode_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a8b9c0d1e2'
+down_revision: Union[str, Sequence[str], None] = 'e6f7a8b9c0d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+FILE_BATCH_SIZE = 20
+
+# No DDL: the codec envelopes fit the existing column types. This only
+# rewrites existing values; reads already accept both plain and encoded rows.
+TEXT_COLUMNS = {
+    'extractions': ('id', ['compliance_data', 'raw_extraction', 'source_map']),
+    'gemini_result_cache': ('id', ['extracted_data', 'source_map', 'full_text']),
+}
+
+
+def _rewrite_text(table_name: str, transform) -> None:
+    pk, columns = TEXT_COLUMNS[table_name]
+    table = sa.table(table_name, sa.column(pk, sa.Integer()), *[sa.column(c, sa.Text()) for c in columns])
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table).where(table.c[pk] > last_id).order_by(table.c[pk]).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            values = {}
+            for column in columns:
+                value = row._mapping[column]
+                if value is not None:
+                    new_value = transform(value)
+                    if new_value != value:
+                        values[column] = new_value
+            if values:
+                bind.execute(table.update().where(table.c[pk] == row._mapping[pk]).values(**values))
+        last_id = rows[-1]._mapping[pk]
+
+
+def _rewrite_files(transform) -> None:
+    table = sa.table('document_files', sa.column('document_id', sa.Integer()), sa.column('data', sa.LargeBinary()))
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.document_id, table.c.data)
+            .where(table.c.document_id > last_id)
+            .order_by(table.c.document_id)
+            .limit(FILE_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for doc_id, data in rows:
+            bind.execute(table.update().where(table.c.document_id == doc_id).values(data=transform(bytes(data))))
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TEXT_COLUMNS:
+        _rewrite_text(table_name, lambda value: encode_text(decode_text(value)))
+    _rewrite_files(lambda data: encode_large_bytes(decode_bytes(data)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in TEXT_COLUMNS:
+        _rewrite_text(table_name, decode_text)
+    _rewrite_files(decode_bytes)
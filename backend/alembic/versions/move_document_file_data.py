@@ -0,0 +1,103 @@
+"""move documents.file_data into document_files
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import base64
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f7a8b9c0d1'
+down_revision: Union[str, Sequence[str], None] = 'd5e6f7a8b9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows are up to ~27 MB of base64 each; keep a batch well below memory limits
+BATCH_SIZE = 20
+
+documents = sa.table(
+    'documents',
+    sa.column('id', sa.Integer()),
+    sa.column('file_data', sa.Text()),
+)
+document_files = sa.table(
+    'document_files',
+    sa.column('document_id', sa.Integer()),
+    sa.column('data', sa.LargeBinary()),
+    sa.column('size', sa.Integer()),
+    sa.column('created_at', sa.DateTime(timezone=True)),
+)
+
+
+def _has_file_data_column(bind) -> bool:
+    # file_data was added at runtime by the table repair, not by a migration,
+    # so a schema built from migrations alone does not have it
+    return 'file_data' in {c['name'] for c in sa.inspect(bind).get_columns('documents')}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_files',
+    sa.Column('document_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('document_id')
+    )
+
+    # Stream existing blobs across in id order, BATCH_SIZE rows at a time,
+    # clearing the legacy column as each row moves
+    bind = op.get_bind()
+    if not _has_file_data_column(bind):
+        return
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(documents.c.id, documents.c.file_data)
+            .where(documents.c.file_data.isnot(None), documents.c.id > last_id)
+            .order_by(documents.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        now = datetime.now(timezone.utc)
+        for doc_id, encoded in rows:
+            data = base64.b64decode(encoded)
+            bind.execute(document_files.insert().values(
+                document_id=doc_id, data=data, size=len(data), created_at=now,
+            ))
+        moved = [doc_id for doc_id, _ in rows]
+        bind.execute(documents.update().where(documents.c.id.in_(moved)).values(file_data=None))
+        last_id = moved[-1]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not _has_file_data_column(bind):
+        op.add_column('documents', sa.Column('file_data', sa.Text(), nullable=True))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(document_files.c.document_id, document_files.c.data)
+            .where(document_files.c.document_id > last_id)
+            .order_by(document_files.c.document_id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for doc_id, data in rows:
+            bind.execute(
+                documents.update().where(documents.c.id == doc_id)
+                .values(file_data=base64.b64encode(data).decode())
+            )
+        last_id = rows[-1][0]
+
+    op.drop_table('document_files')
@@ -0,0 +1,88 @@
+"""re-resolve extractions.state_code with the address parser
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.codec import CompressedJSON
+from services.address_state import states_from_addresses
+from services.compliance_checker import state_not_identified_report
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f3a4b5c6d7'
+down_revision: Union[str, Sequence[str], None] = 'd1e2f3a4b5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+extractions = sa.table(
+    'extractions',
+    sa.column('id', sa.Integer()),
+    sa.column('property_address', sa.String()),
+    sa.column('state_code', sa.String()),
+    sa.column('compliance_data', CompressedJSON()),
+    sa.column('violation_count', sa.Integer()),
+)
+compliance_reevaluations = sa.table(
+    'compliance_reevaluations',
+    sa.column('state_code', sa.String()),
+    sa.column('status', sa.String()),
+    sa.column('revision', sa.Integer()),
+    sa.column('last_extraction_id', sa.Integer()),
+    sa.column('scanned', sa.Integer()),
+    sa.column('updated', sa.Integer()),
+    sa.column('created_at', sa.DateTime(timezone=True)),
+    sa.column('updated_at', sa.DateTime(timezone=True)),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The substring matcher read "in", "or", "me" inside words as states
+    bind = op.get_bind()
+    moved_to = set()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(extractions.c.id, extractions.c.property_address, extractions.c.state_code)
+            .where(extractions.c.id > last_id)
+            .order_by(extractions.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row, state_code in zip(rows, states_from_addresses(row.property_address for row in rows)):
+            if state_code == row.state_code:
+                continue
+            values = {'state_code': state_code}
+            if state_code:
+                moved_to.add(state_code)
+            else:
+                # Re-evaluation runs only cover rows with a state
+                values.update(compliance_data=state_not_identified_report(), violation_count=0)
+            bind.execute(extractions.update().where(extractions.c.id == row.id).values(**values))
+        last_id = rows[-1].id
+
+    # Reports of moved rows name the old state; the app (or the
+    # compliance_reevaluation_worker CLI) drains these runs
+    now = datetime.now(timezone.utc)
+    for state_code in sorted(moved_to):
+        bind.execute(compliance_reevaluations.insert().values(
+            state_code=state_code, status='queued', revision=0, last_extraction_id=0,
+            scanned=0, updated=0, created_at=now, updated_at=now,
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Nothing to undo: the column keeps the more accurate states
+    pass
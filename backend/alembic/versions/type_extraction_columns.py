@@ -0,0 +1,116 @@
+"""JSON-typed extraction documents, lease dates and risk counters
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from core.codec import decode_text
+from services.extraction_fields import derived_extraction_fields, load_json_value
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9c0d1e2f3a4'
+down_revision: Union[str, Sequence[str], None] = 'a8b9c0d1e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+
+# Small JSON documents that become JSONB on Postgres, with their previous types.
+# compliance_data, raw_extraction and source_map stay compressed text.
+JSON_COLUMNS = {
+    'risk_flags': sa.String(),
+    'audit_checklist': sa.Text(),
+    'pages_meta': sa.String(),
+}
+
+extractions = sa.table(
+    'extractions',
+    sa.column('id', sa.Integer()),
+    sa.column('lease_start_date', sa.String()),
+    sa.column('lease_end_date', sa.String()),
+    sa.column('risk_flags', sa.Text()),
+    sa.column('audit_checklist', sa.Text()),
+    sa.column('pages_meta', sa.Text()),
+    sa.column('compliance_data', sa.Text()),
+    sa.column('lease_start_on', sa.Date()),
+    sa.column('lease_end_on', sa.Date()),
+    sa.column('risk_count', sa.Integer()),
+    sa.column('high_risk_count', sa.Integer()),
+    sa.column('violation_count', sa.Integer()),
+)
+
+
+def _derived_columns():
+    return [
+        sa.Column('lease_start_on', sa.Date(), nullable=True),
+        sa.Column('lease_end_on', sa.Date(), nullable=True),
+        sa.Column('risk_count', sa.Integer(), nullable=True),
+        sa.Column('high_risk_count', sa.Integer(), nullable=True),
+        sa.Column('violation_count', sa.Integer(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    existing = {c['name']: c['type'] for c in sa.inspect(bind).get_columns('extractions')}
+    # The runtime table repair may already have added these
+    for column in _derived_columns():
+        if column.name not in existing:
+            op.add_column('extractions', column)
+
+    # No migration creates audit_checklist; only the runtime table repair adds it
+    json_columns = [name for name in JSON_COLUMNS if name in existing]
+
+    # Fill the derived columns and rewrite the JSON documents as canonical JSON
+    # (older rows hold double-encoded strings or Python reprs), in id order
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                extractions.c.id, extractions.c.lease_start_date, extractions.c.lease_end_date,
+                extractions.c.compliance_data, *[extractions.c[name] for name in json_columns],
+            )
+            .where(extractions.c.id > last_id)
+            .order_by(extractions.c.id)
+            .limit(BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        for row in rows:
+            compliance = decode_text(row['compliance_data']) if row['compliance_data'] else None
+            values = derived_extraction_fields(row['lease_start_date'], row['lease_end_date'], row['risk_flags'], compliance)
+            for name in json_columns:
+                if row[name] is not None:
+                    values[name] = json.dumps(load_json_value(row[name]))
+            bind.execute(extractions.update().where(extractions.c.id == row['id']).values(**values))
+        last_id = rows[-1]['id']
+
+    if bind.dialect.name == 'postgresql':
+        for name in json_columns:
+            if not isinstance(existing[name], postgresql.JSONB):
+                op.alter_column('extractions', name, type_=postgresql.JSONB(),
+                                postgresql_using=f'{name}::jsonb')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The rewritten JSON text is still what the old readers expect
+    bind = op.get_bind()
+    existing = {c['name'] for c in sa.inspect(bind).get_columns('extractions')}
+    if bind.dialect.name == 'postgresql':
+        for name, previous_type in JSON_COLUMNS.items():
+            if name in existing:
+                op.alter_column('extractions', name, type_=previous_type, postgresql_using=f'{name}::text')
+    with op.batch_alter_table('extractions') as batch_op:
+        for column in reversed(_derived_columns()):
+            batch_op.drop_column(column.name)
@@ -7,6 +7,7 @@ from typing import Any, Dict, Optional
 
 import httpx
 from core.config import settings
+from core.http_client import get_http_client
 from jose import JWTError, jwt
 from jose.exceptions import ExpiredSignatureError, JWSSignatureError, JWTClaimsError
 
@@ -38,13 +39,13 @@ async def get_jwks() -> Dict[str, Any]:
     """Get JWKS (JSON Web Key Set) from OIDC provider."""
     jwks_url = f"{settings.oidc_issuer_url}/.well-known/jwks.json"
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            logger.info(f"Fetching JWKS from: {jwks_url}")
-            response = await client.get(jwks_url)
-            response.raise_for_status()
-            jwks_data = response.json()
-            logger.info(f"Successfully fetched JWKS with {len(jwks_data.get('keys', []))} keys")
-            return jwks_data
+        client = get_http_client("api")
+        logger.info(f"Fetching JWKS from: {jwks_url}")
+        response = await client.get(jwks_url, timeout=60.0)
+        response.raise_for_status()
+        jwks_data = response.json()
+        logger.info(f"Successfully fetched JWKS with {len(jwks_data.get('keys', []))} keys")
+        return jwks_data
     except httpx.TimeoutException as e:
         logger.error(f"Timeout while fetching JWKS from {jwks_url}: {e}")
         raise Exception("Unable to retrieve authentication keys")
@@ -0,0 +1,227 @@
+"""
+Compressed-at-rest codec for large columns.
+
+Values are compressed with zstd when the `zstandard` package is installed,
+otherwise with zlib, and carry a version header naming the codec. Reads
+decode whatever codec the header names. Values without a header are legacy
+plaintext and come back unchanged, so existing rows need no rewrite.
+
+Binary envelope:  b"LLC" + version byte + codec byte + payload
+Text envelope:    "~c1" + codec char + ":" + base64(payload)
+
+The text form exists for String/Text columns, which cannot hold raw bytes.
+JSON never starts with "~", so a plain JSON value is never mistaken for an
+envelope. Values under `storage_codec_min_bytes`, or that do not shrink, are
+stored as they are.
+
+Extraction JSON columns use the CompressedJSON column type, so callers read
+and write the parsed value. The Gemini cache columns use CompressedText and
+keep reading and writing plain str. File bytes are encoded explicitly by Document_filesService,
+in a worker thread, because a 20 MB file takes a while to compress.
+"""
+
+import base64
+import json
+import logging
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy.types import Text, TypeDecorator
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+CODEC_VERSION = 1
+BINARY_MAGIC = b"LLC"
+TEXT_MAGIC = "~c1"
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+_CODEC_NAMES = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+_TEXT_CODEC_CHARS = {CODEC_ZLIB: "z", CODEC_ZSTD: "s"}
+_TEXT_CODEC_IDS = {v: k for k, v in _TEXT_CODEC_CHARS.items()}
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class CodecError(Exception):
+    """A stored value names a codec this process cannot decode."""
+
+
+def write_codec() -> int:
+    """Codec for new values, from settings.storage_codec (auto / zstd / zlib / none)."""
+    name = (settings.storage_codec or "auto").lower()
+    if name == "auto":
+        return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    if name == "zstd" and zstandard is None:
+        logger.warning("storage_codec=zstd but zstandard is not installed; using zlib")
+        return CODEC_ZLIB
+    return _CODEC_NAMES.get(name, CODEC_ZLIB)
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, ZLIB_LEVEL)
+    return data
+
+
+def _decompress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise CodecError("Value is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_NONE:
+        return payload
+    raise CodecError(f"Unknown storage codec {codec}")
+
+
+def _worth_compressing(size: int) -> bool:
+    return size >= settings.storage_codec_min_bytes
+
+
+# ---------- bytes ----------
+
+def encode_bytes(data: bytes, codec: Optional[int] = None) -> bytes:
+    codec = write_codec() if codec is None else codec
+    if codec != CODEC_NONE and _worth_compressing(len(data)):
+        compressed = _compress(data, codec)
+        if len(compressed) < len(data):
+            return BINARY_MAGIC + bytes((CODEC_VERSION, codec)) + compressed
+    return BINARY_MAGIC + bytes((CODEC_VERSION, CODEC_NONE)) + data
+
+
+def decode_bytes(stored: bytes) -> bytes:
+    if not stored.startswith(BINARY_MAGIC) or len(stored) < 5:
+        return stored  # legacy raw bytes
+    version, codec = stored[3], stored[4]
+    if version != CODEC_VERSION:
+        raise CodecError(f"Unsupported storage codec version {version}")
+    return _decompress(stored[5:], codec)
+
+
+class StreamEncoder:
+    """Incremental binary encoder for large files: feed chunks, then finish().
+
+    Produces the same envelope as encode_bytes(), so decode_bytes() reads it.
+    Unlike encode_bytes() it cannot fall back to storing raw bytes when the
+    data does not compress; the envelope is always compressed.
+    """
+
+    def __init__(self, codec: Optional[int] = None):
+        self.codec = write_codec() if codec is None else codec
+        if self.codec == CODEC_ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        elif self.codec == CODEC_ZLIB:
+            self._compressor = zlib.compressobj(ZLIB_LEVEL)
+        else:
+            self._compressor = None
+        self._header_sent = False
+
+    def _header(self) -> bytes:
+        if self._header_sent:
+            return b""
+        self._header_sent = True
+        return BINARY_MAGIC + bytes((CODEC_VERSION, self.codec))
+
+    def write(self, chunk: bytes) -> bytes:
+        body = self._compressor.compress(chunk) if self._compressor else chunk
+        return self._header() + body
+
+    def finish(self) -> bytes:
+        return self._header() + (self._compressor.flush() if self._compressor else b"")
+
+
+def encode_stream(chunks: Iterable[bytes], codec: Optional[int] = None) -> Iterator[bytes]:
+    encoder = StreamEncoder(codec)
+    for chunk in chunks:
+        out = encoder.write(chunk)
+        if out:
+            yield out
+    yield encoder.finish()
+
+
+def encode_large_bytes(data: bytes, codec: Optional[int] = None) -> bytes:
+    """encode_bytes() for big files: compresses in STREAM_CHUNK_SIZE pieces."""
+    if len(data) <= STREAM_CHUNK_SIZE:
+        return encode_bytes(data, codec)
+    view = memoryview(data)
+    encoded = b"".join(encode_stream(
+        (view[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(data), STREAM_CHUNK_SIZE)), codec
+    ))
+    # Already-compressed formats (PDF streams, docx zips) may not shrink
+    return encoded if len(encoded) < len(data) else encode_bytes(data, CODEC_NONE)
+
+
+# ---------- text ----------
+
+def encode_text(value: str, codec: Optional[int] = None) -> str:
+    codec = write_codec() if codec is None else codec
+    raw = value.encode("utf-8")
+    if codec == CODEC_NONE or not _worth_compressing(len(raw)):
+        return value
+    encoded = base64.b64encode(_compress(raw, codec)).decode("ascii")
+    envelope = f"{TEXT_MAGIC}{_TEXT_CODEC_CHARS[codec]}:{encoded}"
+    return envelope if len(envelope) < len(value) else value
+
+
+def decode_text(stored: str) -> str:
+    if not stored.startswith(TEXT_MAGIC) or stored[len(TEXT_MAGIC) + 1:len(TEXT_MAGIC) + 2] != ":":
+        return stored  # legacy plaintext
+    codec = _TEXT_CODEC_IDS.get(stored[len(TEXT_MAGIC)])
+    if codec is None:
+        raise CodecError(f"Unknown text codec {stored[len(TEXT_MAGIC)]!r}")
+    payload = base64.b64decode(stored[len(TEXT_MAGIC) + 2:])
+    return _decompress(payload, codec).decode("utf-8")
+
+
+# ---------- column types ----------
+
+class CompressedText(TypeDecorator):
+    """Text column stored through the text envelope; reads return plain str."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_text(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decode_text(value) if value is not None else None
+
+
+class CompressedJSON(CompressedText):
+    """CompressedText holding a JSON document; reads return the parsed value.
+
+    A str written here is taken as already-serialized JSON. A stored value
+    that is not valid JSON comes back as the decoded str.
+    """
+
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and not isinstance(value, str):
+            value = json.dumps(value)
+        return super().process_bind_param(value, dialect)
+
+    def process_result_value(self, value, dialect):
+        text = super().process_result_value(value, dialect)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
@@ -1,5 +1,6 @@
 import logging
 import os
+import tempfile
 from typing import Any
 
 from pydantic_settings import BaseSettings
@@ -38,6 +39,46 @@ class Settings(BaseSettings):
     oss_service_url: str = ""
     oss_api_key: str = ""
 
+    # Background analysis jobs
+    analysis_workers: int = 2  # worker tasks per process (0 disables in-process workers)
+    analysis_job_poll_interval: float = 1.0  # seconds between polls of an empty queue
+    analysis_job_lease_seconds: int = 300  # lease length; renewed every lease/3 while running
+    analysis_job_max_attempts: int = 3
+    analysis_batch_concurrency: int = 4  # documents analyzed in parallel by /analyze-batch
+    max_upload_bytes: int = 20 * 1024 * 1024  # largest accepted upload, and largest file stored in the database
+
+    # Entity list endpoints
+    list_count_cache_ttl_seconds: float = 30.0  # cached totals in cursor pagination mode
+
+    # In-process state regulations index (see services/regulations_index.py)
+    regulations_index_max_age_seconds: float = 300.0  # reload interval; local writes invalidate at once
+    compliance_reevaluation_chunk_size: int = 500  # extractions re-checked per transaction after regulation writes
+
+    # Worker processes for pypdf/Word parsing and source maps (see services/cpu_pool.py)
+    cpu_pool_workers: int = 2  # 0 runs that work in threads of the web process
+    cpu_pool_task_timeout_seconds: float = 120.0  # an overrunning task gets its pool replaced
+    cpu_pool_memory_limit_mb: int = 2048  # address-space cap per worker process; 0 for none
+    cpu_pool_max_tasks_per_child: int = 0  # replace each worker after this many tasks; 0 keeps them
+
+    # Event loop lag monitor (see services/loop_monitor.py)
+    loop_monitor_enabled: bool = False
+    loop_monitor_interval_seconds: float = 0.1  # how often the loop is sampled
+    loop_monitor_block_threshold_seconds: float = 0.25  # a stall this long gets its stack captured
+
+    # Gemini result cache
+    gemini_cache_enabled: bool = True
+    gemini_cache_ttl_seconds: int = 30 * 24 * 3600
+    gemini_cache_max_entries: int = 5000
+
+    # Local document byte cache (memory LRU + disk LRU, byte-bounded)
+    document_cache_memory_bytes: int = 256 * 1024 * 1024
+    document_cache_disk_bytes: int = 2 * 1024 * 1024 * 1024  # 0 disables the disk tier
+    document_cache_dir: str = os.path.join(tempfile.gettempdir(), "leaselenses-doc-cache")
+
+    # Compressed-at-rest codec for stored files and large JSON columns (see core/codec.py)
+    storage_codec: str = "auto"  # auto (zstd if installed, else zlib) / zstd / zlib / none
+    storage_codec_min_bytes: int = 512  # smaller values are stored as they are
+
     @property
     def backend_url(self) -> str:
         """Generate backend URL from host and port."""
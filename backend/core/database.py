@@ -10,7 +10,8 @@ from asyncpg.exceptions import (
     UniqueViolationError,
 )
 from core.config import settings
-from sqlalchemy import DDL, text
+from sqlalchemy import DDL, JSON, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
@@ -23,6 +24,33 @@ class Base(DeclarativeBase):
     pass
 
 
+# JSON column: JSONB on Postgres, JSON text elsewhere; reads return parsed values
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _is_postgresql(ddl, target, bind, **kw) -> bool:
+    return kw["dialect"].name == "postgresql"
+
+
+def _is_not_postgresql(ddl, target, bind, **kw) -> bool:
+    return kw["dialect"].name != "postgresql"
+
+
+def newest_first_indexes(name: str, *leading: str) -> tuple:
+    """Index on `leading` columns followed by the utils.pagination order
+    (created_at DESC NULLS LAST, id DESC), for use in __table_args__.
+
+    Postgres puts NULLs first in a descending index unless told otherwise, so
+    it gets the explicit form. SQLite sorts NULLs lowest, so a plain ascending
+    index read backwards already gives that order (and its CREATE INDEX does
+    not accept NULLS LAST). Only one of the two is emitted per dialect.
+    """
+    return (
+        Index(name, *leading, text("created_at DESC NULLS LAST"), text("id DESC")).ddl_if(callable_=_is_postgresql),
+        Index(name, *leading, "created_at", "id").ddl_if(callable_=_is_not_postgresql),
+    )
+
+
 class DatabaseManager:
     def __init__(self):
         self.engine = None
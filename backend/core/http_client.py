@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+
+@dataclass(frozen=True)
+class ClientProfile:
+    timeout: httpx.Timeout
+    limits: httpx.Limits
+    http2: bool = True
+
+
+# One pooled client per upstream, so each host gets its own connection limits
+CLIENT_PROFILES: Dict[str, ClientProfile] = {
+    # Supabase Storage: large uploads/downloads, many concurrent page renders
+    "supabase": ClientProfile(
+        timeout=httpx.Timeout(120.0, connect=5.0, pool=10.0),
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0),
+    ),
+    # OSS storage service (JSON control plane)
+    "oss": ClientProfile(
+        timeout=httpx.Timeout(120.0, connect=5.0, pool=10.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0),
+    ),
+    # Small JSON APIs: Resend, OIDC issuer / JWKS, Google OAuth
+    "api": ClientProfile(
+        timeout=httpx.Timeout(30.0, connect=5.0, pool=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+    ),
+}
+
+
+class HTTPClientManager:
+    """Registry of long-lived httpx.AsyncClient instances.
+
+    Clients are created lazily on first use and closed from the app lifespan.
+    An httpx client is bound to the event loop it first ran on, so a client
+    created under a different (e.g. already closed) loop is replaced.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loops: Dict[str, asyncio.AbstractEventLoop] = {}
+
+    def get(self, name: str = "api") -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(name)
+        if client is not None and not client.is_closed and self._loops.get(name) is loop:
+            return client
+
+        profile = CLIENT_PROFILES.get(name, CLIENT_PROFILES["api"])
+        client = httpx.AsyncClient(
+            timeout=profile.timeout,
+            limits=profile.limits,
+            http2=profile.http2 and HAS_HTTP2,
+        )
+        self._clients[name] = client
+        self._loops[name] = loop
+        logger.debug(f"Created pooled HTTP client '{name}' (http2={profile.http2 and HAS_HTTP2})")
+        return client
+
+    async def close(self, name: Optional[str] = None):
+        names = [name] if name else list(self._clients)
+        for client_name in names:
+            client = self._clients.pop(client_name, None)
+            self._loops.pop(client_name, None)
+            if client is None or client.is_closed:
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client '{client_name}': {e}")
+        if not name:
+            logger.info("Pooled HTTP clients closed")
+
+
+# Global HTTP client registry
+http_clients = HTTPClientManager()
+
+
+def get_http_client(name: str = "api") -> httpx.AsyncClient:
+    """Shared pooled client for `name` (see CLIENT_PROFILES)."""
+    return http_clients.get(name)
+
+
+async def close_http_clients():
+    await http_clients.close()
@@ -0,0 +1,54 @@
+"""
+Per-stage wall-clock timing for pipelines whose stages overlap.
+
+Every stage records its start and end as offsets from the timer's creation, so
+the log line shows which stages ran concurrently and which one was on the
+critical path (the one that ends last).
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StageTimer:
+    def __init__(self, label: str):
+        self.label = label
+        self._origin = time.perf_counter()
+        self.stages: Dict[str, Tuple[float, float]] = {}  # name -> (start_ms, end_ms)
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    @contextmanager
+    def stage(self, name: str):
+        start = self._now_ms()
+        try:
+            yield
+        finally:
+            self.stages[name] = (start, self._now_ms())
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await awaitable
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self._now_ms(), 1),
+            "stages": {
+                name: {"start_ms": round(start, 1), "end_ms": round(end, 1), "duration_ms": round(end - start, 1)}
+                for name, (start, end) in sorted(self.stages.items(), key=lambda item: item[1][0])
+            },
+        }
+
+    def log(self):
+        summary = self.summary()
+        stages = ", ".join(
+            f"{name} {s['start_ms']:.0f}→{s['end_ms']:.0f}ms" for name, s in summary["stages"].items()
+        )
+        logger.info(f"{self.label} timing: total {summary['total_ms']:.0f}ms ({stages})")
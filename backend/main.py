@@ -19,6 +19,12 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from services.database import initialize_database, close_database
 from services.mock_data import initialize_mock_data
 from services.auth import initialize_admin_user
+from services.regulations_index import load_regulations_index
+from services.analysis_worker import start_analysis_workers, stop_analysis_workers
+from services.compliance_reevaluation_worker import start_compliance_reevaluations, stop_compliance_reevaluations
+from services.cpu_pool import start_cpu_pool, stop_cpu_pool
+from services.loop_monitor import start_loop_monitor, stop_loop_monitor
+from core.http_client import close_http_clients
 # MODULE_IMPORTS_END
 
 
@@ -83,11 +89,21 @@ async def lifespan(app: FastAPI):
     await initialize_database()
     await initialize_mock_data()
     await initialize_admin_user()
+    await load_regulations_index()
+    await start_cpu_pool()
+    await start_analysis_workers()
+    await start_compliance_reevaluations()
+    await start_loop_monitor()
     # MODULE_STARTUP_END
 
     logger.info("=== Application startup completed successfully ===")
     yield
     # MODULE_SHUTDOWN_START
+    await stop_loop_monitor()
+    await stop_analysis_workers()
+    await stop_compliance_reevaluations()
+    await stop_cpu_pool()
+    await close_http_clients()
     await close_database()
     # MODULE_SHUTDOWN_END
 
@@ -0,0 +1,28 @@
+from core.database import Base
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
+
+
+class Analysis_jobs(Base):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_id", "status", "id"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
+    user_id = Column(String, nullable=False)
+    document_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)           # queued / processing / completed / failed
+    stage = Column(String, nullable=True)             # downloading / analyzing / compliance / saving
+    progress = Column(Integer, nullable=True)         # 0-100
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    charge_credit = Column(Boolean, nullable=False, default=True)
+    lease_owner = Column(String, nullable=True)       # worker id holding the job
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    extraction_id = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,25 @@
+from core.database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+
+class Compliance_reevaluations(Base):
+    __tablename__ = "compliance_reevaluations"
+    __table_args__ = (
+        Index("ix_compliance_reevaluations_status_id", "status", "id"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
+    state_code = Column(String, nullable=False)
+    status = Column(String, nullable=False)                  # queued / running / completed / failed
+    revision = Column(Integer, nullable=False, default=0)    # bumped by regulation writes; restarts the pass
+    last_extraction_id = Column(Integer, nullable=False, default=0)  # resume point (extractions.id)
+    scanned = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)     # rows whose compliance_data changed
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
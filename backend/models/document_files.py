@@ -0,0 +1,13 @@
+from core.database import Base
+from sqlalchemy import Column, DateTime, Integer, LargeBinary
+
+
+class Document_files(Base):
+    __tablename__ = "document_files"
+    __table_args__ = {"extend_existing": True}
+
+    # One row per document; kept apart from documents so listing rows never reads the bytes
+    document_id = Column(Integer, primary_key=True, autoincrement=False, nullable=False)
+    data = Column(LargeBinary, nullable=False)        # core.codec binary envelope (legacy rows: raw bytes)
+    size = Column(Integer, nullable=False)            # decoded size
+    created_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,17 +1,25 @@
-from core.database import Base
+from core.database import Base, newest_first_indexes
 from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.orm import deferred
 
 
 class Documents(Base):
     __tablename__ = "documents"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        *newest_first_indexes("ix_documents_user_id_created_at", "user_id"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
     user_id = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
     file_key = Column(String, nullable=False)
     file_size = Column(Integer, nullable=True)
-    file_data = Column(Text, nullable=True)
+    # Legacy base64 copy of the file, superseded by document_files; never loaded with the row
+    file_data = deferred(Column(Text, nullable=True))
     status = Column(String, nullable=False)
+    page_count = Column(Integer, nullable=True)
+    file_type = Column(String, nullable=True)       # pdf / docx
+    page_dims = Column(String, nullable=True)       # run-length "WxH*n" page sizes in points
     created_at = Column(DateTime(timezone=True), nullable=True)
     updated_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
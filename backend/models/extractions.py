@@ -1,10 +1,17 @@
-from core.database import Base
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from core.codec import CompressedJSON
+from core.database import Base, JSONDocument, newest_first_indexes
+from sqlalchemy import Column, Date, DateTime, Float, Index, Integer, String
 
 
 class Extractions(Base):
     __tablename__ = "extractions"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        *newest_first_indexes("ix_extractions_user_id_created_at", "user_id"),
+        Index("ix_extractions_document_id", "document_id"),
+        Index("ix_extractions_user_id_lease_end_on", "user_id", "lease_end_on"),
+        Index("ix_extractions_state_code_id", "state_code", "id"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
     user_id = Column(String, nullable=False)
@@ -14,15 +21,22 @@ class Extractions(Base):
     property_address = Column(String, nullable=True)
     monthly_rent = Column(Float, nullable=True)
     security_deposit = Column(Float, nullable=True)
-    lease_start_date = Column(String, nullable=True)
-    lease_end_date = Column(String, nullable=True)
+    lease_start_date = Column(String, nullable=True)  # as extracted
+    lease_end_date = Column(String, nullable=True)    # as extracted
     renewal_notice_days = Column(Integer, nullable=True)
     pet_policy = Column(String, nullable=True)
     late_fee_terms = Column(String, nullable=True)
-    risk_flags = Column(String, nullable=True)
-    audit_checklist = Column(Text, nullable=True)     # JSON: 12-item audit checklist
-    compliance_data = Column(String, nullable=True)
-    raw_extraction = Column(String, nullable=True)
-    source_map = Column(String, nullable=True)     # JSON: field → PDF source locations
-    pages_meta = Column(String, nullable=True)      # JSON: PDF page dimensions
-    created_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
+    risk_flags = Column(JSONDocument, nullable=True)
+    audit_checklist = Column(JSONDocument, nullable=True)  # 12-item audit checklist
+    compliance_data = Column(CompressedJSON, nullable=True)
+    raw_extraction = Column(CompressedJSON, nullable=True)
+    source_map = Column(CompressedJSON, nullable=True)  # field → PDF source locations
+    pages_meta = Column(JSONDocument, nullable=True)    # PDF page dimensions, compact form
+    # Derived on write (services.extraction_fields) so lists can filter, sort and count in SQL
+    lease_start_on = Column(Date, nullable=True)
+    lease_end_on = Column(Date, nullable=True)
+    risk_count = Column(Integer, nullable=True)
+    high_risk_count = Column(Integer, nullable=True)
+    violation_count = Column(Integer, nullable=True)
+    state_code = Column(String, nullable=True)  # from property_address; routes compliance re-evaluation
+    created_at = Column(DateTime(timezone=True), nullable=True)
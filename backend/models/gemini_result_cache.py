@@ -0,0 +1,26 @@
+from core.codec import CompressedText
+from core.database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+
+class Gemini_result_cache(Base):
+    __tablename__ = "gemini_result_cache"
+    __table_args__ = (
+        Index("ix_gemini_result_cache_last_accessed_at", "last_accessed_at"),
+        {"extend_existing": True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
+    cache_key = Column(String, nullable=False, unique=True)   # sha256(file) + model + prompt version
+    file_sha256 = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    extracted_data = Column(CompressedText, nullable=False)  # JSON: normalized Gemini output
+    source_map = Column(CompressedText, nullable=True)  # JSON: field → PDF source locations
+    pages_meta = Column(Text, nullable=True)          # JSON: PDF page dimensions
+    page_count = Column(Integer, nullable=True)
+    full_text = Column(CompressedText, nullable=True)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,10 +1,14 @@
-from core.database import Base
-from sqlalchemy import Column, DateTime, Float, Integer, String
+from core.database import Base, newest_first_indexes
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
 
 
 class Payments(Base):
     __tablename__ = "payments"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        *newest_first_indexes("ix_payments_user_id_created_at", "user_id"),
+        Index("ix_payments_stripe_session_id", "stripe_session_id"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
     user_id = Column(String, nullable=False)
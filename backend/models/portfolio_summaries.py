@@ -0,0 +1,14 @@
+from core.database import Base
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+
+class Portfolio_summaries(Base):
+    __tablename__ = "portfolio_summaries"
+    __table_args__ = {"extend_existing": True}
+
+    # One row per user, adjusted in the same transaction as every extraction write
+    user_id = Column(String, primary_key=True, nullable=False)
+    lease_count = Column(Integer, nullable=False, default=0)
+    total_monthly_rent = Column(Float, nullable=False, default=0)
+    total_deposits = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
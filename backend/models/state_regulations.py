@@ -1,10 +1,13 @@
 from core.database import Base
-from sqlalchemy import Column, Float, Integer, String
+from sqlalchemy import Column, Float, Index, Integer, String
 
 
 class State_regulations(Base):
     __tablename__ = "state_regulations"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_state_regulations_state_code_category", "state_code", "regulation_category"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
     state_code = Column(String, nullable=False)
@@ -1,10 +1,13 @@
 from core.database import Base
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 
 
 class User_credits(Base):
     __tablename__ = "user_credits"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_user_credits_user_id", "user_id"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, nullable=False)
     user_id = Column(String, nullable=False)
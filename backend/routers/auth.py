@@ -16,6 +16,7 @@ from core.auth import (
 )
 from core.config import settings
 from core.database import get_db
+from core.http_client import get_http_client
 from dependencies.auth import get_current_user
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
@@ -151,12 +152,12 @@ async def callback(
 
         token_url = f"{settings.oidc_issuer_url}/token"
         try:
-            async with httpx.AsyncClient() as client:
-                token_response = await client.post(
-                    token_url,
-                    data=token_data,
-                    headers={"Content-Type": "application/x-www-form-urlencoded", "X-Request-ID": state},
-                )
+            client = get_http_client("api")
+            token_response = await client.post(
+                token_url,
+                data=token_data,
+                headers={"Content-Type": "application/x-www-form-urlencoded", "X-Request-ID": state},
+            )
         except httpx.HTTPError as e:
             logger.error(
                 "[callback] Token exchange HTTP error: url=%s, error=%s",
@@ -237,12 +238,12 @@ async def exchange_platform_token(
     logger.debug(f"[token/exchange] Verifying token with issuer: {verify_url}")
 
     try:
-        async with httpx.AsyncClient() as client:
-            verify_response = await client.post(
-                verify_url,
-                json={"platform_token": payload.platform_token},
-                headers={"Content-Type": "application/json"},
-            )
+        client = get_http_client("api")
+        verify_response = await client.post(
+            verify_url,
+            json={"platform_token": payload.platform_token},
+            headers={"Content-Type": "application/json"},
+        )
         logger.debug(f"[token/exchange] Issuer response status: {verify_response.status_code}")
     except httpx.HTTPError as exc:
         logger.error(f"[token/exchange] HTTP error verifying platform token: {exc}", exc_info=True)
@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from datetime import datetime, date
 
@@ -9,9 +9,12 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from models.documents import Documents
 from services.documents import DocumentsService
 from dependencies.auth import get_current_user
 from schemas.auth import UserResponse
+from utils.pagination import InvalidCursorError
+from utils.projection import parse_fields, partial_model
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -55,12 +58,16 @@ class DocumentsResponse(BaseModel):
         from_attributes = True
 
 
+DocumentsResponsePartial = partial_model(DocumentsResponse)
+
+
 class DocumentsListResponse(BaseModel):
-    """List response schema"""
-    items: List[DocumentsResponse]
-    total: int
+    """List response schema (items are partial when `fields` is given)"""
+    items: List[Union[DocumentsResponse, DocumentsResponsePartial]]
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # set in cursor mode while more pages remain
 
 
 class DocumentsBatchCreateRequest(BaseModel):
@@ -85,13 +92,15 @@ class DocumentsBatchDeleteRequest(BaseModel):
 
 
 # ---------- Routes ----------
-@router.get("", response_model=DocumentsListResponse)
+@router.get("", response_model=DocumentsListResponse, response_model_exclude_unset=True)
 async def query_documentss(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -108,29 +117,41 @@ async def query_documentss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        try:
+            field_list = parse_fields(fields, DocumentsResponse, Documents)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
             user_id=str(current_user.id),
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} documentss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying documentss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/all", response_model=DocumentsListResponse)
+@router.get("/all", response_model=DocumentsListResponse, response_model_exclude_unset=True)
 async def query_documentss_all(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     db: AsyncSession = Depends(get_db),
 ):
     # Query documentss with filtering, sorting, and pagination without user limitation
@@ -146,16 +167,26 @@ async def query_documentss_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        try:
+            field_list = parse_fields(fields, DocumentsResponse, Documents)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} documentss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying documentss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
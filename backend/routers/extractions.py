@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Optional
+from typing import Any, List, Optional, Union
 
 from datetime import datetime, date
 
@@ -9,9 +9,12 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from models.extractions import Extractions
 from services.extractions import ExtractionsService
 from dependencies.auth import get_current_user
 from schemas.auth import UserResponse
+from utils.pagination import InvalidCursorError
+from utils.projection import parse_fields, partial_model
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -33,12 +36,12 @@ class ExtractionsData(BaseModel):
     renewal_notice_days: int = None
     pet_policy: str = None
     late_fee_terms: str = None
-    risk_flags: str = None
-    audit_checklist: str = None
-    compliance_data: str = None
-    raw_extraction: str = None
-    source_map: str = None
-    pages_meta: str = None
+    risk_flags: Any = None
+    audit_checklist: Any = None
+    compliance_data: Any = None
+    raw_extraction: Any = None
+    source_map: Any = None
+    pages_meta: Any = None
     created_at: Optional[datetime] = None
 
 
@@ -55,12 +58,12 @@ class ExtractionsUpdateData(BaseModel):
     renewal_notice_days: Optional[int] = None
     pet_policy: Optional[str] = None
     late_fee_terms: Optional[str] = None
-    risk_flags: Optional[str] = None
-    audit_checklist: Optional[str] = None
-    compliance_data: Optional[str] = None
-    raw_extraction: Optional[str] = None
-    source_map: Optional[str] = None
-    pages_meta: Optional[str] = None
+    risk_flags: Any = None
+    audit_checklist: Any = None
+    compliance_data: Any = None
+    raw_extraction: Any = None
+    source_map: Any = None
+    pages_meta: Any = None
     created_at: Optional[datetime] = None
 
 
@@ -79,24 +82,34 @@ class ExtractionsResponse(BaseModel):
     renewal_notice_days: Optional[int] = None
     pet_policy: Optional[str] = None
     late_fee_terms: Optional[str] = None
-    risk_flags: Optional[str] = None
-    audit_checklist: Optional[str] = None
-    compliance_data: Optional[str] = None
-    raw_extraction: Optional[str] = None
-    source_map: Optional[str] = None
-    pages_meta: Optional[str] = None
+    risk_flags: Any = None
+    audit_checklist: Any = None
+    compliance_data: Any = None
+    raw_extraction: Any = None
+    source_map: Any = None
+    pages_meta: Any = None
+    lease_start_on: Optional[date] = None
+    lease_end_on: Optional[date] = None
+    risk_count: Optional[int] = None
+    high_risk_count: Optional[int] = None
+    violation_count: Optional[int] = None
+    state_code: Optional[str] = None
     created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+ExtractionsResponsePartial = partial_model(ExtractionsResponse)
+
+
 class ExtractionsListResponse(BaseModel):
-    """List response schema"""
-    items: List[ExtractionsResponse]
-    total: int
+    """List response schema (items are partial when `fields` is given)"""
+    items: List[Union[ExtractionsResponse, ExtractionsResponsePartial]]
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # set in cursor mode while more pages remain
 
 
 class ExtractionsBatchCreateRequest(BaseModel):
@@ -121,13 +134,15 @@ class ExtractionsBatchDeleteRequest(BaseModel):
 
 
 # ---------- Routes ----------
-@router.get("", response_model=ExtractionsListResponse)
+@router.get("", response_model=ExtractionsListResponse, response_model_exclude_unset=True)
 async def query_extractionss(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -144,17 +159,27 @@ async def query_extractionss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        try:
+            field_list = parse_fields(fields, ExtractionsResponse, Extractions)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
             user_id=str(current_user.id),
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} extractionss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying extractionss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
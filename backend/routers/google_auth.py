@@ -11,10 +11,10 @@ import secrets
 from typing import Optional
 from urllib.parse import urlencode
 
-import httpx
 from core.auth import create_access_token
 from core.config import settings
 from core.database import get_db
+from core.http_client import get_http_client
 from dependencies.auth import get_current_user
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import RedirectResponse
@@ -154,18 +154,18 @@ async def google_callback(
         redirect_uri = _get_redirect_uri(request)
 
         # Exchange code for tokens
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                GOOGLE_TOKEN_URL,
-                data={
-                    "code": code,
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "redirect_uri": redirect_uri,
-                    "grant_type": "authorization_code",
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
+        client = get_http_client("api")
+        token_response = await client.post(
+            GOOGLE_TOKEN_URL,
+            data={
+                "code": code,
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "redirect_uri": redirect_uri,
+                "grant_type": "authorization_code",
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
 
         if token_response.status_code != 200:
             logger.error(
@@ -181,11 +181,10 @@ async def google_callback(
             return redirect_with_error("No access token received from Google")
 
         # Get user info
-        async with httpx.AsyncClient() as client:
-            userinfo_response = await client.get(
-                GOOGLE_USERINFO_URL,
-                headers={"Authorization": f"Bearer {access_token}"},
-            )
+        userinfo_response = await client.get(
+            GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
 
         if userinfo_response.status_code != 200:
             return redirect_with_error("Failed to get user information from Google")
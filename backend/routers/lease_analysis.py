@@ -1,12 +1,10 @@
+import asyncio
 import logging
-import base64
-import json
-import ast
 import re
-import httpx as httpx_client
+import time
 from datetime import datetime, timezone
 from urllib.parse import urlencode, quote
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
 from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
@@ -14,9 +12,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
 from core.config import settings
-from dependencies.auth import get_current_user
+from core.timing import StageTimer
+from dependencies.auth import get_admin_user, get_current_user
 from schemas.auth import UserResponse
-from services.lease_extraction import LeaseExtractionService, generate_ics_content
+from services.lease_extraction import generate_ics_content
 from services.pdf_extractor import PDFExtractor
 from services.document_extractor import DocumentExtractor
 from services.gemini_extractor import GeminiExtractor
@@ -24,44 +23,51 @@ from services.amendment_memo import AmendmentMemoService
 from services.lease_comparison import LeaseComparisonService
 from services.rent_benchmark import RentBenchmarkService
 from services.executive_summary import ExecutiveSummaryService
-from services.pdf_report import PDFReportGenerator
+from services import document_tasks
 from services.documents import DocumentsService
 from services.extractions import ExtractionsService
 from services.user_credits import User_creditsService
 from services.compliance_checker import ComplianceChecker
 from services.storage import StorageService
 from services.supabase_storage import SupabaseStorageService
+from services.analysis_jobs import Analysis_jobsService
+from services.analysis_pipeline import (
+    AnalysisFailedError,
+    DocumentFileUnavailableError,
+    CachedAnalysis,
+    build_extraction_record,
+    fetch_document_bytes,
+    load_parsed_document,
+    run_batch_analysis,
+    run_document_analysis,
+)
+from services.gemini_cache import GeminiResultCacheService, get_cache_stats
+from services.portfolio import PortfolioService
+from services.document_cache import DocumentByteCache, document_byte_cache
+from services.document_files import Document_filesService
+from services.document_layout import layout_from_bytes
+from services.document_model import (
+    LINE_HEIGHT,
+    PAGE_MARGIN,
+    compact_pages_meta,
+    document_file_type,
+    document_layout_fields,
+    expand_pages_meta,
+    pages_meta_current,
+    synthetic_layout,
+)
+from services.extraction_fields import load_json_value
+from services.text_layout import PageLayout
+from services.regulations_index import regulations_index
+from services.loop_monitor import loop_monitor
+from services.compliance_reevaluations import Compliance_reevaluationsService
+from services.compliance_reevaluation_worker import request_compliance_reevaluation
 from schemas.storage import FileUpDownRequest
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/lease", tags=["lease"])
-
-
-def safe_parse_json_or_literal(data: Any) -> Any:
-    """Safely parse a string that could be JSON or Python literal.
-    
-    This replaces unsafe eval() calls with safe parsing methods.
-    """
-    if data is None:
-        return None
-    if not isinstance(data, str):
-        return data
-    
-    # Try JSON first (most common case)
-    try:
-        return json.loads(data)
-    except (json.JSONDecodeError, TypeError):
-        pass
-    
-    # Try ast.literal_eval for Python literals (safe alternative to eval)
-    try:
-        return ast.literal_eval(data)
-    except (ValueError, SyntaxError):
-        pass
-    
-    # Return as-is if parsing fails
-    return data
+admin_router = APIRouter(prefix="/api/v1/admin", tags=["admin-cache"])
 
 
 def _get_content_type(filename: str) -> str:
@@ -90,11 +96,27 @@ class AnalysisResponse(BaseModel):
     success: bool
     extraction_id: Optional[int] = None
     document_id: Optional[int] = None
+    job_id: Optional[int] = None
+    job_status: Optional[str] = None
     data: Optional[dict] = None
     compliance: Optional[dict] = None
     error: Optional[str] = None
 
 
+class JobStatusResponse(BaseModel):
+    job_id: int
+    document_id: int
+    status: str
+    stage: Optional[str] = None
+    progress: Optional[int] = None
+    attempts: int = 0
+    extraction_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class BatchAnalysisResponse(BaseModel):
     success: bool
     results: List[dict] = []
@@ -106,10 +128,12 @@ class BatchAnalysisResponse(BaseModel):
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_document(
     request: AnalyzeRequest,
+    background: bool = Query(False, description="Queue the analysis and return a job id immediately"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Analyze a previously uploaded lease document"""
+    """Analyze a previously uploaded lease document.
+    With ?background=true the document is queued and progress is polled via /jobs/{job_id}."""
     try:
         # Get document
         doc_service = DocumentsService(db)
@@ -149,90 +173,35 @@ async def analyze_document(
                 detail="No credits remaining. Please purchase more credits or subscribe."
             )
         
-        # Update document status
-        await doc_service.update(request.document_id, {"status": "processing"}, current_user.id)
-        
-        # Download file from storage (with database fallback)
-        file_bytes = None
-        try:
-            supabase_storage = SupabaseStorageService()
-            download_url = await supabase_storage.get_download_url(
-                bucket_name="lease-documents",
-                object_key=document.file_key
+        if background:
+            job = await Analysis_jobsService(db).enqueue(
+                document.id,
+                current_user.id,
+                charge_credit=not is_admin,
+                max_attempts=settings.analysis_job_max_attempts,
+            )
+            return AnalysisResponse(
+                success=True,
+                document_id=document.id,
+                job_id=job.id,
+                job_status=job.status,
             )
-            async with httpx_client.AsyncClient(timeout=120.0) as http_client:
-                file_response = await http_client.get(download_url)
-                file_bytes = file_response.content
-        except Exception as e:
-            logger.warning(f"Supabase download failed, trying database fallback: {e}")
-
-        if not file_bytes and document.file_data:
-            file_bytes = base64.b64decode(document.file_data)
-
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Document file not available for re-analysis")
 
-        # Analyze PDF using Gemini API
         try:
-            gemini_extractor = GeminiExtractor()
-            analysis_result = await gemini_extractor.analyze_pdf(file_bytes, document.file_name)
-            extracted_data = analysis_result["extracted_data"]
-            full_text = analysis_result["full_text"]
-            source_blocks = analysis_result["source_blocks"]  # Empty for Gemini
-            pages_meta = analysis_result["pages_meta"]  # Empty for Gemini
-            logger.info(f"Successfully analyzed PDF using Gemini API")
-        except Exception as e:
-            logger.error(f"Gemini analysis failed: {e}")
-            await doc_service.update(request.document_id, {"status": "failed"}, current_user.id)
-            return AnalysisResponse(
-                success=False,
-                error=f"PDF analysis failed: {str(e)}"
+            result = await run_document_analysis(
+                db, document, current_user.id, charge_credit=not is_admin
             )
-        
-        # Use source map from Gemini text matching
-        source_map = analysis_result.get("source_map", {})
-        
-        # Perform compliance check
-        compliance_checker = ComplianceChecker(db)
-        compliance_result = await compliance_checker.check_compliance(extracted_data)
-        
-        # Save extraction results
-        extractions_service = ExtractionsService(db)
-        extraction = await extractions_service.create({
-            "user_id": current_user.id,
-            "document_id": request.document_id,
-            "tenant_name": extracted_data.get("tenant_name"),
-            "landlord_name": extracted_data.get("landlord_name"),
-            "property_address": extracted_data.get("property_address"),
-            "monthly_rent": extracted_data.get("monthly_rent"),
-            "security_deposit": extracted_data.get("security_deposit"),
-            "lease_start_date": extracted_data.get("lease_start_date"),
-            "lease_end_date": extracted_data.get("lease_end_date"),
-            "renewal_notice_days": extracted_data.get("renewal_notice_days"),
-            "pet_policy": extracted_data.get("pet_policy"),
-            "late_fee_terms": extracted_data.get("late_fee_terms"),
-            "risk_flags": json.dumps(extracted_data.get("risk_flags", [])),
-            "audit_checklist": json.dumps(extracted_data.get("audit_checklist", [])),
-            "compliance_data": json.dumps(compliance_result),
-            "raw_extraction": json.dumps(extracted_data),
-            "source_map": json.dumps(source_map if source_map is not None else {}),
-            "pages_meta": json.dumps(pages_meta if pages_meta is not None else []),
-            "created_at": datetime.now(timezone.utc)
-        }, current_user.id)
-        
-        # Deduct credits (admins don't consume credits)
-        if not is_admin:
-            await credits_service.deduct_credit(current_user.id)
-        
-        # Update document status
-        await doc_service.update(request.document_id, {"status": "completed"}, current_user.id)
-        
+        except DocumentFileUnavailableError:
+            raise HTTPException(status_code=404, detail="Document file not available for re-analysis")
+        except AnalysisFailedError as e:
+            return AnalysisResponse(success=False, error=str(e))
+
         return AnalysisResponse(
             success=True,
-            extraction_id=extraction.id,
+            extraction_id=result["extraction"].id,
             document_id=document.id,
-            data=extracted_data,
-            compliance=compliance_result
+            data=result["extracted_data"],
+            compliance=result["compliance"]
         )
         
     except HTTPException:
@@ -241,13 +210,34 @@ async def analyze_document(
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+async def _cache_upload_to_storage(file_key: str, file_name: str, file_bytes: bytes) -> None:
+    """Upload to Supabase Storage for PDF preview (non-blocking on failure)."""
+    try:
+        content_type = _get_content_type(file_name)
+        
+        supabase_storage = SupabaseStorageService()
+        await supabase_storage.upload_file(
+            bucket_name="lease-documents",
+            object_key=file_key,
+            file_data=file_bytes,
+            content_type=content_type
+        )
+        logger.info(f"Document cached to Supabase Storage: {file_key}")
+    except Exception as e:
+        # Non-blocking: PDF preview will fall back to the database-stored copy
+        logger.warning(f"Failed to cache document to Supabase Storage: {e}")
+
+
 @router.post("/upload-and-analyze", response_model=AnalysisResponse)
 async def upload_and_analyze(
     file: UploadFile = File(...),
+    background: bool = Query(False, description="Queue the analysis and return a job id immediately"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Upload a lease document and analyze it in one step"""
+    """Upload a lease document and analyze it in one step.
+    With ?background=true the upload is stored, a job is queued and the job id is returned."""
     try:
         # Validate file type
         if not file.filename:
@@ -257,12 +247,15 @@ async def upload_and_analyze(
         if not file.filename.lower().endswith(allowed_extensions):
             raise HTTPException(status_code=400, detail="Please upload a PDF or Word (.docx) file")
 
-        # Read file bytes
-        file_bytes = await file.read()
+        # Read file bytes (one past the limit is enough to reject it)
+        file_bytes = await file.read(settings.max_upload_bytes + 1)
         if len(file_bytes) == 0:
             raise HTTPException(status_code=400, detail="Empty file")
-        if len(file_bytes) > 20 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="File too large. Maximum file size is 20MB.")
+        if len(file_bytes) > settings.max_upload_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum file size is {settings.max_upload_bytes // (1024 * 1024)}MB.",
+            )
 
         # Check user credits
         is_admin = getattr(current_user, 'role', 'user') == 'admin'
@@ -298,19 +291,61 @@ async def upload_and_analyze(
         file_key = f"uploads/{current_user.id}/{timestamp}-{safe_name}"
 
         doc_service = DocumentsService(db)
-        document = await doc_service.create({
-            "file_name": file.filename,
-            "file_key": file_key,
-            "file_size": len(file_bytes),
-            "status": "processing",
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
-        }, current_user.id)
+
+        if background:
+            document = await doc_service.create({
+                "file_name": file.filename,
+                "file_key": file_key,
+                "file_size": len(file_bytes),
+                "status": "queued",
+                "created_at": datetime.now(timezone.utc),
+                "updated_at": datetime.now(timezone.utc),
+            }, current_user.id)
+            # The worker needs durable bytes: keep a database copy as the fallback
+            await Document_filesService(db).put(document.id, file_bytes)
+            await document_byte_cache.put(DocumentByteCache.document_key(document), file_bytes)
+            await _cache_upload_to_storage(file_key, file.filename, file_bytes)
+            job = await Analysis_jobsService(db).enqueue(
+                document.id,
+                current_user.id,
+                charge_credit=not is_admin,
+                max_attempts=settings.analysis_job_max_attempts,
+            )
+            return AnalysisResponse(
+                success=True,
+                document_id=document.id,
+                job_id=job.id,
+                job_status=job.status,
+            )
+
+        # Stages that do not depend on the model output run while Gemini works:
+        # page-text extraction (inside analyze_pdf), the document row and the
+        # storage upload. Only field matching and what follows wait for it.
+        timer = StageTimer(f"[upload-and-analyze] {file.filename}")
+        analysis = await CachedAnalysis(db, file_bytes, file.filename, timer).start()
+        upload_task = asyncio.create_task(
+            timer.timed("storage_upload", _cache_upload_to_storage(file_key, file.filename, file_bytes))
+        )
+        try:
+            with timer.stage("document_row"):
+                document = await doc_service.create({
+                    "file_name": file.filename,
+                    "file_key": file_key,
+                    "file_size": len(file_bytes),
+                    "status": "processing",
+                    "created_at": datetime.now(timezone.utc),
+                    "updated_at": datetime.now(timezone.utc),
+                }, current_user.id)
+                # The viewer requests every page right after analysis; keep the bytes local
+                await document_byte_cache.put(DocumentByteCache.document_key(document), file_bytes)
+        except BaseException:
+            analysis.cancel()
+            upload_task.cancel()
+            raise
 
         # Analyze PDF directly from uploaded bytes (no storage download needed)
         try:
-            gemini_extractor = GeminiExtractor()
-            analysis_result = await gemini_extractor.analyze_pdf(file_bytes, file.filename)
+            analysis_result = await analysis.result()
             extracted_data = analysis_result["extracted_data"]
             full_text = analysis_result["full_text"]
             source_blocks = analysis_result["source_blocks"]
@@ -320,6 +355,7 @@ async def upload_and_analyze(
         except Exception as e:
             logger.error(f"Gemini analysis failed: {e}")
             await doc_service.update(document.id, {"status": "failed"}, current_user.id)
+            await upload_task
             return AnalysisResponse(
                 success=False,
                 error=f"PDF analysis failed: {str(e)}"
@@ -327,58 +363,34 @@ async def upload_and_analyze(
 
         # Perform compliance check
         compliance_checker = ComplianceChecker(db)
-        compliance_result = await compliance_checker.check_compliance(extracted_data)
-
-        # Save extraction results
-        extractions_service = ExtractionsService(db)
-        extraction = await extractions_service.create({
-            "user_id": current_user.id,
-            "document_id": document.id,
-            "tenant_name": extracted_data.get("tenant_name"),
-            "landlord_name": extracted_data.get("landlord_name"),
-            "property_address": extracted_data.get("property_address"),
-            "monthly_rent": extracted_data.get("monthly_rent"),
-            "security_deposit": extracted_data.get("security_deposit"),
-            "lease_start_date": extracted_data.get("lease_start_date"),
-            "lease_end_date": extracted_data.get("lease_end_date"),
-            "renewal_notice_days": extracted_data.get("renewal_notice_days"),
-            "pet_policy": extracted_data.get("pet_policy"),
-            "late_fee_terms": extracted_data.get("late_fee_terms"),
-            "risk_flags": json.dumps(extracted_data.get("risk_flags", [])),
-            "audit_checklist": json.dumps(extracted_data.get("audit_checklist", [])),
-            "compliance_data": json.dumps(compliance_result),
-            "raw_extraction": json.dumps(extracted_data),
-            "source_map": json.dumps(source_map if source_map is not None else {}),
-            "pages_meta": json.dumps(pages_meta if pages_meta is not None else []),
-            "created_at": datetime.now(timezone.utc)
-        }, current_user.id)
-
-        # Deduct credits
-        if not is_admin:
-            await credits_service.deduct_credit(current_user.id)
-
-        # Update document status and store file data for PDF preview fallback
-        # Only store file_data for files under 20MB to avoid database bloat
-        update_data = {"status": "completed"}
-        if len(file_bytes) <= 20 * 1024 * 1024:
-            update_data["file_data"] = base64.b64encode(file_bytes).decode()
-        await doc_service.update(document.id, update_data, current_user.id)
-
-        # Upload to Supabase Storage for temporary PDF preview
-        try:
-            content_type = _get_content_type(file.filename)
-            
-            supabase_storage = SupabaseStorageService()
-            await supabase_storage.upload_file(
-                bucket_name="lease-documents",
-                object_key=file_key,
-                file_data=file_bytes,
-                content_type=content_type
+        compliance_result = await timer.timed("compliance", compliance_checker.check_compliance(extracted_data))
+
+        with timer.stage("save"):
+            # Save extraction results
+            extractions_service = ExtractionsService(db)
+            extraction = await extractions_service.create(
+                build_extraction_record(
+                    current_user.id, document.id, extracted_data, compliance_result, source_map, pages_meta
+                ),
+                current_user.id,
             )
-            logger.info(f"Document cached to Supabase Storage: {file_key}")
-        except Exception as e:
-            # Non-blocking: PDF preview will fall back to database-stored file_data
-            logger.warning(f"Failed to cache document to Supabase Storage: {e}")
+
+            # Deduct credits
+            if not is_admin:
+                await credits_service.deduct_credit(current_user.id)
+
+            # Update document status and store file data for PDF preview fallback
+            update_data = {"status": "completed"}
+            try:
+                update_data.update(await layout_from_bytes(file_bytes, file.filename))
+            except Exception as e:
+                logger.warning(f"Could not record layout for document {document.id}: {e}")
+            await doc_service.update(document.id, update_data, current_user.id)
+            await Document_filesService(db).put(document.id, file_bytes)
+
+        # Supabase Storage copy for PDF preview (started alongside the analysis)
+        await upload_task
+        timer.log()
 
         await db.flush()
         await db.refresh(document)
@@ -408,10 +420,6 @@ async def analyze_documents_batch(
 ):
     """Analyze multiple lease documents in batch"""
     try:
-        results = []
-        completed = 0
-        failed = 0
-        
         # Check user credits first (admins bypass)
         is_admin = getattr(current_user, 'role', 'user') == 'admin'
         credits_service = User_creditsService(db)
@@ -441,116 +449,14 @@ async def analyze_documents_batch(
                 detail=f"Insufficient credits. You have {total_credits} credits but need {documents_to_process}."
             )
         
-        doc_service = DocumentsService(db)
-        extractions_service = ExtractionsService(db)
-        extraction_service = LeaseExtractionService()
-        compliance_checker = ComplianceChecker(db)
-        
-        for doc_id in request.document_ids:
-            try:
-                document = await doc_service.get_by_id(doc_id, current_user.id)
-                
-                if not document:
-                    results.append({
-                        "document_id": doc_id,
-                        "success": False,
-                        "error": "Document not found"
-                    })
-                    failed += 1
-                    continue
-                
-                # Update document status
-                await doc_service.update(doc_id, {"status": "processing"}, current_user.id)
-                
-                # Download actual document file from storage (with database fallback)
-                file_bytes = None
-                try:
-                    supabase_storage = SupabaseStorageService()
-                    download_url = await supabase_storage.get_download_url(
-                        bucket_name="lease-documents",
-                        object_key=document.file_key
-                    )
-                    async with httpx_client.AsyncClient(timeout=120.0) as http_client:
-                        file_response = await http_client.get(download_url)
-                        file_bytes = file_response.content
-                except Exception as e:
-                    logger.warning(f"Supabase download failed for doc {doc_id}, trying database fallback: {e}")
-
-                if not file_bytes and document.file_data:
-                    file_bytes = base64.b64decode(document.file_data)
-
-                if not file_bytes:
-                    await doc_service.update(doc_id, {"status": "failed"}, current_user.id)
-                    results.append({
-                        "document_id": doc_id,
-                        "success": False,
-                        "error": "Document file not available"
-                    })
-                    failed += 1
-                    continue
-
-                # Analyze document using Gemini API
-                try:
-                    gemini_extractor = GeminiExtractor()
-                    analysis_result = await gemini_extractor.analyze_pdf(file_bytes, document.file_name)
-                    extracted_data = analysis_result["extracted_data"]
-                except Exception as e:
-                    logger.error(f"Gemini analysis failed for doc {doc_id}: {e}")
-                    await doc_service.update(doc_id, {"status": "failed"}, current_user.id)
-                    results.append({
-                        "document_id": doc_id,
-                        "success": False,
-                        "error": f"Analysis failed: {str(e)}"
-                    })
-                    failed += 1
-                    continue
-                
-                # Compliance check
-                compliance_result = await compliance_checker.check_compliance(extracted_data)
-                
-                # Save extraction
-                extraction = await extractions_service.create({
-                    "user_id": current_user.id,
-                    "document_id": doc_id,
-                    "tenant_name": extracted_data.get("tenant_name"),
-                    "landlord_name": extracted_data.get("landlord_name"),
-                    "property_address": extracted_data.get("property_address"),
-                    "monthly_rent": extracted_data.get("monthly_rent"),
-                    "security_deposit": extracted_data.get("security_deposit"),
-                    "lease_start_date": extracted_data.get("lease_start_date"),
-                    "lease_end_date": extracted_data.get("lease_end_date"),
-                    "renewal_notice_days": extracted_data.get("renewal_notice_days"),
-                    "pet_policy": extracted_data.get("pet_policy"),
-                    "late_fee_terms": extracted_data.get("late_fee_terms"),
-                    "risk_flags": json.dumps(extracted_data.get("risk_flags", [])),
-                    "audit_checklist": json.dumps(extracted_data.get("audit_checklist", [])),
-                    "compliance_data": json.dumps(compliance_result),
-                    "raw_extraction": json.dumps(extracted_data),
-                    "created_at": datetime.now(timezone.utc)
-                }, current_user.id)
-                
-                # Deduct credit (admins don't consume credits)
-                if not is_admin:
-                    await credits_service.deduct_credit(current_user.id)
-                
-                await doc_service.update(doc_id, {"status": "completed"}, current_user.id)
-                
-                results.append({
-                    "document_id": doc_id,
-                    "success": True,
-                    "extraction_id": extraction.id,
-                    "file_name": document.file_name
-                })
-                completed += 1
-                
-            except Exception as e:
-                logger.error(f"Batch analysis error for doc {doc_id}: {e}")
-                results.append({
-                    "document_id": doc_id,
-                    "success": False,
-                    "error": str(e)
-                })
-                failed += 1
+        # Documents run concurrently, each on its own session; order matches the request
+        results = await run_batch_analysis(
+            request.document_ids,
+            current_user.id,
+            charge_credit=not is_admin,
+        )
+        completed = sum(1 for r in results if r["success"])
+        failed = len(results) - completed
         
         return BatchAnalysisResponse(
             success=completed > 0,
@@ -567,6 +473,39 @@ async def analyze_documents_batch(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_analysis_job(
+    job_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get status and progress of a background analysis job"""
+    try:
+        job = await Analysis_jobsService(db).get_by_id(job_id, current_user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return JobStatusResponse(
+            job_id=job.id,
+            document_id=job.document_id,
+            status=job.status,
+            stage=job.stage,
+            progress=job.progress,
+            attempts=job.attempts or 0,
+            extraction_id=job.extraction_id,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get job error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/compliance/{extraction_id}")
 async def get_compliance_report(
     extraction_id: int,
@@ -798,6 +737,28 @@ async def admin_set_credits(
 # ──────────────────────────────────────────────────────────────────────────────
 
 
+# Extraction id -> monotonic time until which a failed or fruitless rebuild is not retried
+_source_map_rebuild_backoff: Dict[int, float] = {}
+SOURCE_MAP_REBUILD_RETRY_SECONDS = 600.0
+
+
+def _rebuild_backed_off(extraction_id: int) -> bool:
+    until = _source_map_rebuild_backoff.get(extraction_id)
+    if until is None:
+        return False
+    if until > time.monotonic():
+        return True
+    del _source_map_rebuild_backoff[extraction_id]
+    return False
+
+
+def _back_off_rebuild(extraction_id: int):
+    now = time.monotonic()
+    for key in [key for key, until in _source_map_rebuild_backoff.items() if until <= now]:
+        del _source_map_rebuild_backoff[key]
+    _source_map_rebuild_backoff[extraction_id] = now + SOURCE_MAP_REBUILD_RETRY_SECONDS
+
+
 async def _rebuild_source_map(extraction, db: AsyncSession, user_id: str):
     """Rebuild source_map from the original document for an extraction.
     Returns (source_map, pages_meta) or (None, None) on failure."""
@@ -808,23 +769,7 @@ async def _rebuild_source_map(extraction, db: AsyncSession, user_id: str):
             return None, None
 
         # Get file bytes (Supabase then DB fallback)
-        file_bytes = None
-        try:
-            if document.file_key:
-                supabase_storage = SupabaseStorageService()
-                download_url = await supabase_storage.get_download_url(
-                    bucket_name="lease-documents",
-                    object_key=document.file_key
-                )
-                async with httpx_client.AsyncClient(timeout=120.0) as http_client:
-                    file_response = await http_client.get(download_url)
-                    file_response.raise_for_status()
-                    file_bytes = file_response.content
-        except Exception as e:
-            logger.warning(f"[rebuild-source-map] Supabase download failed: {e}")
-
-        if not file_bytes and document.file_data:
-            file_bytes = base64.b64decode(document.file_data)
+        file_bytes = await fetch_document_bytes(document, "[rebuild-source-map]")
 
         if not file_bytes:
             return None, None
@@ -842,21 +787,12 @@ async def _rebuild_source_map(extraction, db: AsyncSession, user_id: str):
             "late_fee_terms": extraction.late_fee_terms,
         }
         # Include risk_flags for risk tracing
-        if extraction.risk_flags:
-            try:
-                extracted_data["risk_flags"] = json.loads(extraction.risk_flags)
-            except (json.JSONDecodeError, TypeError):
-                pass
+        risk_flags = load_json_value(extraction.risk_flags)
+        if isinstance(risk_flags, list):
+            extracted_data["risk_flags"] = risk_flags
 
         extractor = GeminiExtractor.__new__(GeminiExtractor)
-        source_map, page_count = extractor._build_source_map_from_file(
-            file_bytes, document.file_name, extracted_data
-        )
-        pages_meta = [
-            {"page": i, "width": 612, "height": 792}
-            for i in range(page_count)
-        ]
-        return source_map, pages_meta
+        return await extractor.source_map_for_file(file_bytes, document.file_name, extracted_data)
     except Exception as e:
         logger.error(f"[rebuild-source-map] Error: {e}")
         return None, None
@@ -869,8 +805,11 @@ async def get_source_map(
     db: AsyncSession = Depends(get_db),
 ):
     """Get source location mapping for an extraction (field → PDF location).
-    If the stored source_map has fewer fields than expected, rebuilds it
-    from the document using the improved matching logic."""
+    If the stored source_map has fewer fields than expected, or was built on
+    an older page layout (see LAYOUT_VERSION), rebuilds it from the document
+    using the current matching logic. A rebuild that fails or improves nothing
+    is not retried for SOURCE_MAP_REBUILD_RETRY_SECONDS; the stored map is
+    served meanwhile."""
     try:
         extractions_service = ExtractionsService(db)
         extraction = await extractions_service.get_by_id(extraction_id, current_user.id)
@@ -878,19 +817,18 @@ async def get_source_map(
         if not extraction:
             raise HTTPException(status_code=404, detail="Extraction not found")
 
-        source_map = {}
-        if extraction.source_map:
-            try:
-                source_map = json.loads(extraction.source_map)
-            except (json.JSONDecodeError, TypeError):
-                pass
+        source_map = load_json_value(extraction.source_map)
+        if not isinstance(source_map, dict):
+            source_map = {}
 
-        pages_meta = []
+        stored_pages_meta = None
         if extraction.pages_meta:
             try:
-                pages_meta = json.loads(extraction.pages_meta)
-            except (json.JSONDecodeError, TypeError):
+                stored_pages_meta = load_json_value(extraction.pages_meta)
+            except (TypeError, ValueError):
                 pass
+        pages_meta = expand_pages_meta(stored_pages_meta)
+        layout_stale = not pages_meta_current(stored_pages_meta)
 
         # Count how many non-null extraction fields exist
         traceable_fields = ["tenant_name", "landlord_name", "property_address",
@@ -900,37 +838,32 @@ async def get_source_map(
                             if getattr(extraction, f, None) is not None
                             and str(getattr(extraction, f, "")).strip().lower()
                             not in ("", "not specified", "not specified in lease", "none", "null"))
-        # Also count risk flags
-        risk_count = 0
-        if extraction.risk_flags:
-            try:
-                risks = json.loads(extraction.risk_flags)
-                if isinstance(risks, list):
-                    risk_count = len(risks)
-            except (json.JSONDecodeError, TypeError):
-                pass
-
-        total_expected = expected_count + risk_count
-        # Rebuild if source_map has significantly fewer fields than expected
-        needs_rebuild = len(source_map) < max(3, total_expected // 2)
+        total_expected = expected_count + (extraction.risk_count or 0)
+        # Rebuild if source_map has significantly fewer fields than expected, or its
+        # bboxes are in the coordinates of an older layout
+        needs_rebuild = layout_stale or len(source_map) < max(3, total_expected // 2)
 
-        if needs_rebuild:
+        if needs_rebuild and not _rebuild_backed_off(extraction.id):
+            rebuilt = False
             try:
                 rebuilt_map, rebuilt_pages_meta = await _rebuild_source_map(
                     extraction, db, current_user.id
                 )
-                if rebuilt_map and len(rebuilt_map) > len(source_map):
+                if rebuilt_map is not None and (layout_stale or len(rebuilt_map) > len(source_map)):
                     source_map = rebuilt_map
                     if rebuilt_pages_meta:
                         pages_meta = rebuilt_pages_meta
                     # Persist the improved source_map back to DB
                     await extractions_service.update(extraction.id, {
-                        "source_map": json.dumps(source_map),
-                        "pages_meta": json.dumps(pages_meta),
+                        "source_map": source_map,
+                        "pages_meta": compact_pages_meta(pages_meta),
                     }, current_user.id)
+                    rebuilt = True
                     logger.info(f"Rebuilt source_map for extraction {extraction_id}: {len(source_map)} fields (expected ~{total_expected})")
             except Exception as e:
                 logger.warning(f"Failed to rebuild source_map for extraction {extraction_id}: {e}")
+            if not rebuilt:
+                _back_off_rebuild(extraction.id)
 
         return {
             "extraction_id": extraction_id,
@@ -993,43 +926,19 @@ async def get_pdf_page_image(
 
         logger.info(f"[pdf-page] Document found: {document.file_name}, file_key={document.file_key}")
 
-        # Download file from storage (with database fallback)
-        file_bytes = None
-        try:
-            if not document.file_key:
-                raise ValueError("Document has no file_key")
-            supabase_storage = SupabaseStorageService()
-            download_url = await supabase_storage.get_download_url(
-                bucket_name="lease-documents",
-                object_key=document.file_key
-            )
-            logger.info(f"[pdf-page] Got Supabase download URL, downloading...")
-            async with httpx_client.AsyncClient(timeout=120.0) as http_client:
-                file_response = await http_client.get(download_url)
-                file_response.raise_for_status()
-                file_bytes = file_response.content
-            logger.info(f"[pdf-page] Downloaded {len(file_bytes)} bytes from Supabase")
-        except Exception as e:
-            logger.warning(f"[pdf-page] Supabase download failed, trying database fallback: {e}")
+        # Parsed page model (cached by content hash; the file is only fetched on first view)
+        parsed = await load_parsed_document(document, "[pdf-page]")
 
-        if not file_bytes and document.file_data:
-            file_bytes = base64.b64decode(document.file_data)
-            logger.info(f"[pdf-page] Using database fallback, decoded {len(file_bytes)} bytes")
-
-        if not file_bytes:
+        if parsed is None:
             logger.error(f"[pdf-page] No file bytes available for document {document_id}")
             raise HTTPException(status_code=404, detail="Document file not available")
 
-        file_name = document.file_name.lower()
-
-        if file_name.endswith(('.docx', '.doc')):
-            # Render Word page as SVG
-            logger.info(f"[pdf-page] Rendering Word document page {page_num}")
-            content_bytes, media_type = _render_docx_page(file_bytes, page_num)
+        if parsed.page_count == 0 and page_num == 0:
+            layout = synthetic_layout(["(Empty document)"])
         else:
-            # Render PDF page as SVG (without PyMuPDF/Pillow)
-            logger.info(f"[pdf-page] Rendering PDF document page {page_num}")
-            content_bytes, media_type = _render_pdf_page(file_bytes, page_num)
+            layout = parsed.page_layout(page_num)
+        logger.info(f"[pdf-page] Rendering {parsed.file_type} document page {page_num}")
+        content_bytes, media_type = _render_layout_as_svg(layout), "image/svg+xml"
 
         logger.info(f"[pdf-page] Successfully rendered page {page_num}, size={len(content_bytes)} bytes, type={media_type}")
         return Response(
@@ -1057,111 +966,43 @@ def _escape_xml(text: str) -> str:
 
 
 def _render_text_as_svg(lines: list, page_title: str = "") -> bytes:
-    """Render text lines as an SVG image (no Pillow/PyMuPDF needed).
-    Returns SVG bytes that can be displayed in <img> tags."""
-    # Letter size in points (8.5 x 11 inches at 72 DPI)
-    width = 612
-    height = 792
-    margin = 54  # 0.75 inch margin
-    font_size = 11
-    line_height = 16
+    """Render text lines as an SVG image on the synthetic US Letter layout."""
+    return _render_layout_as_svg(synthetic_layout(lines))
+
 
+def _render_layout_as_svg(layout: PageLayout) -> bytes:
+    """Render a page's positioned text as an SVG image (no Pillow/PyMuPDF needed).
+    Returns SVG bytes that can be displayed in <img> tags.
+
+    The SVG is the page's own size in points, the frame source map bboxes are
+    in. PDF spans are stretched to their measured width (textLength), so the
+    text sits under its highlight whatever font the browser substitutes.
+    """
+    width, height = f"{layout.width:g}", f"{layout.height:g}"
     svg_lines = [
         f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
         f'<rect width="{width}" height="{height}" fill="white"/>',
     ]
 
-    y = margin + font_size
-    for line in lines:
-        if y + line_height > height - margin:
-            break
-        escaped = _escape_xml(line)
-        svg_lines.append(
-            f'<text x="{margin}" y="{y}" font-family="monospace, Courier, sans-serif" font-size="{font_size}" fill="#1a1a1a">{escaped}</text>'
-        )
-        y += line_height
+    for text, x0, y0, x1, y1, baseline, size in layout.iter_spans():
+        escaped = _escape_xml(text)
+        if layout.fixed_pitch:
+            # Lines past the bottom margin are cut, as on a printed page
+            if baseline + LINE_HEIGHT > layout.height - PAGE_MARGIN:
+                break
+            svg_lines.append(
+                f'<text x="{x0:g}" y="{baseline:g}" font-family="monospace, Courier, sans-serif" font-size="{size:g}" fill="#1a1a1a">{escaped}</text>'
+            )
+        else:
+            svg_lines.append(
+                f'<text x="{x0:.1f}" y="{baseline:.1f}" font-family="Helvetica, Arial, sans-serif" font-size="{size:.1f}" '
+                f'textLength="{x1 - x0:.1f}" lengthAdjust="spacingAndGlyphs" xml:space="preserve" fill="#1a1a1a">{escaped}</text>'
+            )
 
     svg_lines.append('</svg>')
     return "\n".join(svg_lines).encode("utf-8")
 
 
-def _render_pdf_page(file_bytes: bytes, page_num: int) -> tuple:
-    """Render a PDF page as SVG using pypdf text extraction (no Pillow/PyMuPDF needed).
-    Returns (content_bytes, media_type)."""
-    import io
-    from pypdf import PdfReader
-
-    reader = PdfReader(io.BytesIO(file_bytes))
-    if page_num >= len(reader.pages):
-        raise ValueError(f"Page {page_num} does not exist (total pages: {len(reader.pages)})")
-
-    page = reader.pages[page_num]
-    text = page.extract_text() or ""
-
-    # Split text into lines
-    lines = []
-    for paragraph in text.split("\n"):
-        if not paragraph.strip():
-            lines.append("")
-            continue
-        words = paragraph.split()
-        line = ""
-        for word in words:
-            test = f"{line} {word}".strip()
-            if len(test) > 90:
-                lines.append(line)
-                line = word
-            else:
-                line = test
-        if line:
-            lines.append(line)
-
-    return _render_text_as_svg(lines), "image/svg+xml"
-
-
-def _render_docx_page(file_bytes: bytes, page_num: int) -> tuple:
-    """Render a Word document page as SVG (no Pillow/PyMuPDF needed).
-    Returns (content_bytes, media_type)."""
-    from services.document_extractor import _extract_docx_text
-
-    paragraphs = _extract_docx_text(file_bytes)
-
-    # Paginate: ~45 lines per page (standard letter)
-    lines_per_page = 45
-    pages = []
-    current_page_lines = []
-    for para in paragraphs:
-        words = para.split()
-        line = ""
-        for word in words:
-            test = f"{line} {word}".strip()
-            if len(test) > 85:
-                current_page_lines.append(line)
-                line = word
-                if len(current_page_lines) >= lines_per_page:
-                    pages.append(current_page_lines)
-                    current_page_lines = []
-            else:
-                line = test
-        if line:
-            current_page_lines.append(line)
-            if len(current_page_lines) >= lines_per_page:
-                pages.append(current_page_lines)
-                current_page_lines = []
-        current_page_lines.append("")  # blank line between paragraphs
-
-    if current_page_lines:
-        pages.append(current_page_lines)
-
-    if not pages:
-        pages = [["(Empty document)"]]
-
-    if page_num >= len(pages):
-        raise ValueError(f"Page {page_num} does not exist (total pages: {len(pages)})")
-
-    return _render_text_as_svg(pages[page_num]), "image/svg+xml"
-
-
 @router.get("/doc-page-count/{document_id}")
 async def get_document_page_count(
     document_id: int,
@@ -1178,53 +1019,24 @@ async def get_document_page_count(
             logger.warning(f"[doc-page-count] Document {document_id} not found for user {current_user.id}")
             raise HTTPException(status_code=404, detail="Document not found")
 
-        logger.info(f"[doc-page-count] Document found: {document.file_name}, file_key={document.file_key}")
+        # Recorded at ingest; only older rows need the file
+        if document.page_count:
+            file_type = document.file_type or document_file_type(document.file_name)
+            return {"page_count": document.page_count, "file_type": file_type}
 
-        # Download file from storage (with database fallback)
-        file_bytes = None
-        try:
-            if not document.file_key:
-                raise ValueError("Document has no file_key")
-            supabase_storage = SupabaseStorageService()
-            download_url = await supabase_storage.get_download_url(
-                bucket_name="lease-documents",
-                object_key=document.file_key
-            )
-            logger.info(f"[doc-page-count] Got Supabase download URL, downloading...")
-            async with httpx_client.AsyncClient(timeout=120.0) as http_client:
-                file_response = await http_client.get(download_url)
-                file_response.raise_for_status()
-                file_bytes = file_response.content
-            logger.info(f"[doc-page-count] Downloaded {len(file_bytes)} bytes from Supabase")
-        except Exception as e:
-            logger.warning(f"[doc-page-count] Supabase download failed, trying database fallback: {e}")
+        logger.info(f"[doc-page-count] Document found: {document.file_name}, file_key={document.file_key}")
 
-        if not file_bytes and document.file_data:
-            file_bytes = base64.b64decode(document.file_data)
-            logger.info(f"[doc-page-count] Using database fallback, decoded {len(file_bytes)} bytes")
+        parsed = await load_parsed_document(document, "[doc-page-count]")
 
-        if not file_bytes:
+        if parsed is None:
             logger.error(f"[doc-page-count] No file bytes available for document {document_id}")
             raise HTTPException(status_code=404, detail="Document file not available")
 
-        file_name = document.file_name.lower()
-
-        if file_name.endswith(('.docx', '.doc')):
-            from services.document_extractor import _extract_docx_text
-            paragraphs = _extract_docx_text(file_bytes)
-            # Estimate pages
-            total_lines = 0
-            for para in paragraphs:
-                total_lines += max(1, len(para) // 85 + 1) + 1
-            page_count = max(1, (total_lines + 44) // 45)
-        else:
-            import io
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(file_bytes))
-            page_count = len(reader.pages)
+        page_count = max(1, parsed.page_count)
+        await doc_service.update(document.id, document_layout_fields(parsed), current_user.id)
 
         logger.info(f"[doc-page-count] Calculated page_count={page_count} for document {document_id}")
-        return {"page_count": page_count, "file_type": "docx" if file_name.endswith(('.docx', '.doc')) else "pdf"}
+        return {"page_count": page_count, "file_type": parsed.file_type}
 
     except HTTPException:
         raise
@@ -1258,8 +1070,8 @@ async def get_pdf_download_url(
         except Exception as e:
             logger.warning(f"Supabase storage unavailable, trying database fallback: {e}")
 
-        # Fallback: serve from database-stored file_data
-        if document.file_data:
+        # Fallback: serve from the database-stored copy
+        if await Document_filesService(db).exists(document_id):
             from core.auth import create_access_token
             pdf_token = create_access_token(
                 claims={"sub": current_user.id, "purpose": "pdf_view", "doc_id": document_id},
@@ -1285,7 +1097,7 @@ async def serve_pdf_from_database(
     token: str,
     db: AsyncSession = Depends(get_db),
 ):
-    """Serve a PDF directly from database-stored file_data (fallback for Supabase Storage)."""
+    """Serve a PDF directly from the database-stored copy (fallback for Supabase Storage)."""
     from core.auth import decode_access_token, AccessTokenError
 
     try:
@@ -1305,13 +1117,19 @@ async def serve_pdf_from_database(
     doc_service = DocumentsService(db)
     document = await doc_service.get_by_id(document_id, user_id)
 
-    if not document or not document.file_data:
+    if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    try:
-        file_bytes = base64.b64decode(document.file_data)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to decode stored file data")
+    cache_key = DocumentByteCache.document_key(document)
+    file_bytes = await document_byte_cache.get(cache_key)
+    if not file_bytes:
+        try:
+            file_bytes = await Document_filesService(db).get_bytes(document_id)
+        except Exception:
+            raise HTTPException(status_code=500, detail="Failed to decode stored file data")
+        if not file_bytes:
+            raise HTTPException(status_code=404, detail="Document not found")
+        await document_byte_cache.put(cache_key, file_bytes)
 
     content_type = _get_content_type(document.file_name)
 
@@ -1457,14 +1275,14 @@ async def generate_amendment_memo(
         # Parse risk flags safely (no eval)
         risk_flags = []
         if extraction.risk_flags:
-            risk_flags = safe_parse_json_or_literal(extraction.risk_flags)
+            risk_flags = load_json_value(extraction.risk_flags)
             if not isinstance(risk_flags, list):
                 risk_flags = []
 
         # Parse compliance data safely (no eval)
         compliance_data = None
         if extraction.compliance_data:
-            compliance_data = safe_parse_json_or_literal(extraction.compliance_data)
+            compliance_data = load_json_value(extraction.compliance_data)
 
         memo_service = AmendmentMemoService()
         result = await memo_service.generate_memo(extraction_data, compliance_data, risk_flags)
@@ -1657,102 +1475,41 @@ async def get_template(template_type: str):
 
 @router.get("/portfolio")
 async def get_portfolio_summary(
+    status: Optional[str] = Query(None, description="Filter leases: active, expiring_soon, expired or unknown"),
+    expiring_within_days: Optional[int] = Query(None, ge=0, description="Only leases ending within this many days"),
+    min_rent: Optional[float] = Query(None, ge=0),
+    max_rent: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, description="Sort field, prefix with '-' for descending"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get portfolio-level summary of all user's leases."""
+    """Get portfolio-level summary of all user's leases, with one page of the leases."""
     try:
-        extractions_service = ExtractionsService(db)
-        doc_service = DocumentsService(db)
-
-        # Get all user documents
-        from sqlalchemy import select
-        from models.documents import Documents
-        from models.extractions import Extractions
-
-        docs_result = await db.execute(
-            select(Documents).where(Documents.user_id == current_user.id).order_by(Documents.created_at.desc())
+        portfolio_service = PortfolioService(db)
+        today = datetime.now(timezone.utc).date()
+        leases = await portfolio_service.leases(
+            current_user.id, today,
+            status=status, expiring_within_days=expiring_within_days,
+            min_rent=min_rent, max_rent=max_rent, sort=sort, skip=skip, limit=limit,
         )
-        documents = docs_result.scalars().all()
-
-        ext_result = await db.execute(
-            select(Extractions).where(Extractions.user_id == current_user.id).order_by(Extractions.created_at.desc())
+        expiring_soon = await portfolio_service.leases(
+            current_user.id, today, status="expiring_soon", sort="lease_end_date", limit=10
         )
-        extractions = ext_result.scalars().all()
-
-        # Build portfolio data
-        total_monthly_rent = 0
-        total_deposits = 0
-        active_leases = 0
-        expiring_soon = []  # within 90 days
-        upcoming_dates = []
-
-        from datetime import datetime, timedelta
-        now = datetime.now(timezone.utc)
-        ninety_days = now + timedelta(days=90)
-
-        lease_items = []
-        for ext in extractions:
-            item = {
-                "extraction_id": ext.id,
-                "document_id": ext.document_id,
-                "property_address": ext.property_address,
-                "tenant_name": ext.tenant_name,
-                "monthly_rent": ext.monthly_rent,
-                "security_deposit": ext.security_deposit,
-                "lease_start_date": ext.lease_start_date,
-                "lease_end_date": ext.lease_end_date,
-                "status": "active",
-            }
-
-            if ext.monthly_rent:
-                total_monthly_rent += ext.monthly_rent
-            if ext.security_deposit:
-                total_deposits += ext.security_deposit
-
-            # Check lease status
-            if ext.lease_end_date:
-                try:
-                    end_date = datetime.strptime(ext.lease_end_date, "%Y-%m-%d")
-                    if end_date < now:
-                        item["status"] = "expired"
-                    elif end_date <= ninety_days:
-                        item["status"] = "expiring_soon"
-                        expiring_soon.append(item)
-                    else:
-                        item["status"] = "active"
-                        active_leases += 1
-
-                    upcoming_dates.append({
-                        "date": ext.lease_end_date,
-                        "type": "lease_end",
-                        "label": f"Lease ends – {ext.property_address or 'Unknown'}",
-                        "extraction_id": ext.id,
-                    })
-                except ValueError:
-                    item["status"] = "unknown"
-            else:
-                active_leases += 1
-
-            lease_items.append(item)
-
-        # Sort upcoming dates
-        upcoming_dates.sort(key=lambda x: x["date"])
 
         return {
-            "summary": {
-                "total_properties": len(lease_items),
-                "active_leases": active_leases,
-                "expiring_soon": len(expiring_soon),
-                "total_monthly_rent": round(total_monthly_rent, 2),
-                "total_annual_rent": round(total_monthly_rent * 12, 2),
-                "total_deposits_held": round(total_deposits, 2),
-            },
-            "leases": lease_items,
-            "upcoming_dates": upcoming_dates[:10],
-            "expiring_soon": expiring_soon,
+            "summary": await portfolio_service.summary(current_user.id, today),
+            "leases": leases["items"],
+            "leases_total": leases["total"],
+            "skip": skip,
+            "limit": limit,
+            "upcoming_dates": await portfolio_service.upcoming_lease_ends(current_user.id, today),
+            "expiring_soon": expiring_soon["items"],
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Portfolio summary error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1792,14 +1549,14 @@ async def get_executive_summary(
         # Parse risk flags safely (no eval)
         risk_flags = []
         if extraction.risk_flags:
-            risk_flags = safe_parse_json_or_literal(extraction.risk_flags)
+            risk_flags = load_json_value(extraction.risk_flags)
             if not isinstance(risk_flags, list):
                 risk_flags = []
 
         # Parse compliance data safely (no eval)
         compliance_data = None
         if extraction.compliance_data:
-            compliance_data = safe_parse_json_or_literal(extraction.compliance_data)
+            compliance_data = load_json_value(extraction.compliance_data)
 
         summary_service = ExecutiveSummaryService()
         result = await summary_service.generate_summary(extraction_data, compliance_data, risk_flags)
@@ -1846,14 +1603,14 @@ async def export_pdf_report(
         # Parse risk flags safely (no eval)
         risk_flags = []
         if extraction.risk_flags:
-            risk_flags = safe_parse_json_or_literal(extraction.risk_flags)
+            risk_flags = load_json_value(extraction.risk_flags)
             if not isinstance(risk_flags, list):
                 risk_flags = []
 
         # Parse compliance data safely (no eval)
         compliance_data = None
         if extraction.compliance_data:
-            compliance_data = safe_parse_json_or_literal(extraction.compliance_data)
+            compliance_data = load_json_value(extraction.compliance_data)
 
         # Get benchmark data
         from services.rent_benchmark import RentBenchmarkService
@@ -1870,9 +1627,8 @@ async def export_pdf_report(
         except Exception:
             executive_summary = None
 
-        # Generate PDF
-        generator = PDFReportGenerator()
-        pdf_bytes = generator.generate(
+        # Generate PDF (reportlab layout is CPU-bound; it runs in the CPU pool)
+        pdf_bytes = await document_tasks.pdf_report(
             extraction=extraction_data,
             risk_flags=risk_flags,
             compliance_data=compliance_data,
@@ -1922,3 +1678,100 @@ async def record_share_credit(
     except Exception as e:
         logger.error(f"Record share error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ---------- Admin: caches ----------
+
+@admin_router.get("/gemini-cache/stats")
+async def get_gemini_cache_stats(
+    _current_user: UserResponse = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Hit/miss counters for this process plus the number of stored entries"""
+    try:
+        entries = await GeminiResultCacheService(db).count()
+        return {**get_cache_stats(), "entries": entries}
+    except Exception as e:
+        logger.error(f"Gemini cache stats error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@admin_router.delete("/gemini-cache")
+async def purge_gemini_cache(
+    file_sha256: Optional[str] = Query(None, description="Only purge entries for this file hash"),
+    _current_user: UserResponse = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Purge cached Gemini results (all, or one file)"""
+    try:
+        purged = await GeminiResultCacheService(db).purge(file_sha256)
+        return {"success": True, "purged": purged}
+    except Exception as e:
+        logger.error(f"Gemini cache purge error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@admin_router.get("/document-cache/stats")
+async def get_document_cache_stats(_current_user: UserResponse = Depends(get_admin_user)):
+    """Hit rates and byte usage of the local document byte cache"""
+    return document_byte_cache.stats()
+
+
+@admin_router.get("/regulations-index/stats")
+async def get_regulations_index_stats(_current_user: UserResponse = Depends(get_admin_user)):
+    """Lookups, loads and invalidations of this process's regulations index"""
+    return regulations_index.stats()
+
+
+@admin_router.get("/event-loop/stats")
+async def get_event_loop_stats(_current_user: UserResponse = Depends(get_admin_user)):
+    """Event loop lag histogram and the stacks of recent stalls (needs LOOP_MONITOR_ENABLED)"""
+    return loop_monitor.stats()
+
+
+# ---------- Admin: compliance re-evaluation ----------
+
+def _reevaluation_run(run) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "state_code": run.state_code,
+        "status": run.status,
+        "revision": run.revision,
+        "last_extraction_id": run.last_extraction_id,
+        "scanned": run.scanned,
+        "updated": run.updated,
+        "error": run.error,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+    }
+
+
+@admin_router.get("/compliance-reevaluations")
+async def list_compliance_reevaluations(
+    limit: int = Query(50, ge=1, le=500),
+    _current_user: UserResponse = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Recent bulk compliance re-evaluation runs, newest first"""
+    try:
+        runs = await Compliance_reevaluationsService(db).get_recent(limit)
+        return {"runs": [_reevaluation_run(run) for run in runs]}
+    except Exception as e:
+        logger.error(f"List compliance re-evaluations error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@admin_router.post("/compliance-reevaluations", status_code=202)
+async def request_compliance_reevaluations(
+    state_code: List[str] = Query(..., description="State codes to re-evaluate"),
+    _current_user: UserResponse = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Re-check the stored compliance reports of these states against their current regulations"""
+    try:
+        await request_compliance_reevaluation(db, [code.upper() for code in state_code])
+        return {"success": True, "state_codes": sorted({code.upper() for code in state_code})}
+    except Exception as e:
+        logger.error(f"Request compliance re-evaluation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
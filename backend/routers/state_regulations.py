@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
@@ -8,7 +8,10 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from models.state_regulations import State_regulations
 from services.state_regulations import State_regulationsService
+from utils.pagination import InvalidCursorError
+from utils.projection import parse_fields, partial_model
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -63,12 +66,16 @@ class State_regulationsResponse(BaseModel):
         from_attributes = True
 
 
+State_regulationsResponsePartial = partial_model(State_regulationsResponse)
+
+
 class State_regulationsListResponse(BaseModel):
-    """List response schema"""
-    items: List[State_regulationsResponse]
-    total: int
+    """List response schema (items are partial when `fields` is given)"""
+    items: List[Union[State_regulationsResponse, State_regulationsResponsePartial]]
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # set in cursor mode while more pages remain
 
 
 class State_regulationsBatchCreateRequest(BaseModel):
@@ -93,13 +100,15 @@ class State_regulationsBatchDeleteRequest(BaseModel):
 
 
 # ---------- Routes ----------
-@router.get("", response_model=State_regulationsListResponse)
+@router.get("", response_model=State_regulationsListResponse, response_model_exclude_unset=True)
 async def query_state_regulationss(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     db: AsyncSession = Depends(get_db),
 ):
     """Query state_regulationss with filtering, sorting, and pagination"""
@@ -115,28 +124,40 @@ async def query_state_regulationss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        try:
+            field_list = parse_fields(fields, State_regulationsResponse, State_regulations)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} state_regulationss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying state_regulationss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/all", response_model=State_regulationsListResponse)
+@router.get("/all", response_model=State_regulationsListResponse, response_model_exclude_unset=True)
 async def query_state_regulationss_all(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     db: AsyncSession = Depends(get_db),
 ):
     # Query state_regulationss with filtering, sorting, and pagination without user limitation
@@ -152,16 +173,26 @@ async def query_state_regulationss_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        try:
+            field_list = parse_fields(fields, State_regulationsResponse, State_regulations)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} state_regulationss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying state_regulationss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from datetime import datetime, date
 
@@ -9,9 +9,12 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from models.user_credentials import User_credentials
 from services.user_credentials import User_credentialsService
 from dependencies.auth import get_current_user
 from schemas.auth import UserResponse
+from utils.pagination import InvalidCursorError
+from utils.projection import parse_fields, partial_model
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -49,12 +52,16 @@ class User_credentialsResponse(BaseModel):
         from_attributes = True
 
 
+User_credentialsResponsePartial = partial_model(User_credentialsResponse)
+
+
 class User_credentialsListResponse(BaseModel):
-    """List response schema"""
-    items: List[User_credentialsResponse]
-    total: int
+    """List response schema (items are partial when `fields` is given)"""
+    items: List[Union[User_credentialsResponse, User_credentialsResponsePartial]]
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # set in cursor mode while more pages remain
 
 
 class User_credentialsBatchCreateRequest(BaseModel):
@@ -79,13 +86,15 @@ class User_credentialsBatchDeleteRequest(BaseModel):
 
 
 # ---------- Routes ----------
-@router.get("", response_model=User_credentialsListResponse)
+@router.get("", response_model=User_credentialsListResponse, response_model_exclude_unset=True)
 async def query_user_credentialss(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     current_user: UserResponse = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -102,29 +111,41 @@ async def query_user_credentialss(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
         
+        try:
+            field_list = parse_fields(fields, User_credentialsResponse, User_credentials)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip, 
             limit=limit,
             query_dict=query_dict,
             sort=sort,
             user_id=str(current_user.id),
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} user_credentialss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying user_credentialss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/all", response_model=User_credentialsListResponse)
+@router.get("/all", response_model=User_credentialsListResponse, response_model_exclude_unset=True)
 async def query_user_credentialss_all(
     query: str = Query(None, description="Query conditions (JSON string)"),
     sort: str = Query(None, description="Sort field (prefix with '-' for descending)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=2000, description="Max number of records to return"),
     fields: str = Query(None, description="Comma-separated list of fields to return"),
+    cursor: str = Query(None, description="Keyset pagination: empty for the first page, then the previous next_cursor (skip and sort are ignored)"),
+    include_total: bool = Query(True, description="Include the total count (cached briefly in cursor mode)"),
     db: AsyncSession = Depends(get_db),
 ):
     # Query user_credentialss with filtering, sorting, and pagination without user limitation
@@ -140,16 +161,26 @@ async def query_user_credentialss_all(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=400, detail="Invalid query JSON format")
 
+        try:
+            field_list = parse_fields(fields, User_credentialsResponse, User_credentials)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         result = await service.get_list(
             skip=skip,
             limit=limit,
             query_dict=query_dict,
-            sort=sort
+            sort=sort,
+            fields=field_list,
+            cursor=cursor,
+            include_total=include_total,
         )
         logger.debug(f"Found {result['total']} user_credentialss")
         return result
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error querying user_credentialss: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -0,0 +1,188 @@
+"""
+Address-to-state resolution: correctness corpus and throughput.
+
+Checks services.address_state against CORPUS, a set of hand-labelled
+addresses in the shapes leases use. Many of them tripped the previous
+substring matcher: "in", "or" and "me" inside words, street names that are
+state names, and no state but a ZIP. The previous matcher is kept here as
+`legacy_state` for comparison. Then it times both on --addresses synthetic
+addresses, with --distinct of them unique. The new parser is timed once
+cold (memo cleared) and once as a batch call with the memo warm.
+
+    cd backend
+    python -m scripts.bench_address_state --addresses 100000
+    python -m scripts.bench_address_state --check    # exit 1 on any corpus miss
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from services.address_state import ALL_STATE_CODES, STATE_NAMES, _parse, state_from_address, states_from_addresses
+
+CORPUS = [
+    ("1200 Main St, Apt 4, Austin, TX 78701", "TX"),
+    ("3 Main St, Austin, TX", "TX"),
+    ("12 Main Street, Springfield, IL 62701", "IL"),
+    ("12 Main Street, Springfield, IL 62701, Unit 4", "IL"),
+    ("450 Marine Dr, Portland, OR 97217", "OR"),
+    ("450 Marine Dr, Portland, or 97217", "OR"),
+    ("88 Commerce Way, Portland, ME 04101", "ME"),
+    ("17 Pine Ridge Rd, Bangor, Maine", "ME"),
+    ("900 Kingston Ave, Fort Wayne, IN 46802", "IN"),
+    ("900 Kingston Ave, Fort Wayne, Indiana", "IN"),
+    ("12 Ocean Ave, Santa Monica, California", "CA"),
+    ("12 Ocean Ave, Santa Monica, CA 90401", "CA"),
+    ("12 Ocean Ave, Santa Monica CA 90401-1234", "CA"),
+    ("12 Ocean Ave, Santa Monica, CA, 90401", "CA"),
+    ("12 Ocean Ave, Santa Monica, CA 90401, USA", "CA"),
+    ("12 Ocean Ave, Santa Monica, CA 90401, United States", "CA"),
+    ("12 Ocean Ave., Santa Monica, Calif 90401", "CA"),
+    ("500 Texas Ave, Shreveport, LA 71101", "LA"),
+    ("500 Texas Ave, Shreveport, Louisiana", "LA"),
+    ("1 Virginia Ave NW, Washington, DC 20037", "DC"),
+    ("1600 Pennsylvania Ave NW, Washington, DC 20500", "DC"),
+    ("1 Virginia Ave NW, Washington, District of Columbia", "DC"),
+    ("22 Georgia Ave, Silver Spring, MD 20910", "MD"),
+    ("100 Washington St, Boston, MA 02108", "MA"),
+    ("100 Washington St, Seattle, WA", "WA"),
+    ("77 Oregon Trail, Boise, ID 83702", "ID"),
+    ("5 Nevada St, Carson City NV", "NV"),
+    ("300 Maine Ave, Wilmington, Delaware 19801", "DE"),
+    ("42 Kansas St, Kansas City, MO 64105", "MO"),
+    ("42 Kansas Ave, Topeka, Kansas", "KS"),
+    ("2 Arkansas Rd, Little Rock AR 72201", "AR"),
+    ("1 Broadway, New York, NY 10004", "NY"),
+    ("1 Broadway, New York, New York", "NY"),
+    ("1 Broadway, New York", "NY"),
+    ("55 Capitol St, Charleston, West Virginia", "WV"),
+    ("55 Capitol St, Charleston, WV 25301", "WV"),
+    ("55 Capitol St, Richmond, Virginia", "VA"),
+    ("9 Sunset Blvd, Los Angeles 90028", "CA"),
+    ("9 Sunset Blvd, 90028", "CA"),
+    ("12345 Ranch Rd, Austin, Texas", "TX"),
+    ("12345 Ranch Rd, Austin 78737", "TX"),
+    ("77 Canal St, New Orleans 70130", "LA"),
+    ("31 Harbor Rd, Anchorage 99501", "AK"),
+    ("8 Aloha Way, Honolulu, HI 96815", "HI"),
+    ("10 Main St, Providence, RI 02903", "RI"),
+    ("10 Main St, Hartford, CT 06103", "CT"),
+    ("10 Main St, Burlington VT 05401", "VT"),
+    ("10 Main St., Manchester, N.H. 03101", "NH"),
+    ("4 Elm St, Dover, NH", "NH"),
+    ("4 Elm St, Dover, nh", "NH"),
+    ("PO Box 77, Cheyenne, WY 82001", "WY"),
+    ("Unit 5, 600 Lake Shore Dr, Chicago, Illinois 60611", "IL"),
+    ("600 Lake Shore Dr\nChicago, IL 60611", "IL"),
+    ("600 LAKE SHORE DR, CHICAGO, IL 60611", "IL"),
+    ("2100 Minnesota Ave, Duluth, Minnesota 55802", "MN"),
+    ("14 Ohio St, Columbus OH", "OH"),
+    ("14 Main Street, Columbus, Ohio 43215", "OH"),
+    ("3 Iowa Ave, Iowa City, IA 52240", "IA"),
+    ("7 Palmetto Ln, Charleston, SC 29401", "SC"),
+    ("7 Peachtree St, Atlanta, Georgia", "GA"),
+    ("7 Peachtree St, Atlanta, GA, 30303", "GA"),
+    ("18 Beacon St, Boston, Massachusetts", "MA"),
+    ("1 Market St, Philadelphia, PA 19106", "PA"),
+    ("2 Colfax Ave, Denver, CO 80202", "CO"),
+    ("2 Central Ave, Albuquerque, New Mexico 87102", "NM"),
+    ("2 Central Ave, Phoenix AZ 85004", "AZ"),
+    ("9 Temple Sq, Salt Lake City, UT 84150", "UT"),
+    ("4 Music Row, Nashville, TN 37203", "TN"),
+    ("4 Main St, Jackson, MS 39201", "MS"),
+    ("4 Main St, Jackson, Mississippi", "MS"),
+    ("20 Bourbon Ln, Louisville, KY 40202", "KY"),
+    ("5 Capitol Ave, Lansing, MI 48933", "MI"),
+    ("5 Lake St, Madison, Wisconsin 53703", "WI"),
+    ("5 Prairie Rd, Bismarck, ND 58501", "ND"),
+    ("5 Prairie Rd, Pierre, South Dakota", "SD"),
+    ("5 Big Sky Rd, Helena, MT 59601", "MT"),
+    ("5 Husker Ln, Omaha, NE 68102", "NE"),
+    ("5 Sooner Dr, Tulsa, OK 74103", "OK"),
+    ("5 Gator Way, Miami, FL 33101", "FL"),
+    ("5 Tar Heel Rd, Raleigh, North Carolina", "NC"),
+    ("5 Cotton Rd, Montgomery, AL 36104", "AL"),
+    ("5 Harbor St, Baltimore, Maryland", "MD"),
+    ("5 Shore Rd, Trenton, New Jersey 08608", "NJ"),
+    ("5 Falls Rd, Spokane, Washington 99201", "WA"),
+    ("12 Main Street", None),
+    ("Apartment 4B", None),
+    ("", None),
+    ("TBD", None),
+    ("100 Commerce Blvd, Suite 300", None),
+    ("10 Rue de Rivoli, 75001 Paris, France", None),
+]
+
+
+LEGACY_MAPPINGS = {}
+for _name, _code in STATE_NAMES.items():
+    LEGACY_MAPPINGS[_name] = _code
+    LEGACY_MAPPINGS[_code.lower()] = _code
+
+
+def legacy_state(address):
+    """The substring matcher ComplianceChecker used before services.address_state"""
+    if not address:
+        return None
+    address_lower = address.lower()
+    for state_name, state_code in LEGACY_MAPPINGS.items():
+        if state_name in address_lower:
+            return state_code
+    parts = address.replace(",", " ").split()
+    for part in reversed(parts):
+        if len(part) == 2 and part.upper() in ALL_STATE_CODES:
+            return part.upper()
+    return None
+
+
+def check_corpus(fn):
+    misses = [(address, expected, fn(address)) for address, expected in CORPUS if fn(address) != expected]
+    return len(CORPUS) - len(misses), misses
+
+
+def synthetic_addresses(count: int, distinct: int):
+    rng = random.Random(5)
+    streets = ["Main St", "Maple Ave", "Mission Blvd", "Pine Ridge Rd", "Washington St", "Lake Shore Dr"]
+    cities = ["Springfield", "Fort Wayne", "Portland", "Austin", "Santa Monica", "Columbus"]
+    codes = sorted(ALL_STATE_CODES)
+    unique = [
+        f"{rng.randint(1, 9999)} {rng.choice(streets)}, Apt {rng.randint(1, 40)}, {rng.choice(cities)}, "
+        f"{rng.choice(codes)} {rng.randint(10000, 99999)}"
+        for _ in range(distinct)
+    ]
+    return [rng.choice(unique) for _ in range(count)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(args):
+    ok = True
+    for label, fn in (("legacy", legacy_state), ("parser", state_from_address)):
+        correct, misses = check_corpus(fn)
+        print(f"{label:<7} corpus {correct}/{len(CORPUS)}")
+        if label == "parser":
+            ok = not misses
+            for address, expected, got in misses:
+                print(f"  miss: {address!r}: expected {expected}, got {got}")
+    if args.check:
+        sys.exit(0 if ok else 1)
+
+    addresses = synthetic_addresses(args.addresses, args.distinct)
+    _parse.cache_clear()
+    print(f"\n{args.addresses} addresses, {args.distinct} distinct")
+    print(f"legacy          {timed(lambda: [legacy_state(a) for a in addresses]):>9.1f} ms")
+    print(f"parser (cold)   {timed(lambda: [state_from_address(a) for a in addresses]):>9.1f} ms")
+    print(f"parser (batch)  {timed(lambda: states_from_addresses(addresses)):>9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--addresses", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=20000)
+    parser.add_argument("--check", action="store_true")
+    main(parser.parse_args())
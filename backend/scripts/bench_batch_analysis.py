@@ -0,0 +1,117 @@
+"""
+Throughput of /analyze-batch versus concurrency, with Gemini and storage stubbed.
+
+Runs the real batch pipeline (per-document sessions, compliance check,
+extraction insert, credit deduction) against a throwaway SQLite database.
+Only the network calls are replaced by sleeps of fixed latency.
+
+    cd backend
+    python -m scripts.bench_batch_analysis --docs 50 --gemini-latency 2.0 --levels 1,2,4,8,16
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.config import settings
+from core.database import Base
+from models.documents import Documents
+from models.user_credits import User_credits
+from services import analysis_pipeline
+from services.gemini_extractor import GeminiExtractor
+
+BENCH_USER = "bench-user"
+
+STUB_RESULT = {
+    "extracted_data": {
+        "tenant_name": "Jane Tenant",
+        "landlord_name": "Acme Properties LLC",
+        "property_address": "100 Main St, Austin, TX 78701",
+        "monthly_rent": 1800,
+        "security_deposit": 1800,
+        "lease_start_date": "2025-01-01",
+        "lease_end_date": "2025-12-31",
+        "risk_flags": [],
+        "audit_checklist": [],
+    },
+    "pages_meta": [{"page": 1, "width": 612, "height": 792}],
+    "source_map": {},
+}
+
+
+def install_stubs(download_latency: float, gemini_latency: float):
+    async def fake_fetch(document, log_prefix: str = "[analysis]"):
+        await asyncio.sleep(download_latency)
+        # Unique bytes per document so the Gemini result cache never short-circuits
+        return f"%PDF-1.4 stub {document.file_key}".encode()
+
+    async def fake_analyze(self, file_bytes, file_name, timer=None):
+        await asyncio.sleep(gemini_latency)
+        return STUB_RESULT
+
+    analysis_pipeline.fetch_document_bytes = fake_fetch
+    GeminiExtractor.__init__ = lambda self, *a, **kw: None
+    GeminiExtractor.analyze_pdf = fake_analyze
+
+
+async def seed(session_factory, docs: int):
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        db.add(User_credits(
+            user_id=BENCH_USER, free_credits=0, paid_credits=docs * 100,
+            subscription_type="none", created_at=now, updated_at=now,
+        ))
+        rows = [
+            Documents(
+                user_id=BENCH_USER, file_name=f"lease-{i}.pdf", file_key=f"bench/{i}.pdf",
+                file_size=13, status="uploaded", created_at=now, updated_at=now,
+            )
+            for i in range(docs)
+        ]
+        db.add_all(rows)
+        await db.commit()
+        return [r.id for r in rows]
+
+
+async def main(args):
+    settings.gemini_cache_enabled = False
+    install_stubs(args.download_latency, args.gemini_latency)
+    levels = [int(x) for x in args.levels.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        doc_ids = await seed(session_factory, args.docs)
+
+        print(f"{args.docs} documents, download {args.download_latency}s, gemini {args.gemini_latency}s")
+        print(f"{'concurrency':>11} {'seconds':>9} {'docs/s':>8} {'speedup':>8} {'failed':>7}")
+        baseline = None
+        for level in levels:
+            start = time.perf_counter()
+            results = await analysis_pipeline.run_batch_analysis(
+                doc_ids, BENCH_USER, charge_credit=True,
+                concurrency=level, session_factory=session_factory,
+            )
+            elapsed = time.perf_counter() - start
+            assert [r["document_id"] for r in results] == doc_ids, "result order changed"
+            failed = sum(1 for r in results if not r["success"])
+            baseline = baseline or elapsed
+            print(f"{level:>11} {elapsed:>9.2f} {args.docs / elapsed:>8.2f} {baseline / elapsed:>7.1f}x {failed:>7}")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--levels", default="1,2,4,8")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""
+Refreshing stored compliance reports after a regulation change: per row versus bulk.
+
+Seeds a throwaway SQLite database with --leases California extractions and
+their compliance reports, then tightens the CA deposit limit (AB 12: one
+month's rent). It then times two ways of bringing every report up to date.
+"per-row" runs ComplianceChecker.check_compliance and ExtractionsService.update
+for each row, as a script over the existing services would. "bulk" is the
+re-evaluation run that the regulation write queues (--chunk-size rows per
+transaction). The reports both produce are compared at the end.
+
+    cd backend
+    python -m scripts.bench_compliance_reevaluation --leases 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.database import Base, db_manager
+from models.extractions import Extractions
+from models.state_regulations import State_regulations
+from services.compliance_checker import ComplianceChecker
+from services.compliance_reevaluation_worker import ComplianceReevaluator
+from services.compliance_reevaluations import Compliance_reevaluationsService
+from services.extractions import ExtractionsService
+from services.regulations_index import regulations_index
+from services.state_regulations import State_regulationsService
+
+CA_REGULATIONS = [
+    ("security_deposit_limit", "Security Deposit", {"max_multiplier": 2.0}),
+    ("security_deposit_return", "Deposit Return", {"required_days": 21}),
+    ("late_fee_limit", "Late Fees", {"max_amount": 50.0, "max_multiplier": 0.05}),
+    ("notice_to_vacate", "Notice to Vacate", {"required_days": 30}),
+    ("rent_increase_notice", "Rent Increase Notice", {"required_days": 30}),
+]
+
+
+async def seed(session_factory, leases: int) -> int:
+    rng = random.Random(11)
+    async with session_factory() as db:
+        deposit_rule = None
+        for category, title, limits in CA_REGULATIONS:
+            reg = await State_regulationsService(db).create({
+                "state_code": "CA", "state_name": "California", "regulation_category": category,
+                "regulation_title": title, "regulation_content": f"{title} rules.", **limits,
+            })
+            deposit_rule = deposit_rule or reg.id
+        checker = ComplianceChecker(db)
+        for i in range(leases):
+            rent = float(rng.randint(1500, 5000))
+            data = {"document_id": i + 1, "property_address": f"{i} Ocean Ave, Santa Monica, CA 90401",
+                    "monthly_rent": rent, "security_deposit": rent * rng.choice([1, 1.5, 2])}
+            await ExtractionsService(db).create({**data, "compliance_data": await checker.check_compliance(data)}, "bench")
+    return deposit_rule
+
+
+async def per_row(db):
+    checker = ComplianceChecker(db)
+    service = ExtractionsService(db)
+    rows = (await db.execute(
+        select(Extractions.id, Extractions.property_address, Extractions.monthly_rent, Extractions.security_deposit)
+        .where(Extractions.user_id == "bench")
+        .order_by(Extractions.id)
+    )).all()
+    for row in rows:
+        report = await checker.check_compliance(dict(row._mapping))
+        await service.update(row.id, {"compliance_data": report})
+
+
+async def reports(db):
+    result = await db.execute(select(Extractions.id, Extractions.compliance_data).order_by(Extractions.id))
+    return result.all()
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        db_manager.async_session_maker = session_factory
+        deposit_rule = await seed(session_factory, args.leases)
+        reevaluator = ComplianceReevaluator(args.chunk_size)
+        await reevaluator.drain()
+
+        async with session_factory() as db:
+            # Change the rule without queueing a run, so both paths start from the same stale reports
+            await db.execute(
+                update(State_regulations).where(State_regulations.id == deposit_rule).values(max_multiplier=1.0)
+            )
+            await db.commit()
+        regulations_index.invalidate()
+
+        async with session_factory() as db:
+            start = time.perf_counter()
+            await per_row(db)
+            per_row_s = time.perf_counter() - start
+            expected = await reports(db)
+
+        async with session_factory() as db:
+            await db.execute(update(Extractions).values(compliance_data={}))
+            await db.commit()
+            start = time.perf_counter()
+            await Compliance_reevaluationsService(db).request(["CA"])
+            await reevaluator.drain()
+            bulk_s = time.perf_counter() - start
+            actual = await reports(db)
+
+        await engine.dispose()
+
+    print(f"{args.leases} CA leases")
+    print(f"per-row {per_row_s * 1000:>9.1f} ms")
+    print(f"bulk    {bulk_s * 1000:>9.1f} ms  (chunks of {args.chunk_size})")
+    print(f"identical reports: {expected == actual}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leases", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
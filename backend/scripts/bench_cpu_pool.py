@@ -0,0 +1,111 @@
+"""
+Latency of a light endpoint while heavy page renders run: threads versus the CPU pool.
+
+A small FastAPI app serves /health (as main.py does) and /render/{n}. /render
+parses a generated --pages page PDF from cold and draws its first page, as
+/pdf-page does on the first view of a document. --heavy clients request
+/render back to back while one client requests /health every 10 ms, all in
+process over httpx's ASGI transport. Each mode runs for --duration seconds:
+
+- idle: /health alone;
+- threads: the parse in a thread, as before the CPU pool (cpu_pool_workers=0);
+- processes: the parse in a CPU pool of --workers processes.
+
+    cd backend
+    python -m scripts.bench_cpu_pool --pages 100 --heavy 4 --duration 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+import services.document_tasks as document_tasks
+from routers.lease_analysis import _render_layout_as_svg
+from scripts.bench_page_render import make_pdf
+from services.cpu_pool import CPUPool
+from services.document_model import ParsedDocumentCache
+
+app = FastAPI()
+PDFS = []
+
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/render/{n}")
+async def render(n: int):
+    parsed = await document_tasks.parse_document(PDFS[n % len(PDFS)], "lease.pdf")
+    return Response(_render_layout_as_svg(parsed.page_layout(0)), media_type="image/svg+xml")
+
+
+async def heavy_client(client: httpx.AsyncClient, stop: asyncio.Event, counts: list):
+    n = 0
+    while not stop.is_set():
+        response = await client.get(f"/render/{n}")
+        response.raise_for_status()
+        counts.append(1)
+        n += 1
+
+
+async def light_client(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run_mode(heavy: int, duration: float):
+    samples, counts = [], []
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        tasks = [asyncio.create_task(light_client(client, stop, samples))]
+        tasks += [asyncio.create_task(heavy_client(client, stop, counts)) for _ in range(heavy)]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return samples, len(counts)
+
+
+def percentile(samples, share: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def main(args):
+    PDFS.extend(make_pdf(args.pages) + f"%{i}\n".encode() for i in range(4))
+    # Nothing stays cached: every /render parses
+    document_tasks.parsed_document_cache = ParsedDocumentCache(max_entries=0)
+
+    print(f"{args.pages}-page PDF, {args.heavy} render clients, {args.duration:.0f}s per mode")
+    print(f"{'mode':<10} {'health p50':>10} {'p99 ms':>8} {'max ms':>8} {'requests':>9} {'renders':>8}")
+    for mode in ("idle", "threads", "processes"):
+        pool = CPUPool(args.workers if mode == "processes" else 0, 120.0, 0, 0)
+        document_tasks.cpu_pool = pool
+        await pool.start()
+        try:
+            samples, renders = await run_mode(0 if mode == "idle" else args.heavy, args.duration)
+        finally:
+            await pool.stop()
+        print(
+            f"{mode:<10} {statistics.median(samples):>10.2f} {percentile(samples, 0.99):>8.2f} "
+            f"{max(samples):>8.2f} {len(samples):>9} {renders:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--heavy", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
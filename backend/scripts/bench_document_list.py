@@ -0,0 +1,113 @@
+"""
+Document list latency and memory with file bytes inline versus in document_files.
+
+Seeds a throwaway SQLite database with documents carrying a file of
+--file-kb each. The "inline" path selects the rows with the legacy base64
+column undeferred, the way every select(Documents) behaved before. The
+"deferred" path is DocumentsService.get_list as it is now, with the bytes in
+document_files. The "fields" path is the list with ?fields=id,file_name,status
+(a column-level select). Peak memory is measured with tracemalloc around each query.
+
+    cd backend
+    python -m scripts.bench_document_list --docs 200 --file-kb 2048 --page-size 50
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import undefer
+
+from core.database import Base
+from models.document_files import Document_files
+from models.documents import Documents
+from services.documents import DocumentsService
+
+BENCH_USER = "bench-user"
+
+
+async def seed(session_factory, docs: int, file_kb: int):
+    now = datetime.now(timezone.utc)
+    payload = os.urandom(file_kb * 1024)
+    encoded = base64.b64encode(payload).decode()
+    async with session_factory() as db:
+        for i in range(docs):
+            doc = Documents(
+                user_id=BENCH_USER, file_name=f"lease-{i}.pdf", file_key=f"bench/{i}.pdf",
+                file_size=len(payload), file_data=encoded, status="completed",
+                created_at=now, updated_at=now,
+            )
+            db.add(doc)
+            await db.flush()
+            db.add(Document_files(document_id=doc.id, data=payload, size=len(payload), created_at=now))
+        await db.commit()
+
+
+async def list_inline(db, page_size: int):
+    result = await db.execute(
+        select(Documents).options(undefer(Documents.file_data))
+        .where(Documents.user_id == BENCH_USER)
+        .order_by(Documents.id.desc())
+        .limit(page_size)
+    )
+    return result.scalars().all()
+
+
+async def list_deferred(db, page_size: int):
+    result = await DocumentsService(db).get_list(limit=page_size, user_id=BENCH_USER)
+    return result["items"]
+
+
+async def list_projected(db, page_size: int):
+    result = await DocumentsService(db).get_list(
+        limit=page_size, user_id=BENCH_USER, fields=["id", "file_name", "status"]
+    )
+    return result["items"]
+
+
+async def measure(session_factory, fn, page_size: int, repeats: int):
+    timings, peaks = [], []
+    for _ in range(repeats):
+        async with session_factory() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            rows = await fn(db, page_size)
+            timings.append((time.perf_counter() - start) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+            tracemalloc.stop()
+            assert len(rows) == page_size, "seeded fewer rows than the page size"
+    return statistics.median(timings), max(peaks)
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await seed(session_factory, args.docs, args.file_kb)
+
+        print(f"{args.docs} documents × {args.file_kb} KB, page of {args.page_size}, {args.repeats} runs")
+        print(f"{'path':<9} {'median ms':>10} {'peak MB':>9}")
+        for label, fn in (("inline", list_inline), ("deferred", list_deferred), ("fields", list_projected)):
+            median_ms, peak_mb = await measure(session_factory, fn, args.page_size, args.repeats)
+            print(f"{label:<9} {median_ms:>10.1f} {peak_mb:>9.1f}")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--file-kb", type=int, default=1024)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""
+Requests/sec with a fresh httpx.AsyncClient per call versus the pooled client.
+
+Starts a tiny keep-alive HTTP/1.1 stub server on localhost and then issues the
+same number of GETs two ways: the old per-call pattern
+(`async with httpx.AsyncClient()`) and core.http_client.get_http_client().
+The stub is plain HTTP, so the TLS handshakes that Supabase would add on top are
+not measured. Real-world savings are larger than what this prints.
+
+    cd backend
+    python -m scripts.bench_http_pool --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from core.http_client import close_http_clients, get_http_client
+
+BODY = b'{"signedURL": "/object/sign/lease-documents/x.pdf?token=abc"}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\nConnection: keep-alive\r\n\r\n" + BODY
+)
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run(label: str, url: str, total: int, concurrency: int, pooled: bool) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            if pooled:
+                response = await get_http_client("supabase").get(url)
+            else:
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    response = await client.get(url)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - start
+    rps = total / elapsed
+    print(f"{label:<22} {elapsed:>8.2f}s {rps:>10.0f} req/s")
+    return rps
+
+
+async def main(args):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/storage/v1/object/sign/lease-documents/x.pdf"
+
+    async with server:
+        print(f"{args.requests} GETs, concurrency {args.concurrency}, stub at {url}")
+        before = await run("client per request", url, args.requests, args.concurrency, pooled=False)
+        after = await run("pooled client", url, args.requests, args.concurrency, pooled=True)
+        print(f"speedup: {after / before:.1f}x")
+        await close_http_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
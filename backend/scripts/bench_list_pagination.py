@@ -0,0 +1,85 @@
+"""
+Deep-page latency of DocumentsService.get_list: offset versus cursor mode.
+
+Seeds a throwaway SQLite database with --docs documents for one user. It then
+times fetching pages at increasing depth with skip/limit and with the keyset
+cursor. Offset mode also pays a count(*) on every page, while cursor mode
+serves the total from the count cache.
+
+    cd backend
+    python -m scripts.bench_list_pagination --docs 200000 --page-size 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.database import Base
+from models.documents import Documents
+from services.documents import DocumentsService
+
+BENCH_USER = "bench-user"
+
+
+async def seed(engine, docs: int):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        {
+            "user_id": BENCH_USER, "file_name": f"lease-{i}.pdf", "file_key": f"bench/{i}.pdf",
+            "file_size": 1024, "status": "completed",
+            "created_at": start + timedelta(minutes=i), "updated_at": start,
+        }
+        for i in range(docs)
+    ]
+    async with engine.begin() as conn:
+        for i in range(0, docs, 10000):
+            await conn.execute(insert(Documents), rows[i:i + 10000])
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await seed(engine, args.docs)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        depths = [d for d in (1, 10, 100, 1000, 4000) if d * args.page_size < args.docs]
+        print(f"{args.docs} documents, page size {args.page_size}")
+        print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+        async with session_factory() as db:
+            service = DocumentsService(db)
+            cursor, page = "", 0
+            for depth in depths:
+                # Walk the cursor up to this depth (untimed), then time one page each way
+                while page < depth - 1:
+                    result = await service.get_list(limit=args.page_size, user_id=BENCH_USER, cursor=cursor)
+                    cursor, page = result["next_cursor"], page + 1
+
+                start = time.perf_counter()
+                offset_page = await service.get_list(
+                    skip=(depth - 1) * args.page_size, limit=args.page_size, user_id=BENCH_USER
+                )
+                offset_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                cursor_page = await service.get_list(limit=args.page_size, user_id=BENCH_USER, cursor=cursor)
+                cursor_ms = (time.perf_counter() - start) * 1000
+
+                assert [d.id for d in offset_page["items"]] == [d.id for d in cursor_page["items"]], "pages differ"
+                print(f"{depth:>6} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
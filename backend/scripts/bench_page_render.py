@@ -0,0 +1,96 @@
+"""
+Page-render latency for /pdf-page: re-parse per request versus the cached model.
+
+Generates text PDFs of 1, 50 and 200 pages with pypdf. For each one it renders
+every page twice. The legacy path builds a new PdfReader and re-extracts text
+on each request, which is what /pdf-page did before. The cached path parses
+once through parsed_document_cache (text and layout in one pass) and then only
+draws the page's spans.
+
+    cd backend
+    python -m scripts.bench_page_render --sizes 1,50,200
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from routers.lease_analysis import _render_layout_as_svg, _render_text_as_svg
+from services.document_model import PDF_WRAP_WIDTH, ParsedDocumentCache, wrap_page_text
+
+LOREM = (
+    "The Tenant shall pay rent monthly in advance on the first day of each month. "
+    "Late payments incur a fee as described in Section 4. The Landlord may enter the "
+    "premises with twenty-four hours notice except in an emergency."
+)
+
+
+def make_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for n in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        ops = ["BT", "/F1 10 Tf", "14 TL", "54 740 Td", f"(Page {n + 1}) Tj"]
+        for i in range(40):
+            ops += ["T*", f"({i:02d} {LOREM[:95]}) Tj"]
+        ops.append("ET")
+        stream = DecodedStreamObject()
+        stream.set_data("\n".join(ops).encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def render_legacy(file_bytes: bytes, page_num: int) -> bytes:
+    reader = PdfReader(io.BytesIO(file_bytes))
+    text = reader.pages[page_num].extract_text() or ""
+    return _render_text_as_svg(wrap_page_text(text, PDF_WRAP_WIDTH))
+
+
+def render_cached(cache: ParsedDocumentCache, file_bytes: bytes, page_num: int) -> bytes:
+    parsed = cache.get_or_parse(file_bytes, "lease.pdf")
+    return _render_layout_as_svg(parsed.page_layout(page_num))
+
+
+def measure(fn, pages: int):
+    samples = []
+    for page_num in range(pages):
+        start = time.perf_counter()
+        fn(page_num)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(args):
+    print(f"{'pages':>6} {'path':<8} {'first ms':>9} {'median ms':>10} {'p95 ms':>8} {'total ms':>9}")
+    for size in [int(x) for x in args.sizes.split(",")]:
+        pdf = make_pdf(size)
+        cache = ParsedDocumentCache()
+        for label, fn in (
+            ("legacy", lambda p: render_legacy(pdf, p)),
+            ("cached", lambda p: render_cached(cache, pdf, p)),
+        ):
+            samples = measure(fn, size)
+            p95 = sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+            print(
+                f"{size:>6} {label:<8} {samples[0]:>9.2f} {statistics.median(samples):>10.2f} "
+                f"{p95:>8.2f} {sum(samples):>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1,50,200")
+    main(parser.parse_args())
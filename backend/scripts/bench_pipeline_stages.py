@@ -0,0 +1,82 @@
+"""
+Critical path of one analysis: page-text extraction after the model call versus during it.
+
+Runs the real GeminiExtractor.analyze_pdf on generated text PDFs, with only
+the Gemini request replaced by a sleep. The "serial" row reproduces the old
+order: model call, then pypdf extraction, then matching. The "overlapped" row
+is analyze_pdf as it is now, with the StageTimer breakdown printed below it.
+
+    cd backend
+    python -m scripts.bench_pipeline_stages --pages 50,200 --gemini-latency 2.0
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from core.timing import StageTimer
+from scripts.bench_page_render import make_pdf
+from services.document_model import ParsedDocumentCache
+from services.gemini_extractor import GeminiExtractor
+import services.document_tasks as document_tasks
+
+FAKE_RESPONSE = json.dumps({
+    "tenant_name": "Jane Tenant",
+    "landlord_name": "Acme Properties LLC",
+    "monthly_rent": 1800,
+    "risk_flags": [{"severity": "high", "title": "Late payments", "description": "Late payments incur a fee"}],
+    "audit_checklist": [{"item": "Rent", "status": "pass"}],
+})
+
+
+class _FakeResponse:
+    text = FAKE_RESPONSE
+
+
+def make_extractor(gemini_latency: float) -> GeminiExtractor:
+    async def fake_generate(parts):
+        await asyncio.sleep(gemini_latency)
+        return _FakeResponse()
+
+    extractor = GeminiExtractor.__new__(GeminiExtractor)
+    extractor._generate_with_retry = fake_generate
+    return extractor
+
+
+async def run_serial(extractor: GeminiExtractor, pdf: bytes) -> float:
+    start = time.perf_counter()
+    response = await extractor._generate_with_retry([])
+    extracted_data = json.loads(response.text)
+    await extractor.source_map_for_file(pdf, "lease.pdf", extracted_data)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_overlapped(extractor: GeminiExtractor, pdf: bytes) -> StageTimer:
+    timer = StageTimer("[bench]")
+    await extractor.analyze_pdf(pdf, "lease.pdf", timer)
+    return timer
+
+
+async def main(args):
+    extractor = make_extractor(args.gemini_latency)
+    print(f"gemini latency {args.gemini_latency * 1000:.0f}ms")
+    print(f"{'pages':>6} {'serial ms':>10} {'overlapped ms':>14} {'saved ms':>9}")
+    for size in [int(x) for x in args.pages.split(",")]:
+        pdf = make_pdf(size)
+        # Fresh parse cache for each run so both paths pay for extraction
+        document_tasks.parsed_document_cache = ParsedDocumentCache()
+        serial = await run_serial(extractor, pdf)
+        document_tasks.parsed_document_cache = ParsedDocumentCache()
+        timer = await run_overlapped(extractor, pdf)
+        overlapped = timer.summary()["total_ms"]
+        print(f"{size:>6} {serial:>10.0f} {overlapped:>14.0f} {serial - overlapped:>9.0f}")
+        for name, stage in timer.summary()["stages"].items():
+            print(f"{'':>8}{name:<12} {stage['start_ms']:>7.0f} → {stage['end_ms']:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", default="50,200")
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
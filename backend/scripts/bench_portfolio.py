@@ -0,0 +1,111 @@
+"""
+/portfolio latency: full-row load and Python loop versus SQL aggregates.
+
+Seeds a throwaway SQLite database with --leases extractions for one user.
+Each carries realistic JSON documents. It then times two paths. "python" is
+the old approach: load every Extractions row, which decodes the JSON
+documents, then total and classify them in a loop. "sql" is the
+PortfolioService calls behind /portfolio: the summary row, the
+status-bucket aggregate, one page of leases, the upcoming ends and the
+expiring list.
+
+    cd backend
+    python -m scripts.bench_portfolio --leases 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.database import Base
+from models.extractions import Extractions
+from services.extractions import ExtractionsService
+from services.portfolio import PortfolioService
+
+BENCH_USER = "bench-user"
+
+
+async def seed(session_factory, leases: int):
+    rng = random.Random(3)
+    today = date.today()
+    async with session_factory() as db:
+        service = ExtractionsService(db)
+        for i in range(leases):
+            end = today + timedelta(days=rng.randint(-400, 900))
+            flags = [{"severity": rng.choice(["medium", "high"]), "title": "Clause needs review",
+                      "description": "The landlord may enter with twenty-four hours notice. " * 3}
+                     for _ in range(rng.randint(1, 6))]
+            await service.create({
+                "document_id": i + 1, "property_address": f"{i} Main St", "tenant_name": f"Tenant {i}",
+                "monthly_rent": float(rng.randint(900, 6000)), "security_deposit": float(rng.randint(900, 6000)),
+                "lease_start_date": (end - timedelta(days=365)).isoformat(), "lease_end_date": end.isoformat(),
+                "risk_flags": flags, "audit_checklist": [{"item": f"Item {n}", "status": "pass"} for n in range(12)],
+                "compliance_data": {"compliance_checks": [{"rule": f"Rule {n}", "status": "compliant",
+                                                           "explanation": "Within the statutory limit. " * 4}
+                                                          for n in range(8)]},
+                "raw_extraction": {"tenant_name": f"Tenant {i}", "risk_flags": flags},
+                "source_map": {f"field_{n}": [{"page": 0, "bbox": {"x0": 54, "y0": 90, "x1": 558, "y1": 102}}]
+                               for n in range(12)},
+                "created_at": datetime.now(timezone.utc),
+            }, BENCH_USER)
+
+
+async def portfolio_python(db):
+    rows = (await db.execute(select(Extractions).where(Extractions.user_id == BENCH_USER))).scalars().all()
+    today = date.today()
+    window_end = today + timedelta(days=90)
+    totals = {"rent": 0.0, "deposits": 0.0, "active": 0, "expiring": 0}
+    for ext in rows:
+        totals["rent"] += ext.monthly_rent or 0
+        totals["deposits"] += ext.security_deposit or 0
+        end = datetime.strptime(ext.lease_end_date, "%Y-%m-%d").date()
+        if today <= end <= window_end:
+            totals["expiring"] += 1
+        elif end > window_end:
+            totals["active"] += 1
+    return totals
+
+
+async def portfolio_sql(db):
+    service = PortfolioService(db)
+    today = date.today()
+    await service.summary(BENCH_USER, today)
+    await service.leases(BENCH_USER, today, limit=50)
+    await service.upcoming_lease_ends(BENCH_USER, today)
+    await service.leases(BENCH_USER, today, status="expiring_soon", sort="lease_end_date", limit=10)
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await seed(session_factory, args.leases)
+
+        print(f"{args.leases} leases for one user, median of {args.repeats}")
+        for label, fn in (("python", portfolio_python), ("sql", portfolio_sql)):
+            timings = []
+            for _ in range(args.repeats):
+                async with session_factory() as db:
+                    start = time.perf_counter()
+                    await fn(db)
+                    timings.append((time.perf_counter() - start) * 1000)
+            print(f"{label:<7} {statistics.median(timings):>9.1f} ms")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leases", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
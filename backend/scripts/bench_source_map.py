@@ -0,0 +1,287 @@
+"""
+Source-map building: the old per-line matcher versus the line index and ranked spans.
+
+Builds synthetic leases of 10, 100 and 300 viewer pages (by default), wrapped
+the way the viewer wraps PDF text. The lease is filler clauses around the
+quoted field values and --risk-flags risk clauses. The model's risk flags
+paraphrase those clauses, as it does in practice. Two implementations are timed
+and compared. "legacy" is the old _build_source_map: a per-line rescan for
+every variant, risk flags traced by substrings of their title and
+description, then by the first line holding any significant word. "current"
+is GeminiExtractor._build_source_map. The report gives the time of each, the
+number of risk flags each places on the clause they came from, and whether the
+field entries both find verbatim are identical.
+
+    cd backend
+    python -m scripts.bench_source_map --pages 10 100 300
+"""
+
+import argparse
+import logging
+import random
+import re
+import statistics
+import time
+
+from services.document_model import LINE_HEIGHT, LINES_PER_PAGE, PAGE_MARGIN, PDF_WRAP_WIDTH, wrap_paragraph
+from services.gemini_extractor import GeminiExtractor
+
+WORDS = (
+    "the tenant shall pay rent on or before first day of each month to landlord at address designated "
+    "in writing premises used solely as private residence no alterations without prior written consent "
+    "repairs maintenance utilities notice entry inspection reasonable hours emergency default cure period "
+    "insurance liability indemnify holdover renewal termination assignment sublet guests occupancy quiet "
+    "enjoyment smoke detectors keys locks parking storage appliances condition move-in inspection report"
+).split()
+
+# (title, category, description as the model writes it, clause as the lease words it)
+RISK_CLAUSES = [
+    ("Jury Trial Waiver", "Legal", "Tenant gives up the right to a jury trial in any dispute with the landlord.",
+     "Landlord and Tenant each knowingly waive trial by jury in any action arising out of this Lease."),
+    ("Automatic Renewal", "Lease Term",
+     "The lease renews automatically for another year unless notice is given 60 days before the end.",
+     "This Lease shall automatically renew for successive twelve month terms unless either party gives sixty "
+     "days written notice of non-renewal."),
+    ("Excessive Late Fees", "Financial", "Late fees of 15% of monthly rent exceed typical limits.",
+     "If rent is not received by the fifth day, Tenant shall pay a late charge equal to fifteen percent of the "
+     "monthly rent."),
+    ("Landlord Entry Without Notice", "Privacy", "Landlord may enter the unit at any time without advance notice.",
+     "Landlord reserves the right to enter the Premises at any time, without prior notice to Tenant, for any purpose."),
+    ("Tenant Pays All Repairs", "Maintenance",
+     "Tenant is responsible for all repairs including structural and appliance repairs.",
+     "Tenant shall be solely responsible for all repairs to the Premises, including structural elements, plumbing, "
+     "and appliances, at Tenant's expense."),
+    ("Broad Indemnification", "Liability", "Tenant must indemnify the landlord even for the landlord's own negligence.",
+     "Tenant agrees to indemnify and hold Landlord harmless from all claims, including claims caused by Landlord's "
+     "negligence."),
+    ("Non-refundable Deposit", "Financial", "Part of the security deposit is a non-refundable cleaning fee.",
+     "Three hundred dollars of the Security Deposit is a non-refundable cleaning fee retained by Landlord."),
+    ("Early Termination Penalty", "Lease Term", "Breaking the lease early requires paying three months of rent.",
+     "Should Tenant terminate this Lease before its expiration, Tenant shall pay an early termination fee equal to "
+     "three months' rent."),
+    ("Pet Violation Ends Lease", "Pets", "Any pet violation results in immediate lease termination.",
+     "Keeping any animal on the Premises without written consent is a material default permitting immediate "
+     "termination."),
+    ("Rent Increase Mid-Lease", "Financial", "Landlord may raise rent during the lease term with 30 days notice.",
+     "Landlord may increase the monthly rent during the Term upon thirty days written notice to Tenant."),
+    ("One-Sided Attorney Fees", "Legal", "Only the landlord can recover attorney fees in disputes.",
+     "In any legal action, Tenant shall pay Landlord's reasonable attorneys' fees and costs, regardless of outcome."),
+    ("Utility Shutoff", "Utilities", "Landlord may shut off utilities for unpaid rent.",
+     "Landlord may discontinue utility services to the Premises if any rent remains unpaid for ten days."),
+    ("Subletting Prohibited", "Occupancy", "Tenant cannot sublet or assign under any circumstance.",
+     "Tenant shall not sublet the Premises or assign this Lease, in whole or in part, under any circumstances."),
+    ("Mold Disclaimer", "Health", "Tenant waives claims related to mold exposure.",
+     "Tenant releases Landlord from any liability for damages or injuries resulting from mold or mildew."),
+    ("Guest Stay Limits", "Occupancy", "Guests may not stay more than 7 days without landlord approval.",
+     "No guest may remain on the Premises for more than seven consecutive days without Landlord's prior written "
+     "approval."),
+]
+
+LEGACY_STOPWORDS = (
+    "the", "and", "for", "with", "from", "this", "that", "will", "have", "been", "each", "after", "upon", "into",
+    "also", "than", "such", "other", "only", "shall", "must", "does", "were", "like", "make", "made", "just", "over",
+    "more", "most", "some", "what", "when", "your", "they", "them", "then", "here", "there", "where", "which",
+    "their", "about", "would", "could", "should", "before", "during", "between", "under", "above", "below",
+    "lease", "tenant", "landlord", "property", "agreement", "section", "specified", "none",
+)
+
+
+def _normalize_ws(s: str) -> str:
+    return re.sub(r'\s+', ' ', s).strip()
+
+
+class LegacyLineScan:
+    """The matcher _build_source_map used before PageLineIndex."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def locate(self, search_value):
+        search_lower = search_value.lower()
+        if not search_lower.strip() or len(search_lower.strip()) < 2:
+            return None
+        search_normalized = _normalize_ws(search_lower)
+        for page_idx, lines in enumerate(self.pages):
+            for line_idx, line in enumerate(lines):
+                if search_lower in line.lower():
+                    return page_idx, line_idx
+            for line_idx, line in enumerate(lines):
+                if search_normalized in _normalize_ws(line.lower()):
+                    return page_idx, line_idx
+            joined_normalized = _normalize_ws(" ".join(lines).lower())
+            if search_normalized in joined_normalized:
+                first_words = " ".join(search_normalized.split()[:3])
+                if first_words:
+                    for line_idx, line in enumerate(lines):
+                        if first_words in _normalize_ws(line.lower()):
+                            return page_idx, line_idx
+                return page_idx, len(lines) // 2
+        return None
+
+    def search(self, variants):
+        """The old four passes: (page, line) of the first variant found, then of a significant word."""
+        for variant in variants:
+            found = self.locate(variant)
+            if found:
+                return found
+        words = [w for w in (variants[0].split() if variants else []) if len(w) >= 4 and w.lower() not in LEGACY_STOPWORDS]
+        for word in words:
+            for page_idx, lines in enumerate(self.pages):
+                for line_idx, line in enumerate(lines):
+                    if word.lower() in line.lower():
+                        return page_idx, line_idx
+        return None
+
+
+def legacy_risk_variants(risk):
+    title, desc, category = risk.get("title", ""), risk.get("description", ""), risk.get("category", "")
+    variants = []
+    if title and len(title) >= 4:
+        variants.append(title)
+    if category and len(category) >= 4 and category != title:
+        variants.append(category)
+    if desc:
+        first_sentence = desc.split('.')[0].strip()
+        if len(first_sentence) >= 6:
+            variants.append(first_sentence)
+        desc_words = desc.split()
+        if len(desc_words) >= 4:
+            variants.append(" ".join(desc_words[:5]))
+            variants.append(" ".join(desc_words[:4]))
+        if len(desc_words) >= 3:
+            variants.append(" ".join(desc_words[:3]))
+    return variants
+
+
+def legacy_source_map(pages, extracted):
+    """{key: (page, line)} as the old _build_source_map placed fields and risk flags."""
+    scan = LegacyLineScan(pages)
+    extractor = object.__new__(GeminiExtractor)
+    located = {}
+    for field in ("tenant_name", "landlord_name", "property_address", "pet_policy", "late_fee_terms"):
+        words = extracted[field].split()
+        variants = [extracted[field], words[0] + " " + words[-1]]
+        if field == "property_address":
+            variants.append(words[0] + " " + words[1])
+        if len(words) >= 4:
+            variants.append(" ".join(words[:4]))
+        if len(words) >= 3:
+            variants.append(" ".join(words[:3]))
+        located[field] = scan.search(variants)
+    for field in ("lease_start_date", "lease_end_date"):
+        located[field] = scan.search(extractor._generate_date_variants(extracted[field]))
+    for field in ("monthly_rent", "security_deposit"):
+        located[field] = scan.search(extractor._generate_money_variants(extracted[field]))
+    for risk_idx, risk in enumerate(extracted["risk_flags"]):
+        located[f"risk_{risk_idx}"] = scan.search(legacy_risk_variants(risk))
+    return {key: found for key, found in located.items() if found}
+
+
+def entry_lines(entry):
+    """(page, first line, last line) of a source_map entry, from its bbox."""
+    bbox = entry["bbox"]
+    first = round((bbox["y0"] - PAGE_MARGIN) / LINE_HEIGHT)
+    last = round((bbox["y1"] - PAGE_MARGIN) / LINE_HEIGHT) - 1
+    return entry["page"], first, last
+
+
+def synthetic_lease(page_count: int, risk_flags: int, seed: int):
+    """(viewer pages, extracted_data, {risk key: (page, first line, last line)}) for a lease of `page_count` pages."""
+    rng = random.Random(seed)
+    extracted = {
+        "tenant_name": "Maria  Gonzalez-Whitfield",
+        "landlord_name": "Harborview Property Holdings LLC",
+        "property_address": "4821 Lakeshore Boulevard, Unit 12B, Evanston, IL 60201",
+        "monthly_rent": 2850,
+        "security_deposit": 4275.5,
+        "lease_start_date": "2024-03-01",
+        "lease_end_date": "2025-02-28",
+        "pet_policy": "One cat under twenty pounds permitted with a pet deposit",
+        "late_fee_terms": "Late fee of ten percent assessed after the fifth day of the month",
+        "risk_flags": [],
+    }
+    phrases = [
+        "This Lease is made between Harborview Property Holdings LLC and MARIA GONZALEZ-WHITFIELD",
+        "for the premises at 4821 Lakeshore   Boulevard, Unit 12B, Evanston, IL 60201.",
+        "Monthly rent of $2,850.00 is due on the first day of each month.",
+        "The term begins March 1, 2024 and ends on the 28th day of February 2025.",
+    ]
+
+    paragraphs = []
+    line_count = 0
+    while line_count < page_count * LINES_PER_PAGE:
+        paragraphs.append(" ".join(rng.choices(WORDS, k=rng.randint(20, 120))).capitalize() + ".")
+        line_count += len(wrap_paragraph(paragraphs[-1], PDF_WRAP_WIDTH))
+    for phrase in phrases:
+        paragraphs[rng.randrange(len(paragraphs))] += " " + phrase
+    # Risk clauses are paragraphs of their own, anywhere in the lease
+    clause_paragraphs = {}
+    for i in range(risk_flags):
+        title, category, description, clause = RISK_CLAUSES[i % len(RISK_CLAUSES)]
+        extracted["risk_flags"].append({"severity": "high", "category": category, "title": title,
+                                        "description": description})
+        position = rng.randrange(len(paragraphs))
+        paragraphs.insert(position, f"{i + 1}. {clause}")
+        clause_paragraphs = {key: (p + 1 if p >= position else p) for key, p in clause_paragraphs.items()}
+        clause_paragraphs[f"risk_{i}"] = position
+
+    lines, paragraph_lines = [], []
+    for paragraph in paragraphs:
+        wrapped = wrap_paragraph(paragraph, PDF_WRAP_WIDTH)
+        paragraph_lines.append((len(lines), len(lines) + len(wrapped) - 1))
+        lines.extend(wrapped)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    truth = {}
+    for key, position in clause_paragraphs.items():
+        first, last = paragraph_lines[position]
+        # A clause wrapped onto the next page counts on its first page
+        page = first // LINES_PER_PAGE
+        truth[key] = (page, first % LINES_PER_PAGE, min(last, (page + 1) * LINES_PER_PAGE - 1) % LINES_PER_PAGE)
+    return pages, extracted, truth
+
+
+def on_clause(located, clause) -> bool:
+    page, first, last = located
+    return page == clause[0] and first <= clause[2] and last >= clause[1]
+
+
+def timed(fn, repeats):
+    runs, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(runs)
+
+
+def main(args):
+    logging.disable(logging.INFO)
+    extractor = object.__new__(GeminiExtractor)
+    print(f"{args.risk_flags} paraphrased risk flags, median of {args.repeats}")
+    print(f"{'pages':>5} {'legacy ms':>10} {'current ms':>11} {'legacy on clause':>17} {'ranked on clause':>17} "
+          f"{'mean conf':>10}  fields identical")
+    for page_count in args.pages:
+        pages, extracted, truth = synthetic_lease(page_count, args.risk_flags, seed=page_count)
+        legacy, legacy_ms = timed(lambda: legacy_source_map(pages, extracted), args.repeats)
+        (current, _), current_ms = timed(lambda: extractor._build_source_map(pages, extracted), args.repeats)
+
+        legacy_hits = sum(on_clause(legacy[key] + (legacy[key][1],), truth[key]) for key in truth if key in legacy)
+        ranked = {key: current[key][0] for key in truth if key in current}
+        ranked_hits = sum(on_clause(entry_lines(entry), truth[key]) for key, entry in ranked.items())
+        confidence = statistics.mean(entry["confidence"] for entry in ranked.values()) if ranked else 0.0
+        # Fields found verbatim keep the exact same location
+        fields_identical = all(
+            entry_lines(entries[0])[:2] == legacy.get(key)
+            for key, entries in current.items() if entries[0]["match_type"] == "text_search"
+        )
+        print(f"{len(pages):>5} {legacy_ms:>10.1f} {current_ms:>11.1f} {legacy_hits:>14}/{len(truth):<2} "
+              f"{ranked_hits:>14}/{len(truth):<2} {confidence:>10.2f}  {fields_identical}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--risk-flags", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=5)
+    main(parser.parse_args())
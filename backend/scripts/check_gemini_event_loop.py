@@ -0,0 +1,82 @@
+"""
+Check that in-flight Gemini analyses do not block the event loop.
+
+Ten GeminiExtractor.analyze_pdf() calls run against a stubbed async client
+that takes --latency seconds to answer. Meanwhile a probe coroutine plays the
+part of unrelated requests (page renders, auth calls): it wakes every 10 ms and
+records how late it was scheduled. With a blocking client the worst lag equals
+the full model latency. With the async client it stays within milliseconds.
+
+    cd backend
+    python -m scripts.check_gemini_event_loop --analyses 10 --latency 2.0
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+from services.gemini_extractor import GeminiExtractor
+
+PROBE_INTERVAL = 0.01
+
+STUB_RESPONSE = json.dumps({
+    "tenant_name": "Jane Tenant",
+    "landlord_name": "Acme Properties LLC",
+    "property_address": "100 Main St, Austin, TX 78701",
+    "monthly_rent": 1800,
+    "risk_flags": [],
+    "audit_checklist": [{"category": "Rent", "status": "pass", "title": "Rent", "description": "ok"}],
+})
+
+
+def make_extractor(latency: float) -> GeminiExtractor:
+    async def generate_content(**kwargs):
+        await asyncio.sleep(latency)
+        return SimpleNamespace(text=STUB_RESPONSE)
+
+    extractor = GeminiExtractor.__new__(GeminiExtractor)
+    extractor.client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    )
+    return extractor
+
+
+async def probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def main(args) -> int:
+    stop = asyncio.Event()
+    lags: list = []
+    probe_task = asyncio.create_task(probe(stop, lags))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        make_extractor(args.latency).analyze_pdf(b"not a real pdf", f"lease-{i}.pdf")
+        for i in range(args.analyses)
+    ])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    worst = max(lags) if lags else 0.0
+    print(f"{len(results)} analyses in {elapsed:.2f}s (model latency {args.latency}s each)")
+    print(f"probe ticks: {len(lags)}, worst scheduling lag: {worst * 1000:.1f} ms")
+
+    ok = worst < args.max_lag and elapsed < args.latency * 2
+    print("PASS: event loop stayed responsive" if ok else "FAIL: event loop was blocked")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--max-lag", type=float, default=0.25, help="seconds")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,186 @@
+"""
+Query plans and latency of the hot lookups with and without the access-pattern indexes.
+
+Seeds --users users with --docs-per-user documents and extractions each, one
+credits row per user and a regulation per state and category. It then runs
+EXPLAIN (SQLite: EXPLAIN QUERY PLAN) and times each query twice: first with
+the indexes from alembic revision a8b9c0d1e2f3 dropped, then with them
+created from the model definitions. The queries are /portfolio, the first
+cursor page of the document list, get_by_id, the extraction lookup by
+document and the compliance regulation lookup.
+
+By default it runs against a throwaway SQLite file. Pass --database-url to
+run against Postgres. It must be an empty scratch database, because the
+tables are created and dropped again here.
+
+    cd backend
+    python -m scripts.explain_query_plans --users 200 --docs-per-user 100
+    python -m scripts.explain_query_plans --database-url postgresql+asyncpg://localhost/lease_scratch
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.database import Base
+from models.documents import Documents
+from models.extractions import Extractions
+from models.state_regulations import State_regulations
+from models.user_credits import User_credits
+
+HOT_INDEXES = [
+    (Documents, "ix_documents_user_id_created_at"),
+    (Extractions, "ix_extractions_user_id_created_at"),
+    (Extractions, "ix_extractions_document_id"),
+    (State_regulations, "ix_state_regulations_state_code_category"),
+    (User_credits, "ix_user_credits_user_id"),
+]
+STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+          "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND",
+          "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY"]
+CATEGORIES = ["security_deposit", "late_fees", "entry_notice", "renewal", "termination",
+              "habitability", "pets", "rent_increase"]
+
+
+def user_name(n: int) -> str:
+    return f"user-{n:05d}"
+
+
+def hot_queries(users: int, docs_per_user: int):
+    rng = random.Random(1)
+    user = user_name(rng.randrange(users))
+    newest_first = lambda model: (model.created_at.desc().nullslast(), model.id.desc())
+    return [
+        ("portfolio documents",
+         select(Documents).where(Documents.user_id == user).order_by(*newest_first(Documents))),
+        ("portfolio extractions",
+         select(Extractions).where(Extractions.user_id == user).order_by(*newest_first(Extractions))),
+        ("documents cursor page",
+         select(Documents).where(Documents.user_id == user).order_by(*newest_first(Documents)).limit(21)),
+        ("extraction get_by_id",
+         select(Extractions).where(Extractions.id == rng.randrange(1, users * docs_per_user),
+                                   Extractions.user_id == user)),
+        ("extraction by document",
+         select(Extractions).where(Extractions.document_id == rng.randrange(1, users * docs_per_user))),
+        ("compliance regulations",
+         select(State_regulations).where(State_regulations.state_code == "CA")),
+        ("user credits",
+         select(User_credits).where(User_credits.user_id == user)),
+    ]
+
+
+async def seed(engine, users: int, docs_per_user: int):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    docs, extractions = [], []
+    for n in range(users * docs_per_user):
+        # Users upload interleaved, so one user's rows are spread over the table
+        user = user_name(rng.randrange(users))
+        created = start + timedelta(minutes=n)
+        docs.append({
+            "user_id": user, "file_name": f"lease-{n}.pdf", "file_key": f"scratch/{n}.pdf",
+            "file_size": 1024, "status": "completed", "created_at": created, "updated_at": created,
+        })
+        extractions.append({
+            "user_id": user, "document_id": n + 1, "tenant_name": f"Tenant {n}",
+            "monthly_rent": float(rng.randint(900, 6000)), "created_at": created,
+        })
+    regulations = [
+        {"state_code": code, "state_name": code, "regulation_category": category,
+         "regulation_title": f"{code} {category}", "regulation_content": "…"}
+        for code in STATES for category in CATEGORIES
+    ]
+    credits = [
+        {"user_id": user_name(n), "free_credits": 1, "paid_credits": 0, "created_at": start}
+        for n in range(users)
+    ]
+    async with engine.begin() as conn:
+        for model, rows in ((Documents, docs), (Extractions, extractions),
+                            (State_regulations, regulations), (User_credits, credits)):
+            for i in range(0, len(rows), 5000):
+                await conn.execute(insert(model), rows[i:i + 5000])
+
+
+async def analyze(conn):
+    await conn.exec_driver_sql("ANALYZE")
+
+
+async def explain(conn, statement) -> list:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in result.all()]
+    result = await conn.exec_driver_sql(f"EXPLAIN {sql}")
+    return [row[0] for row in result.all()]
+
+
+async def median_ms(conn, statement, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        (await conn.execute(statement)).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def run_queries(engine, queries, repeats: int) -> dict:
+    results = {}
+    async with engine.connect() as conn:
+        await analyze(conn)
+        for label, statement in queries:
+            results[label] = (await explain(conn, statement), await median_ms(conn, statement, repeats))
+    return results
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'plans.db')}"
+        engine = create_async_engine(url)
+        async with engine.connect() as conn:
+            existing = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        if set(existing) & set(Base.metadata.tables):
+            raise SystemExit("--database-url must point at an empty scratch database")
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for model, name in HOT_INDEXES:
+                await conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        try:
+            await seed(engine, args.users, args.docs_per_user)
+            queries = hot_queries(args.users, args.docs_per_user)
+            before = await run_queries(engine, queries, args.repeats)
+
+            async with engine.begin() as conn:
+                for model, name in HOT_INDEXES:
+                    # Both newest-first variants are offered; ddl_if keeps the one for this dialect
+                    for index in [i for i in model.__table__.indexes if i.name == name]:
+                        await conn.run_sync(index.create)
+            after = await run_queries(engine, queries, args.repeats)
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+    print(f"{engine.dialect.name}: {args.users} users × {args.docs_per_user} documents, median of {args.repeats}")
+    for label, _ in queries:
+        (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+        print(f"\n{label}: {ms_before:.2f}ms → {ms_after:.2f}ms")
+        print("  before: " + "\n          ".join(plan_before))
+        print("  after:  " + "\n          ".join(plan_after))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--docs-per-user", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
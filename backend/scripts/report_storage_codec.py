@@ -0,0 +1,143 @@
+"""
+Stored-size reduction from core.codec on a synthetic corpus of lease analyses.
+
+For each synthetic lease it builds the three large extraction JSON columns
+(raw_extraction, source_map, compliance_data) and a text PDF. It then
+compares three layouts. "base64/plain" is the original one: base64 file_data
+and plain JSON. "raw/plain" adds the document_files move. "codec" adds the
+compressed envelopes.
+
+The PDFs here have uncompressed content streams. Real uploads usually have
+Flate-compressed streams, and for those the file gain is mostly the base64
+removal, so treat the file rows as an upper bound.
+
+    cd backend
+    python -m scripts.report_storage_codec --leases 1000
+"""
+
+import argparse
+import base64
+import json
+import random
+import time
+
+from core.codec import CODEC_ZLIB, CODEC_ZSTD, decode_bytes, decode_text, encode_large_bytes, encode_text, zstandard
+
+CLAUSES = [
+    "The Tenant shall pay rent monthly in advance on the first day of each month.",
+    "A late fee of five percent applies to any payment received after the fifth day.",
+    "The Landlord may enter the premises with twenty-four hours written notice.",
+    "Pets are not permitted without the prior written consent of the Landlord.",
+    "The security deposit will be returned within thirty days after move-out.",
+    "Tenant is responsible for utilities including electricity, gas and internet.",
+    "This lease renews automatically unless either party gives sixty days notice.",
+]
+STATES = ["CA", "NY", "TX", "FL", "WA", "IL", "MA", "CO"]
+CATEGORIES = ["Rent", "Deposit", "Entry", "Pets", "Renewal", "Maintenance", "Utilities", "Termination"]
+
+
+def synthetic_lease(rng: random.Random, n: int):
+    pages = rng.randint(4, 30)
+    risk_flags = [
+        {
+            "severity": rng.choice(["medium", "high"]),
+            "category": rng.choice(CATEGORIES),
+            "title": f"{rng.choice(CATEGORIES)} clause needs review",
+            "description": " ".join(rng.sample(CLAUSES, 3)),
+            "recommendation": "Ask the landlord to amend this clause before signing.",
+        }
+        for _ in range(rng.randint(2, 8))
+    ]
+    extracted = {
+        "tenant_name": f"Tenant {n}",
+        "landlord_name": f"Landlord Holdings {n % 97} LLC",
+        "property_address": f"{rng.randint(1, 9999)} Main St, Springfield, {rng.choice(STATES)} {rng.randint(10000, 99999)}",
+        "monthly_rent": rng.randint(900, 6000),
+        "security_deposit": rng.randint(900, 6000),
+        "lease_start_date": "2025-01-01",
+        "lease_end_date": "2025-12-31",
+        "renewal_notice_days": rng.choice([30, 60, 90]),
+        "pet_policy": rng.choice(CLAUSES),
+        "late_fee_terms": CLAUSES[1],
+        "risk_flags": risk_flags,
+        "audit_checklist": [
+            {"item": c, "status": rng.choice(["pass", "warning", "issue"]), "detail": rng.choice(CLAUSES)}
+            for c in CATEGORIES + ["Signatures", "Disclosures", "Occupancy", "Parking"]
+        ],
+    }
+    source_map = {
+        field: [{
+            "page": rng.randrange(pages),
+            "bbox": {"x0": 54.0, "y0": float(rng.randint(54, 700)), "x1": 558.0, "y1": float(rng.randint(54, 716))},
+            "matched_text": str(extracted.get(field, field)),
+            "match_type": "text_search",
+        }]
+        for field in list(extracted)[:10] + [f"risk_{i}" for i in range(len(risk_flags))]
+    }
+    compliance = {
+        "state": rng.choice(STATES),
+        "summary": " ".join(rng.sample(CLAUSES, 4)),
+        "compliance_checks": [
+            {
+                "rule": f"{c} limit",
+                "status": rng.choice(["compliant", "warning", "violation"]),
+                "statute": f"Civ. Code § {rng.randint(1000, 2000)}",
+                "explanation": " ".join(rng.sample(CLAUSES, 2)),
+            }
+            for c in CATEGORIES
+        ],
+    }
+    body = []
+    for p in range(pages):
+        lines = [f"({rng.choice(CLAUSES)}) Tj T*" for _ in range(40)]
+        body.append(f"{p + 4} 0 obj << /Length 0 >> stream\nBT /F1 11 Tf 54 740 Td 16 TL\n" + "\n".join(lines) + "\nET\nendstream endobj")
+    pdf = ("%PDF-1.4\n" + "\n".join(body) + "\n%%EOF").encode("latin-1")
+    return json.dumps(extracted), json.dumps(source_map), json.dumps(compliance), pdf
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    totals = {"json_plain": 0, "json_codec": 0, "file_b64": 0, "file_raw": 0, "file_codec": 0}
+    encode_s = decode_s = 0.0
+
+    for n in range(args.leases):
+        raw, source_map, compliance, pdf = synthetic_lease(rng, n)
+        for value in (raw, source_map, compliance):
+            start = time.perf_counter()
+            stored = encode_text(value, codec)
+            encode_s += time.perf_counter() - start
+            start = time.perf_counter()
+            assert decode_text(stored) == value
+            decode_s += time.perf_counter() - start
+            totals["json_plain"] += len(value.encode())
+            totals["json_codec"] += len(stored.encode())
+
+        stored_pdf = encode_large_bytes(pdf, codec)
+        assert decode_bytes(stored_pdf) == pdf
+        totals["file_b64"] += len(base64.b64encode(pdf))
+        totals["file_raw"] += len(pdf)
+        totals["file_codec"] += len(stored_pdf)
+
+    mb = 1024 * 1024
+    print(f"{args.leases} synthetic leases, codec {'zstd' if codec == CODEC_ZSTD else 'zlib'}")
+    print(f"{'column':<14} {'base64/plain MB':>16} {'raw/plain MB':>13} {'codec MB':>9} {'reduction':>10}")
+    print(
+        f"{'JSON columns':<14} {totals['json_plain'] / mb:>16.2f} {totals['json_plain'] / mb:>13.2f} "
+        f"{totals['json_codec'] / mb:>9.2f} {1 - totals['json_codec'] / totals['json_plain']:>9.1%}"
+    )
+    print(
+        f"{'file bytes':<14} {totals['file_b64'] / mb:>16.2f} {totals['file_raw'] / mb:>13.2f} "
+        f"{totals['file_codec'] / mb:>9.2f} {1 - totals['file_codec'] / totals['file_b64']:>9.1%}"
+    )
+    before = totals["json_plain"] + totals["file_b64"]
+    after = totals["json_codec"] + totals["file_codec"]
+    print(f"{'total':<14} {before / mb:>16.2f} {'':>13} {after / mb:>9.2f} {1 - after / before:>9.1%}")
+    print(f"JSON encode {encode_s * 1000:.0f}ms, decode {decode_s * 1000:.0f}ms for {args.leases * 3} values")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--leases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
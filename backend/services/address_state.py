@@ -0,0 +1,173 @@
+"""
+US state resolution for free-text property addresses.
+
+Addresses come from the model as written in the lease, e.g.
+"1200 Main St, Apt 4, Austin, TX 78701" or "12 Ocean Ave, Santa Monica,
+California". The state is looked up in this order:
+
+1. the tail of the address: "City, ST ZIP", "City ST", "City, State ZIP",
+   optionally followed by the country;
+2. a state code directly followed by a ZIP anywhere else ("…, IL 62701, Unit 4");
+3. the 3-digit ZIP prefix (USPS assignment);
+4. a full state name as whole words, the last one in the address.
+
+Two-letter codes must be upper case unless the address structure makes them
+unambiguous (after a comma at the end, or before a ZIP). Lower-case words
+such as "in", "or" and "me" therefore never count as states. Results are
+memoized per address; `states_from_addresses` resolves a batch at once.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR",
+    "california": "CA", "colorado": "CO", "connecticut": "CT", "delaware": "DE",
+    "district of columbia": "DC", "florida": "FL", "georgia": "GA", "hawaii": "HI",
+    "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME",
+    "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE",
+    "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM",
+    "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI",
+    "south carolina": "SC", "south dakota": "SD", "tennessee": "TN", "texas": "TX",
+    "utah": "UT", "vermont": "VT", "virginia": "VA", "washington": "WA",
+    "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}
+
+ALL_STATE_CODES = frozenset(STATE_NAMES.values())
+
+# First and last 3-digit ZIP prefix of each state's range. Territories and
+# military ranges (006-009, 090-099, 340, 962-966, 969) resolve to None.
+ZIP_PREFIX_RANGES = [
+    (5, 5, "NY"), (10, 27, "MA"), (28, 29, "RI"), (30, 38, "NH"), (39, 49, "ME"),
+    (50, 59, "VT"), (55, 55, "MA"), (60, 69, "CT"), (70, 89, "NJ"), (100, 149, "NY"),
+    (150, 196, "PA"), (197, 199, "DE"), (200, 205, "DC"), (201, 201, "VA"), (206, 219, "MD"),
+    (220, 246, "VA"), (247, 268, "WV"), (270, 289, "NC"), (290, 299, "SC"), (300, 319, "GA"),
+    (320, 349, "FL"), (340, 340, None), (350, 369, "AL"), (370, 385, "TN"), (386, 397, "MS"),
+    (398, 399, "GA"), (400, 427, "KY"), (430, 459, "OH"), (460, 479, "IN"), (480, 499, "MI"),
+    (500, 528, "IA"), (530, 549, "WI"), (550, 567, "MN"), (569, 569, "DC"), (570, 577, "SD"),
+    (580, 588, "ND"), (590, 599, "MT"), (600, 629, "IL"), (630, 658, "MO"), (660, 679, "KS"),
+    (680, 693, "NE"), (700, 714, "LA"), (716, 729, "AR"), (730, 749, "OK"), (733, 733, "TX"),
+    (750, 799, "TX"), (800, 816, "CO"), (820, 831, "WY"), (832, 838, "ID"), (840, 847, "UT"),
+    (850, 865, "AZ"), (870, 884, "NM"), (885, 885, "TX"), (889, 898, "NV"), (900, 961, "CA"),
+    (967, 968, "HI"), (970, 979, "OR"), (980, 994, "WA"), (995, 999, "AK"),
+]
+
+# Later ranges override earlier ones, which is how the exceptions above apply
+_ZIP3_STATE: List[Optional[str]] = [None] * 1000
+for _first, _last, _code in ZIP_PREFIX_RANGES:
+    _ZIP3_STATE[_first:_last + 1] = [_code] * (_last - _first + 1)
+
+
+def _trie_pattern(words) -> str:
+    """A regex alternation of `words` factored by common prefix.
+
+    "new york|new jersey|nevada" becomes "ne(?:w\\s+(?:york|jersey)|vada)". The
+    engine then rejects a position after one or two characters instead of
+    trying every word. A word that is a prefix of another ("virginia",
+    "virginia beach") comes after it, so the longer one wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+_NAME_PATTERN = _trie_pattern(STATE_NAMES)
+_ZIP_PATTERN = r"(?P<zip>\d{5})(?:-\d{4})?"
+_COUNTRY_PATTERN = r"(?:,?\s*(?:U\.?S\.?A?\.?|United\s+States(?:\s+of\s+America)?))?"
+
+_TAIL_RE = re.compile(
+    rf"(?P<sep>^|,|\s)\s*(?P<state>{_NAME_PATTERN}|[A-Za-z]{{2}})\.?(?:[\s,]+{_ZIP_PATTERN})?"
+    rf"\s*{_COUNTRY_PATTERN}\s*\.?\s*$",
+    re.IGNORECASE,
+)
+_CODE_BEFORE_ZIP_RE = re.compile(r"\b(?P<state>[A-Z]{2})\.?[\s,]+\d{5}(?:-\d{4})?\b")
+# A ZIP ends the address or an address part; "75001 Paris" is not one
+_ZIP_RE = re.compile(r"(?<!\d)(\d{5})(?:-\d{4})?(?=\s*(?:,|$))")
+_NAME_RE = re.compile(rf"\b(?:{_NAME_PATTERN})\b", re.IGNORECASE)
+
+# Longer than any tail _TAIL_RE accepts ("District of Columbia 20001-1234, United States of America")
+_TAIL_CHARS = 72
+
+
+def _state_code(token: str) -> Optional[str]:
+    token = " ".join(token.lower().split())
+    if len(token) == 2:
+        code = token.upper()
+        return code if code in ALL_STATE_CODES else None
+    return STATE_NAMES.get(token)
+
+
+def zip_to_state(zip_code: str) -> Optional[str]:
+    """State of a 5-digit ZIP code, from its 3-digit prefix"""
+    if len(zip_code) < 3 or not zip_code[:3].isdigit():
+        return None
+    return _ZIP3_STATE[int(zip_code[:3])]
+
+
+@lru_cache(maxsize=65536)
+def _parse(address: str) -> Optional[str]:
+    # Only the end can match; the leading space keeps a cut-off word from reading as "^"
+    tail = _TAIL_RE.search(address if len(address) <= _TAIL_CHARS else " " + address[-_TAIL_CHARS:])
+    if tail:
+        token = tail.group("state")
+        # A bare two-letter word at the end must be written as a code
+        unambiguous = len(token) > 2 or token.isupper() or tail.group("sep") == "," or tail.group("zip")
+        code = _state_code(token) if unambiguous else None
+        if code:
+            return code
+
+    for match in reversed(list(_CODE_BEFORE_ZIP_RE.finditer(address))):
+        if match.group("state") in ALL_STATE_CODES:
+            return match.group("state")
+
+    for match in reversed(list(_ZIP_RE.finditer(address))):
+        # A leading 5-digit number is the street number
+        if not address[:match.start()].strip():
+            continue
+        code = zip_to_state(match.group(1))
+        if code:
+            return code
+
+    names = _NAME_RE.findall(address)
+    if names:
+        return _state_code(names[-1])
+    return None
+
+
+def state_from_address(address: Optional[str]) -> Optional[str]:
+    """Two-letter state code of a US property address, or None"""
+    if not isinstance(address, str):
+        return None
+    address = address.strip()
+    return _parse(address) if address else None
+
+
+def states_from_addresses(addresses: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """state_from_address for many addresses; each distinct address is parsed once"""
+    resolved = {}
+    result = []
+    for address in addresses:
+        if address not in resolved:
+            resolved[address] = state_from_address(address)
+        result.append(resolved[address])
+    return result
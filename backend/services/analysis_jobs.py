@@ -0,0 +1,252 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.analysis_jobs import Analysis_jobs
+from models.documents import Documents
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------ Service Layer ------------------
+class Analysis_jobsService:
+    """Service layer for the durable analysis job queue.
+
+    Jobs are claimed with a time-limited lease. A worker that crashes stops
+    renewing its lease, and `reclaim_expired` puts the job back on the queue
+    (or fails it once `max_attempts` is exhausted).
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(
+        self,
+        document_id: int,
+        user_id: str,
+        charge_credit: bool = True,
+        max_attempts: int = 3,
+    ) -> Analysis_jobs:
+        """Create a queued job and mark the document as queued"""
+        try:
+            now = datetime.now(timezone.utc)
+            obj = Analysis_jobs(
+                user_id=user_id,
+                document_id=document_id,
+                status="queued",
+                stage="queued",
+                progress=0,
+                attempts=0,
+                max_attempts=max_attempts,
+                charge_credit=charge_credit,
+                created_at=now,
+                updated_at=now,
+            )
+            self.db.add(obj)
+            await self.db.execute(
+                update(Documents)
+                .where(Documents.id == document_id, Documents.user_id == user_id)
+                .values(status="queued", updated_at=now)
+            )
+            await self.db.commit()
+            await self.db.refresh(obj)
+            logger.info(f"Enqueued analysis job {obj.id} for document {document_id}")
+            return obj
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error enqueueing analysis job for document {document_id}: {str(e)}")
+            raise
+
+    async def get_by_id(self, obj_id: int, user_id: Optional[str] = None) -> Optional[Analysis_jobs]:
+        """Get analysis job by ID (user can only see their own jobs)"""
+        try:
+            query = select(Analysis_jobs).where(Analysis_jobs.id == obj_id)
+            if user_id:
+                query = query.where(Analysis_jobs.user_id == user_id)
+            result = await self.db.execute(query)
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Error fetching analysis job {obj_id}: {str(e)}")
+            raise
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[Analysis_jobs]:
+        """Atomically claim the oldest queued job for `worker_id`.
+
+        Postgres locks the candidate row with FOR UPDATE SKIP LOCKED so
+        concurrent workers never wait on each other. SQLite has no row locks;
+        there the conditional UPDATE (status still 'queued') decides the race.
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            candidate = (
+                select(Analysis_jobs.id)
+                .where(Analysis_jobs.status == "queued")
+                .order_by(Analysis_jobs.id)
+                .limit(1)
+            )
+            if self.db.get_bind().dialect.name == "postgresql":
+                candidate = candidate.with_for_update(skip_locked=True)
+
+            result = await self.db.execute(candidate)
+            job_id = result.scalar_one_or_none()
+            if job_id is None:
+                await self.db.rollback()
+                return None
+
+            claimed = await self.db.execute(
+                update(Analysis_jobs)
+                .where(Analysis_jobs.id == job_id, Analysis_jobs.status == "queued")
+                .values(
+                    status="processing",
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=Analysis_jobs.attempts + 1,
+                    started_at=now,
+                    updated_at=now,
+                )
+            )
+            await self.db.commit()
+            if claimed.rowcount != 1:
+                return None
+            return await self.get_by_id(job_id)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error claiming analysis job: {str(e)}")
+            raise
+
+    async def renew_lease(self, obj_id: int, worker_id: str, lease_seconds: int) -> bool:
+        """Extend the lease on a job. Returns False if the lease was lost."""
+        try:
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                update(Analysis_jobs)
+                .where(
+                    Analysis_jobs.id == obj_id,
+                    Analysis_jobs.lease_owner == worker_id,
+                    Analysis_jobs.status == "processing",
+                )
+                .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+            )
+            await self.db.commit()
+            return result.rowcount == 1
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error renewing lease on analysis job {obj_id}: {str(e)}")
+            raise
+
+    async def set_stage(self, obj_id: int, worker_id: str, stage: str, progress: int) -> bool:
+        """Record pipeline progress for status polling. Returns False if the lease was lost."""
+        return await self._update_owned(obj_id, worker_id, {"stage": stage, "progress": progress})
+
+    async def mark_completed(self, obj_id: int, worker_id: str, extraction_id: int) -> None:
+        """Finish a job successfully and release its lease"""
+        now = datetime.now(timezone.utc)
+        await self._update_owned(obj_id, worker_id, {
+            "status": "completed",
+            "stage": "completed",
+            "progress": 100,
+            "extraction_id": extraction_id,
+            "error": None,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "finished_at": now,
+        })
+
+    async def mark_failed(self, job: Analysis_jobs, worker_id: str, error: str, retryable: bool = False) -> None:
+        """Fail a job, or requeue it if it is retryable and has attempts left"""
+        if retryable and (job.attempts or 0) < (job.max_attempts or 1):
+            await self._update_owned(job.id, worker_id, {
+                "status": "queued",
+                "stage": "queued",
+                "error": error,
+                "lease_owner": None,
+                "lease_expires_at": None,
+            })
+            await self._set_document_status(job.document_id, job.user_id, "queued")
+            logger.warning(f"Analysis job {job.id} requeued after attempt {job.attempts}: {error}")
+            return
+
+        now = datetime.now(timezone.utc)
+        await self._update_owned(job.id, worker_id, {
+            "status": "failed",
+            "stage": "failed",
+            "error": error,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "finished_at": now,
+        })
+        await self._set_document_status(job.document_id, job.user_id, "failed")
+
+    async def reclaim_expired(self) -> int:
+        """Requeue or fail processing jobs whose worker stopped renewing the lease.
+
+        The job's document is put back into 'queued' (or 'failed'), so a crash
+        mid-analysis never leaves a document stuck in 'processing'.
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                select(Analysis_jobs).where(
+                    Analysis_jobs.status == "processing",
+                    Analysis_jobs.lease_expires_at < now,
+                )
+            )
+            expired: List[Analysis_jobs] = result.scalars().all()
+            for job in expired:
+                exhausted = (job.attempts or 0) >= (job.max_attempts or 1)
+                job.status = "failed" if exhausted else "queued"
+                job.stage = job.status
+                job.error = f"Worker lease expired (owner={job.lease_owner})"
+                job.lease_owner = None
+                job.lease_expires_at = None
+                job.updated_at = now
+                if exhausted:
+                    job.finished_at = now
+                await self.db.execute(
+                    update(Documents)
+                    .where(Documents.id == job.document_id, Documents.user_id == job.user_id)
+                    .values(status=job.status, updated_at=now)
+                )
+            await self.db.commit()
+            if expired:
+                logger.warning(f"Reclaimed {len(expired)} analysis jobs with expired leases")
+            return len(expired)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error reclaiming expired analysis jobs: {str(e)}")
+            raise
+
+    async def _update_owned(self, obj_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+        """Update a job only while `worker_id` still holds its lease"""
+        try:
+            values = {**values, "updated_at": datetime.now(timezone.utc)}
+            result = await self.db.execute(
+                update(Analysis_jobs)
+                .where(Analysis_jobs.id == obj_id, Analysis_jobs.lease_owner == worker_id)
+                .values(**values)
+            )
+            await self.db.commit()
+            if result.rowcount != 1:
+                logger.warning(f"Analysis job {obj_id} is no longer leased by {worker_id}")
+                return False
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating analysis job {obj_id}: {str(e)}")
+            raise
+
+    async def _set_document_status(self, document_id: int, user_id: str, status: str) -> None:
+        try:
+            await self.db.execute(
+                update(Documents)
+                .where(Documents.id == document_id, Documents.user_id == user_id)
+                .values(status=status, updated_at=datetime.now(timezone.utc))
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating status of document {document_id}: {str(e)}")
+            raise
@@ -0,0 +1,314 @@
+"""
+Lease analysis pipeline shared by the synchronous endpoints and the job workers.
+
+download → Gemini → compliance → extraction row → credit deduction → document status
+
+Page-text extraction for the source map runs concurrently with the Gemini call
+(see GeminiExtractor.analyze_pdf), and every run logs per-stage timings.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import db_manager
+from core.http_client import get_http_client
+from core.timing import StageTimer
+
+from services import document_tasks
+from services.compliance_checker import ComplianceChecker
+from services.document_cache import DocumentByteCache, document_byte_cache
+from services.document_files import read_document_file
+from services.document_layout import layout_from_bytes
+from services.document_model import ParsedDocument, compact_pages_meta, document_file_type, parsed_document_cache
+from services.documents import DocumentsService
+from services.extractions import ExtractionsService
+from services.gemini_cache import GeminiResultCacheService
+from services.gemini_extractor import GeminiExtractor
+from services.supabase_storage import SupabaseStorageService
+from services.user_credits import User_creditsService
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_BUCKET = "lease-documents"
+
+# (stage, progress) → awaitable; used by job workers to publish progress
+StageCallback = Callable[[str, int], Awaitable[None]]
+
+
+class DocumentFileUnavailableError(Exception):
+    """Neither Supabase Storage nor the database fallback has the file bytes."""
+
+
+class AnalysisFailedError(Exception):
+    """The Gemini analysis step failed; the document has been marked failed."""
+
+
+class InsufficientCreditsError(AnalysisFailedError):
+    """The user ran out of credits before the result was saved; the document has been marked failed."""
+
+
+async def fetch_document_bytes(document, log_prefix: str = "[analysis]") -> Optional[bytes]:
+    """Document bytes from the local byte cache, else Supabase Storage, else the database copy."""
+    cache_key = DocumentByteCache.document_key(document)
+    file_bytes = await document_byte_cache.get(cache_key)
+    if file_bytes:
+        return file_bytes
+
+    try:
+        if not document.file_key:
+            raise ValueError("Document has no file_key")
+        supabase_storage = SupabaseStorageService()
+        download_url = await supabase_storage.get_download_url(
+            bucket_name=DOCUMENTS_BUCKET,
+            object_key=document.file_key
+        )
+        file_response = await get_http_client("supabase").get(download_url)
+        file_response.raise_for_status()
+        file_bytes = file_response.content
+        logger.info(f"{log_prefix} Downloaded {len(file_bytes)} bytes from Supabase")
+    except Exception as e:
+        logger.warning(f"{log_prefix} Supabase download failed, trying database fallback: {e}")
+
+    if not file_bytes:
+        file_bytes = await read_document_file(document)
+        if file_bytes:
+            logger.info(f"{log_prefix} Using database fallback, read {len(file_bytes)} bytes")
+
+    if file_bytes:
+        await document_byte_cache.put(cache_key, file_bytes)
+    return file_bytes or None
+
+
+async def load_parsed_document(document, log_prefix: str = "[analysis]") -> Optional[ParsedDocument]:
+    """Parsed page model for a document; after the first parse no bytes are fetched at all."""
+    cache_key = DocumentByteCache.document_key(document)
+    digest = document_byte_cache.digest_for(cache_key)
+    if digest:
+        parsed = parsed_document_cache.get(digest, document_file_type(document.file_name))
+        if parsed is not None:
+            return parsed
+
+    file_bytes = await fetch_document_bytes(document, log_prefix)
+    if not file_bytes:
+        return None
+    return await document_tasks.parse_document(file_bytes, document.file_name, document_byte_cache.digest_for(cache_key))
+
+
+class CachedAnalysis:
+    """GeminiExtractor.analyze_pdf() behind the result cache, split so callers can overlap work with it.
+
+    start() does the cache lookup on `db`. On a miss the Gemini call runs in a
+    task that never touches the session, so the caller may keep using `db`
+    (create rows, etc.) until result() awaits the task and stores the result.
+    Analysis errors surface from result(), never from start().
+    """
+
+    def __init__(self, db: AsyncSession, file_bytes: bytes, file_name: str, timer: Optional[StageTimer] = None):
+        self.cache = GeminiResultCacheService(db)
+        self.file_bytes = file_bytes
+        self.file_name = file_name
+        self.timer = timer or StageTimer("[analysis]")
+        self._cached: Optional[Dict[str, Any]] = None
+        self._task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+
+    async def start(self) -> "CachedAnalysis":
+        with self.timer.stage("cache_lookup"):
+            self._cached = await self.cache.get(self.file_bytes, self.file_name)
+        if self._cached is None:
+            self._task = asyncio.create_task(self._analyze())
+        return self
+
+    async def _analyze(self) -> Dict[str, Any]:
+        with self.timer.stage("analysis"):
+            return await GeminiExtractor().analyze_pdf(self.file_bytes, self.file_name, self.timer)
+
+    async def result(self) -> Dict[str, Any]:
+        if self._cached is not None:
+            return self._cached
+        analysis_result = await self._task
+        await self.cache.put(self.file_bytes, self.file_name, analysis_result)
+        return analysis_result
+
+    def cancel(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+
+async def analyze_with_cache(
+    db: AsyncSession, file_bytes: bytes, file_name: str, timer: Optional[StageTimer] = None
+) -> Dict[str, Any]:
+    """GeminiExtractor.analyze_pdf() behind the content-hash result cache."""
+    analysis = await CachedAnalysis(db, file_bytes, file_name, timer).start()
+    return await analysis.result()
+
+
+def build_extraction_record(
+    user_id: str,
+    document_id: int,
+    extracted_data: Dict[str, Any],
+    compliance_result: Dict[str, Any],
+    source_map: Optional[dict] = None,
+    pages_meta: Optional[list] = None,
+) -> Dict[str, Any]:
+    """Map Gemini output onto the Extractions columns."""
+    return {
+        "user_id": user_id,
+        "document_id": document_id,
+        "tenant_name": extracted_data.get("tenant_name"),
+        "landlord_name": extracted_data.get("landlord_name"),
+        "property_address": extracted_data.get("property_address"),
+        "monthly_rent": extracted_data.get("monthly_rent"),
+        "security_deposit": extracted_data.get("security_deposit"),
+        "lease_start_date": extracted_data.get("lease_start_date"),
+        "lease_end_date": extracted_data.get("lease_end_date"),
+        "renewal_notice_days": extracted_data.get("renewal_notice_days"),
+        "pet_policy": extracted_data.get("pet_policy"),
+        "late_fee_terms": extracted_data.get("late_fee_terms"),
+        "risk_flags": extracted_data.get("risk_flags", []),
+        "audit_checklist": extracted_data.get("audit_checklist", []),
+        "compliance_data": compliance_result,
+        "raw_extraction": extracted_data,
+        "source_map": source_map if source_map is not None else {},
+        "pages_meta": compact_pages_meta(pages_meta),
+        "created_at": datetime.now(timezone.utc)
+    }
+
+
+async def run_document_analysis(
+    db: AsyncSession,
+    document,
+    user_id: str,
+    charge_credit: bool,
+    file_bytes: Optional[bytes] = None,
+    on_stage: Optional[StageCallback] = None,
+) -> Dict[str, Any]:
+    """Run the full analysis chain for one document.
+
+    Returns {"extraction", "extracted_data", "compliance"}. Raises
+    DocumentFileUnavailableError or AnalysisFailedError for expected failures;
+    in both cases the document status is already set to 'failed'.
+    """
+    async def stage(name: str, progress: int):
+        if on_stage:
+            await on_stage(name, progress)
+
+    timer = StageTimer(f"[analysis] document {document.id}")
+    doc_service = DocumentsService(db)
+    await doc_service.update(document.id, {"status": "processing"}, user_id)
+
+    if file_bytes is None:
+        await stage("downloading", 10)
+        file_bytes = await timer.timed("download", fetch_document_bytes(document))
+    if not file_bytes:
+        await doc_service.update(document.id, {"status": "failed"}, user_id)
+        raise DocumentFileUnavailableError("Document file not available")
+
+    await stage("analyzing", 25)
+    try:
+        analysis_result = await analyze_with_cache(db, file_bytes, document.file_name, timer)
+        extracted_data = analysis_result["extracted_data"]
+        pages_meta = analysis_result["pages_meta"]
+        source_map = analysis_result.get("source_map", {})
+        logger.info(f"Successfully analyzed document {document.id} using Gemini API")
+    except Exception as e:
+        logger.error(f"Gemini analysis failed for document {document.id}: {e}")
+        await doc_service.update(document.id, {"status": "failed"}, user_id)
+        raise AnalysisFailedError(f"PDF analysis failed: {str(e)}") from e
+
+    await stage("compliance", 80)
+    compliance_checker = ComplianceChecker(db)
+    compliance_result = await timer.timed("compliance", compliance_checker.check_compliance(extracted_data))
+
+    await stage("saving", 90)
+    with timer.stage("save"):
+        # Charged before the extraction is stored: the atomic deduct decides which of a
+        # user's concurrent analyses get saved when they have fewer credits than documents
+        credits_service = User_creditsService(db)
+        charged = charge_credit and await credits_service.deduct_credit(user_id)
+        if charge_credit and not charged and not await credits_service.can_analyze(user_id):
+            await doc_service.update(document.id, {"status": "failed"}, user_id)
+            raise InsufficientCreditsError("No credits remaining")
+
+        extractions_service = ExtractionsService(db)
+        try:
+            extraction = await extractions_service.create(
+                build_extraction_record(user_id, document.id, extracted_data, compliance_result, source_map, pages_meta),
+                user_id,
+            )
+        except Exception:
+            if charged:
+                await credits_service.add_credits(user_id, 1)
+            raise
+
+        completed = {"status": "completed"}
+        try:
+            completed.update(await layout_from_bytes(file_bytes, document.file_name))
+        except Exception as e:
+            logger.warning(f"Could not record layout for document {document.id}: {e}")
+        await doc_service.update(document.id, completed, user_id)
+    timer.log()
+
+    return {
+        "extraction": extraction,
+        "extracted_data": extracted_data,
+        "compliance": compliance_result,
+    }
+
+
+async def _analyze_batch_item(
+    document_id: int,
+    user_id: str,
+    charge_credit: bool,
+    semaphore: asyncio.Semaphore,
+    session_factory,
+) -> Dict[str, Any]:
+    """Analyze one batch document on its own session; never raises."""
+    async with semaphore:
+        try:
+            async with session_factory() as db:
+                document = await DocumentsService(db).get_by_id(document_id, user_id)
+                if not document:
+                    return {"document_id": document_id, "success": False, "error": "Document not found"}
+
+                result = await run_document_analysis(db, document, user_id, charge_credit)
+                return {
+                    "document_id": document_id,
+                    "success": True,
+                    "extraction_id": result["extraction"].id,
+                    "file_name": document.file_name,
+                }
+        except DocumentFileUnavailableError as e:
+            return {"document_id": document_id, "success": False, "error": str(e)}
+        except AnalysisFailedError as e:
+            return {"document_id": document_id, "success": False, "error": f"Analysis failed: {e.__cause__ or e}"}
+        except Exception as e:
+            logger.error(f"Batch analysis error for doc {document_id}: {e}")
+            return {"document_id": document_id, "success": False, "error": str(e)}
+
+
+async def run_batch_analysis(
+    document_ids: List[int],
+    user_id: str,
+    charge_credit: bool,
+    concurrency: Optional[int] = None,
+    session_factory=None,
+) -> List[Dict[str, Any]]:
+    """Analyze documents concurrently, at most `concurrency` at a time.
+
+    AsyncSession is not safe for concurrent use, so every document gets its
+    own session from `session_factory` (default: the app session maker).
+    Results come back in `document_ids` order regardless of completion order,
+    and a failing document never affects the others.
+    """
+    concurrency = max(1, concurrency or settings.analysis_batch_concurrency)
+    session_factory = session_factory or db_manager.async_session_maker
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*[
+        _analyze_batch_item(doc_id, user_id, charge_credit, semaphore, session_factory)
+        for doc_id in document_ids
+    ])
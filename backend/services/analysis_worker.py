@@ -0,0 +1,229 @@
+"""
+Background workers that drain the analysis_jobs queue.
+
+Each worker claims one job at a time under a lease, runs the shared analysis
+pipeline with its own database session and renews the lease while the job is
+running. A reaper task requeues jobs whose lease expired (crashed worker), and
+a worker that finds its lease gone stops working on the job.
+
+Workers start from the app lifespan. They can also run as a standalone
+process next to Lambda/web nodes:
+
+    python -m services.analysis_worker
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import List, Optional
+
+from core.config import settings
+from core.database import db_manager
+from services.analysis_jobs import Analysis_jobsService
+from services.analysis_pipeline import (
+    AnalysisFailedError,
+    DocumentFileUnavailableError,
+    run_document_analysis,
+)
+from services.documents import DocumentsService
+from services.user_credits import User_creditsService
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLostError(Exception):
+    """Another worker holds the job's lease now (this one stalled past it)."""
+
+
+class AnalysisWorkerPool:
+    """Runs N queue consumers plus one lease reaper inside the current event loop."""
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._node_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    @property
+    def is_running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self, concurrency: Optional[int] = None):
+        concurrency = settings.analysis_workers if concurrency is None else concurrency
+        if concurrency <= 0 or self.is_running:
+            return
+        self._stopping.clear()
+        for idx in range(concurrency):
+            worker_id = f"{self._node_id}-w{idx}"
+            self._tasks.append(asyncio.create_task(self._run_worker(worker_id), name=worker_id))
+        self._tasks.append(asyncio.create_task(self._run_reaper(), name=f"{self._node_id}-reaper"))
+        logger.info(f"Started {concurrency} analysis workers on {self._node_id}")
+
+    async def stop(self):
+        if not self._tasks:
+            return
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Analysis workers stopped")
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_worker(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                async with db_manager.async_session_maker() as db:
+                    job = await Analysis_jobsService(db).claim_next(
+                        worker_id, settings.analysis_job_lease_seconds
+                    )
+                if job is None:
+                    await self._sleep(settings.analysis_job_poll_interval)
+                    continue
+                await self._process(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{worker_id}] Worker loop error: {e}", exc_info=True)
+                await self._sleep(settings.analysis_job_poll_interval)
+
+    async def _run_reaper(self):
+        interval = max(5.0, settings.analysis_job_lease_seconds / 3)
+        while not self._stopping.is_set():
+            try:
+                async with db_manager.async_session_maker() as db:
+                    await Analysis_jobsService(db).reclaim_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis job reaper error: {e}")
+            await self._sleep(interval)
+
+    async def _renew_lease(self, job_id: int, worker_id: str, work: asyncio.Task):
+        """Heartbeat on a separate session; the job session is busy with the pipeline.
+
+        Cancels `work` once the lease is lost, so a reaped job is not finished twice.
+        """
+        lease = settings.analysis_job_lease_seconds
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                async with db_manager.async_session_maker() as db:
+                    if not await Analysis_jobsService(db).renew_lease(job_id, worker_id, lease):
+                        logger.warning(f"[{worker_id}] Lost lease on analysis job {job_id}; abandoning it")
+                        work.cancel()
+                        return
+            except Exception as e:
+                logger.warning(f"[{worker_id}] Lease renewal failed for job {job_id}: {e}")
+
+    async def _process(self, job, worker_id: str):
+        logger.info(f"[{worker_id}] Processing analysis job {job.id} (document {job.document_id}, attempt {job.attempts})")
+        work = asyncio.create_task(self._run_job(job, worker_id))
+        heartbeat = asyncio.create_task(self._renew_lease(job.id, worker_id, work))
+        try:
+            await work
+        except LeaseLostError:
+            logger.warning(f"[{worker_id}] Analysis job {job.id} was reclaimed; result discarded")
+        except asyncio.CancelledError:
+            # The heartbeat only finishes once it has cancelled `work`; otherwise the pool is stopping
+            if not heartbeat.done():
+                raise
+            logger.warning(f"[{worker_id}] Analysis job {job.id} was reclaimed; result discarded")
+        finally:
+            heartbeat.cancel()
+
+    async def _run_job(self, job, worker_id: str):
+        async with db_manager.async_session_maker() as db:
+            job_service = Analysis_jobsService(db)
+            document = await DocumentsService(db).get_by_id(job.document_id, job.user_id)
+            if not document:
+                await job_service.mark_failed(job, worker_id, "Document not found")
+                return
+            # Credits were checked at enqueue time, but queued jobs may have used them up since
+            if job.charge_credit and not await User_creditsService(db).can_analyze(job.user_id):
+                await job_service.mark_failed(job, worker_id, "No credits remaining")
+                return
+
+            async def on_stage(stage: str, progress: int):
+                # Also the ownership check before each stage, the last one just before saving
+                if not await job_service.set_stage(job.id, worker_id, stage, progress):
+                    raise LeaseLostError(f"Lost lease on analysis job {job.id}")
+
+            try:
+                result = await run_document_analysis(
+                    db,
+                    document,
+                    job.user_id,
+                    charge_credit=job.charge_credit,
+                    on_stage=on_stage,
+                )
+            except LeaseLostError:
+                await db.rollback()
+                raise
+            except (AnalysisFailedError, DocumentFileUnavailableError) as e:
+                await job_service.mark_failed(job, worker_id, str(e))
+                return
+            except Exception as e:
+                logger.error(f"[{worker_id}] Analysis job {job.id} crashed: {e}", exc_info=True)
+                await db.rollback()
+                await job_service.mark_failed(job, worker_id, str(e), retryable=True)
+                return
+
+            await job_service.mark_completed(job.id, worker_id, result["extraction"].id)
+            logger.info(f"[{worker_id}] Analysis job {job.id} completed (extraction {result['extraction'].id})")
+
+
+analysis_worker_pool = AnalysisWorkerPool()
+
+
+async def start_analysis_workers():
+    """Start in-process queue workers (skipped on Lambda, where the loop is frozen between invocations)."""
+    is_lambda = bool(
+        os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+        or os.environ.get("IS_LAMBDA", "").lower() in ("true", "1", "yes")
+    )
+    if is_lambda:
+        logger.info("Lambda environment detected; analysis jobs must be drained by a standalone worker")
+        return
+    if not db_manager.async_session_maker:
+        logger.warning("Database is not initialized; analysis workers not started")
+        return
+    await analysis_worker_pool.start()
+
+
+async def stop_analysis_workers():
+    await analysis_worker_pool.stop()
+
+
+async def _run_standalone():
+    from core.http_client import close_http_clients
+    from services.cpu_pool import start_cpu_pool, stop_cpu_pool
+    from services.database import close_database, initialize_database
+    from services.loop_monitor import start_loop_monitor, stop_loop_monitor
+
+    await initialize_database()
+    await start_cpu_pool()
+    await start_loop_monitor()
+    await analysis_worker_pool.start(max(1, settings.analysis_workers))
+    try:
+        await asyncio.gather(*analysis_worker_pool._tasks)
+    finally:
+        await analysis_worker_pool.stop()
+        await stop_loop_monitor()
+        await stop_cpu_pool()
+        await close_http_clients()
+        await close_database()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    try:
+        asyncio.run(_run_standalone())
+    except KeyboardInterrupt:
+        pass
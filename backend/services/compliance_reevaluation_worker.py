@@ -0,0 +1,216 @@
+"""
+Bulk compliance re-evaluation after regulation changes.
+
+When a state's regulations change, every stored compliance_data of that state
+is stale. A run re-checks them from the stored extraction columns, with no
+model call: the state's regulations are resolved to their rules once
+(compliance_checker.StateRules) and applied to the rows in id-ordered chunks
+of `compliance_reevaluation_chunk_size`. Only rows whose report changed are
+written, as one bulk UPDATE per chunk. It commits together with the run's
+cursor, so a run killed at any point resumes after the last finished chunk.
+
+State_regulationsService requests a run for each state it writes, and this
+process drains the queue in the background. Runs can also be requested and
+drained from the command line:
+
+    python -m services.compliance_reevaluation_worker --state CA --state NY
+    python -m services.compliance_reevaluation_worker --all
+    python -m services.compliance_reevaluation_worker            # resume queued runs
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import db_manager
+from models.extractions import Extractions
+from services.compliance_checker import StateRules
+from services.compliance_reevaluations import Compliance_reevaluationsService
+from services.extraction_fields import count_violations, load_json_value
+from services.regulations_index import fetch_state_regulations
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 120
+
+
+async def reevaluate_chunk(db: AsyncSession, rules: StateRules, after_id: int, chunk_size: int) -> Tuple[int, int, int]:
+    """Re-check the next `chunk_size` extractions of the state after `after_id`.
+
+    Stages the changed rows without committing. Returns (last id, rows
+    scanned, rows changed); no rows scanned means the pass is done.
+    """
+    result = await db.execute(
+        select(Extractions.id, Extractions.monthly_rent, Extractions.security_deposit, Extractions.compliance_data)
+        .where(Extractions.state_code == rules.state_code, Extractions.id > after_id)
+        .order_by(Extractions.id)
+        .limit(chunk_size)
+    )
+    rows = result.all()
+    if not rows:
+        return after_id, 0, 0
+
+    changes = []
+    for row in rows:
+        report = rules.evaluate({"monthly_rent": row.monthly_rent, "security_deposit": row.security_deposit})
+        if report != load_json_value(row.compliance_data):
+            changes.append({"id": row.id, "compliance_data": report, "violation_count": count_violations(report)})
+    if changes:
+        await db.execute(update(Extractions), changes)
+    return rows[-1].id, len(rows), len(changes)
+
+
+class ComplianceReevaluator:
+    """Claims queued runs and works through them one at a time."""
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size or settings.compliance_reevaluation_chunk_size
+        self._worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}-compliance"
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def schedule(self):
+        """Drain the queue in the background, starting a drain if none is running."""
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain(), name=self._worker_id)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def drain(self) -> int:
+        """Run claimable runs until the queue is empty; returns how many were run."""
+        runs = 0
+        while await self.run_next():
+            runs += 1
+        return runs
+
+    async def _drain(self):
+        # Requests arriving mid-drain set the event again and get another round
+        while self._wake.is_set():
+            self._wake.clear()
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Compliance re-evaluation drain error: {e}", exc_info=True)
+
+    async def run_next(self) -> bool:
+        async with db_manager.async_session_maker() as db:
+            run = await Compliance_reevaluationsService(db).claim_next(self._worker_id, LEASE_SECONDS)
+        if run is None:
+            return False
+        try:
+            await self._process(run)
+        except asyncio.CancelledError:
+            async with db_manager.async_session_maker() as db:
+                await Compliance_reevaluationsService(db).release(run.id, self._worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"Compliance re-evaluation run {run.id} ({run.state_code}) failed: {e}", exc_info=True)
+            async with db_manager.async_session_maker() as db:
+                await Compliance_reevaluationsService(db).mark_failed(run.id, self._worker_id, str(e))
+        return True
+
+    async def _process(self, run):
+        async with db_manager.async_session_maker() as db:
+            service = Compliance_reevaluationsService(db)
+            revision, cursor, scanned, updated = run.revision, run.last_extraction_id, run.scanned, run.updated
+            rules = None
+            logger.info(f"Re-evaluating compliance for {run.state_code} (run {run.id}, from extraction {cursor})")
+            while True:
+                if rules is None:
+                    rules = StateRules(run.state_code, await fetch_state_regulations(db, run.state_code))
+                cursor_after, n, changed = await reevaluate_chunk(db, rules, cursor, self.chunk_size)
+                if n:
+                    saved = await service.save_progress(
+                        run.id, self._worker_id, revision, cursor_after, scanned + n, updated + changed, LEASE_SECONDS
+                    )
+                    if saved:
+                        cursor, scanned, updated = cursor_after, scanned + n, updated + changed
+                        continue
+                elif await service.mark_completed(run.id, self._worker_id, revision):
+                    logger.info(f"Compliance re-evaluation run {run.id} ({run.state_code}) done: "
+                                f"{scanned} scanned, {updated} updated")
+                    return
+
+                # Restarted by a regulation write, or the lease was lost
+                current = await service.get_by_id(run.id)
+                if current is None or current.lease_owner != self._worker_id or current.status != "running":
+                    logger.warning(f"Lost lease on compliance re-evaluation run {run.id}")
+                    return
+                revision, cursor, scanned, updated = (
+                    current.revision, current.last_extraction_id, current.scanned, current.updated
+                )
+                rules = None
+                logger.info(f"Compliance re-evaluation run {run.id} ({run.state_code}) restarted at revision {revision}")
+
+
+compliance_reevaluator = ComplianceReevaluator()
+
+
+def _in_process_runs_enabled() -> bool:
+    """Background drains need a live event loop (not Lambda) and a database."""
+    is_lambda = bool(
+        os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+        or os.environ.get("IS_LAMBDA", "").lower() in ("true", "1", "yes")
+    )
+    return not is_lambda and db_manager.async_session_maker is not None
+
+
+async def request_compliance_reevaluation(db: AsyncSession, state_codes: Iterable[Optional[str]]):
+    """Queue runs for the states and drain them in the background of this process."""
+    await Compliance_reevaluationsService(db).request(state_codes)
+    if _in_process_runs_enabled():
+        compliance_reevaluator.schedule()
+
+
+async def start_compliance_reevaluations():
+    """Resume runs left queued or interrupted by a previous process."""
+    if _in_process_runs_enabled():
+        compliance_reevaluator.schedule()
+
+
+async def stop_compliance_reevaluations():
+    await compliance_reevaluator.stop()
+
+
+async def _run_cli(state_codes, all_states: bool, chunk_size: Optional[int]):
+    from services.database import close_database, initialize_database
+
+    await initialize_database()
+    try:
+        async with db_manager.async_session_maker() as db:
+            if all_states:
+                result = await db.execute(
+                    select(Extractions.state_code).distinct().where(Extractions.state_code.isnot(None))
+                )
+                state_codes = result.scalars().all()
+            if state_codes:
+                await Compliance_reevaluationsService(db).request(code.upper() for code in state_codes)
+        runs = await ComplianceReevaluator(chunk_size).drain()
+        logger.info(f"Finished {runs} compliance re-evaluation runs")
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Re-check stored compliance reports against the current regulations")
+    parser.add_argument("--state", action="append", default=[], help="State code to re-evaluate (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Re-evaluate every state that has extractions")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(_run_cli(args.state, args.all, args.chunk_size))
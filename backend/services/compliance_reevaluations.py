@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.compliance_reevaluations import Compliance_reevaluations
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+# ------------------ Service Layer ------------------
+class Compliance_reevaluationsService:
+    """Service layer for compliance re-evaluation runs.
+
+    A run re-checks every extraction of one state against its current
+    regulations (services/compliance_reevaluation_worker.py). There is at most
+    one active run per state: a regulation write while a run is queued or
+    running bumps its revision and resets its cursor, so the pass restarts
+    with the new regulations. Runs are claimed under a lease; a run whose
+    owner stopped renewing it can be claimed again and resumes from
+    `last_extraction_id`.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def request(self, state_codes: Iterable[Optional[str]]) -> List[int]:
+        """Queue a run for each state (or restart its active run); returns the run ids"""
+        try:
+            now = datetime.now(timezone.utc)
+            run_ids = []
+            for state_code in sorted({code for code in state_codes if code}):
+                result = await self.db.execute(
+                    select(Compliance_reevaluations.id)
+                    .where(
+                        Compliance_reevaluations.state_code == state_code,
+                        Compliance_reevaluations.status.in_(ACTIVE_STATUSES),
+                    )
+                    .order_by(Compliance_reevaluations.id)
+                    .limit(1)
+                )
+                run_id = result.scalar_one_or_none()
+                if run_id is not None:
+                    await self.db.execute(
+                        update(Compliance_reevaluations)
+                        .where(Compliance_reevaluations.id == run_id)
+                        .values(
+                            revision=Compliance_reevaluations.revision + 1,
+                            last_extraction_id=0,
+                            scanned=0,
+                            updated_at=now,
+                        )
+                    )
+                else:
+                    obj = Compliance_reevaluations(
+                        state_code=state_code,
+                        status="queued",
+                        revision=0,
+                        last_extraction_id=0,
+                        scanned=0,
+                        updated=0,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    self.db.add(obj)
+                    await self.db.flush()
+                    run_id = obj.id
+                run_ids.append(run_id)
+            await self.db.commit()
+            if run_ids:
+                logger.info(f"Requested compliance re-evaluation runs {run_ids}")
+            return run_ids
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error requesting compliance re-evaluation: {str(e)}")
+            raise
+
+    async def get_by_id(self, obj_id: int) -> Optional[Compliance_reevaluations]:
+        """Get compliance_reevaluations by ID"""
+        try:
+            result = await self.db.execute(
+                select(Compliance_reevaluations).where(Compliance_reevaluations.id == obj_id)
+            )
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Error fetching compliance_reevaluations {obj_id}: {str(e)}")
+            raise
+
+    async def get_recent(self, limit: int = 50) -> List[Compliance_reevaluations]:
+        """Most recent runs first"""
+        try:
+            result = await self.db.execute(
+                select(Compliance_reevaluations).order_by(Compliance_reevaluations.id.desc()).limit(limit)
+            )
+            return result.scalars().all()
+        except Exception as e:
+            logger.error(f"Error fetching compliance_reevaluations list: {str(e)}")
+            raise
+
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[Compliance_reevaluations]:
+        """Claim the oldest queued run, or a running one whose lease expired.
+
+        As in Analysis_jobsService.claim_next, the conditional UPDATE decides
+        races between workers.
+        """
+        try:
+            now = datetime.now(timezone.utc)
+            claimable = or_(
+                Compliance_reevaluations.status == "queued",
+                and_(
+                    Compliance_reevaluations.status == "running",
+                    Compliance_reevaluations.lease_expires_at < now,
+                ),
+            )
+            candidate = (
+                select(Compliance_reevaluations.id)
+                .where(claimable)
+                .order_by(Compliance_reevaluations.id)
+                .limit(1)
+            )
+            if self.db.get_bind().dialect.name == "postgresql":
+                candidate = candidate.with_for_update(skip_locked=True)
+
+            result = await self.db.execute(candidate)
+            run_id = result.scalar_one_or_none()
+            if run_id is None:
+                await self.db.rollback()
+                return None
+
+            claimed = await self.db.execute(
+                update(Compliance_reevaluations)
+                .where(Compliance_reevaluations.id == run_id, claimable)
+                .values(
+                    status="running",
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    started_at=now,
+                    updated_at=now,
+                )
+            )
+            await self.db.commit()
+            if claimed.rowcount != 1:
+                return None
+            return await self.get_by_id(run_id)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error claiming compliance re-evaluation run: {str(e)}")
+            raise
+
+    async def save_progress(
+        self,
+        obj_id: int,
+        worker_id: str,
+        revision: int,
+        last_extraction_id: int,
+        scanned: int,
+        updated: int,
+        lease_seconds: int,
+    ) -> bool:
+        """Record the cursor and renew the lease, committing the caller's pending writes with it.
+
+        Returns False, with everything rolled back, if the lease was lost or
+        the run was restarted since `revision`.
+        """
+        now = datetime.now(timezone.utc)
+        return await self._commit_if_current(obj_id, worker_id, revision, {
+            "last_extraction_id": last_extraction_id,
+            "scanned": scanned,
+            "updated": updated,
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+        })
+
+    async def mark_completed(self, obj_id: int, worker_id: str, revision: int) -> bool:
+        """Finish a run and release its lease; False if it was restarted or lost meanwhile"""
+        return await self._commit_if_current(obj_id, worker_id, revision, {
+            "status": "completed",
+            "error": None,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "finished_at": datetime.now(timezone.utc),
+        })
+
+    async def release(self, obj_id: int, worker_id: str) -> None:
+        """Put a run back on the queue (worker shutdown); it resumes from its cursor"""
+        await self._update_owned(obj_id, worker_id, {"status": "queued", "lease_owner": None, "lease_expires_at": None})
+
+    async def mark_failed(self, obj_id: int, worker_id: str, error: str) -> None:
+        await self._update_owned(obj_id, worker_id, {
+            "status": "failed",
+            "error": error,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "finished_at": datetime.now(timezone.utc),
+        })
+
+    async def _commit_if_current(self, obj_id: int, worker_id: str, revision: int, values: Dict[str, Any]) -> bool:
+        try:
+            result = await self.db.execute(
+                update(Compliance_reevaluations)
+                .where(
+                    Compliance_reevaluations.id == obj_id,
+                    Compliance_reevaluations.lease_owner == worker_id,
+                    Compliance_reevaluations.status == "running",
+                    Compliance_reevaluations.revision == revision,
+                )
+                .values(**values, updated_at=datetime.now(timezone.utc))
+            )
+            if result.rowcount != 1:
+                await self.db.rollback()
+                return False
+            await self.db.commit()
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating compliance re-evaluation run {obj_id}: {str(e)}")
+            raise
+
+    async def _update_owned(self, obj_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+        """Update a run only while `worker_id` still holds its lease"""
+        try:
+            values = {**values, "updated_at": datetime.now(timezone.utc)}
+            result = await self.db.execute(
+                update(Compliance_reevaluations)
+                .where(Compliance_reevaluations.id == obj_id, Compliance_reevaluations.lease_owner == worker_id)
+                .values(**values)
+            )
+            await self.db.commit()
+            if result.rowcount != 1:
+                logger.warning(f"Compliance re-evaluation run {obj_id} is no longer leased by {worker_id}")
+                return False
+            return True
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error updating compliance re-evaluation run {obj_id}: {str(e)}")
+            raise
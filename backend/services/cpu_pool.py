@@ -0,0 +1,198 @@
+"""
+Worker processes for CPU-bound document work.
+
+pypdf parsing and layout, Word XML parsing, source-map matching and reportlab
+report rendering are pure Python. In a thread they still hold the GIL, so a 300-page lease stalls every
+other request on the event loop for seconds. CPUPool runs such functions in a
+ProcessPoolExecutor instead:
+
+- Workers are started and warmed at startup. On Linux the pool uses the
+  forkserver start method with the document modules preloaded, so a worker
+  (including a replacement) starts with pypdf already imported. As with any
+  multiprocessing pool, a new worker also imports the entry module (main.py
+  under `python main.py`), which is why replacements are warmed in the
+  background.
+- Every task has a timeout (`cpu_pool_task_timeout_seconds`). A task that
+  overruns cannot be stopped on its own, so the pool is replaced: its
+  processes are terminated and new ones started. Other tasks that were
+  running in the old pool are submitted once more to the new one, since
+  every task is a pure function of its arguments. A task whose own worker
+  dies is not retried.
+- Each worker's address space is capped (`cpu_pool_memory_limit_mb`). An
+  oversized document raises MemoryError in its worker and the worker keeps
+  going. `cpu_pool_max_tasks_per_child` optionally recycles workers.
+
+Without a running pool (workers set to 0, Lambda, scripts), `run` uses a
+thread, as these call sites did before. services/document_tasks.py holds the
+typed task functions that callers use.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Imported once in the forkserver; every worker forked from it starts warm
+PRELOAD_MODULES = ["services.document_tasks"]
+
+
+class CPUTaskTimeoutError(TimeoutError):
+    """A pool task ran longer than its timeout; its worker processes were replaced."""
+
+
+def _init_worker(memory_limit_bytes: int):
+    if memory_limit_bytes > 0:
+        try:
+            import resource
+
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Could not cap worker memory: {e}")
+    for module in PRELOAD_MODULES:
+        __import__(module)
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+class CPUPool:
+    def __init__(self, workers: int, task_timeout: float, memory_limit_mb: int, max_tasks_per_child: int):
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"tasks": 0, "errors": 0, "timeouts": 0, "restarts": 0, "thread_fallbacks": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        kwargs = {}
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            context = multiprocessing.get_context("spawn")
+        if self.max_tasks_per_child > 0 and sys.version_info >= (3, 11):
+            kwargs["max_tasks_per_child"] = self.max_tasks_per_child
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.memory_limit_bytes,),
+            **kwargs,
+        )
+
+    async def start(self):
+        if self.workers <= 0 or self.is_running:
+            return
+        self._executor = self._new_executor()
+        await self._warm(self._executor)
+        logger.info(f"Started {self.workers} CPU pool workers")
+
+    async def _warm(self, executor: ProcessPoolExecutor):
+        """Start every worker now rather than on the first request that needs one."""
+        loop = asyncio.get_running_loop()
+        # Submitted together, so the executor spawns a process for each
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm) for _ in range(self.workers)))
+
+    async def stop(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+            logger.info("CPU pool stopped")
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace `broken` (if it is still the current pool) and kill its processes."""
+        if self._executor is not broken:
+            return
+        self.stats["restarts"] += 1
+        self._executor = self._new_executor()
+        # No public API stops a running task; terminate the old pool's workers
+        for process in list((getattr(broken, "_processes", None) or {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+        asyncio.get_running_loop().create_task(self._rewarm(self._executor))
+
+    async def _rewarm(self, executor: ProcessPoolExecutor):
+        try:
+            await self._warm(executor)
+        except Exception as e:
+            logger.warning(f"Warming the replacement CPU pool failed: {e}")
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+        """Result of fn(*args) computed in a worker process.
+
+        fn and its arguments are pickled, so fn must be a module-level
+        function. Raises CPUTaskTimeoutError after `timeout` seconds (default
+        `cpu_pool_task_timeout_seconds`), and whatever fn raised otherwise.
+        """
+        timeout = self.task_timeout if timeout is None else timeout
+        self.stats["tasks"] += 1
+        if self._executor is None:
+            self.stats["thread_fallbacks"] += 1
+            return await asyncio.to_thread(fn, *args)
+
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                logger.error(f"CPU task {fn.__name__} exceeded {timeout:.0f}s; replacing the worker processes")
+                self._restart(executor)
+                raise CPUTaskTimeoutError(f"{fn.__name__} did not finish within {timeout:.0f}s")
+            except BrokenProcessPool:
+                # Either another task's timeout replaced the pool under this one, or a worker died
+                replaced = self._executor is not executor
+                self._restart(executor)
+                if attempt or not replaced or self._executor is None:
+                    self.stats["errors"] += 1
+                    raise
+                logger.warning(f"CPU pool was replaced while running {fn.__name__}; retrying once")
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+
+
+cpu_pool = CPUPool(
+    workers=settings.cpu_pool_workers,
+    task_timeout=settings.cpu_pool_task_timeout_seconds,
+    memory_limit_mb=settings.cpu_pool_memory_limit_mb,
+    max_tasks_per_child=settings.cpu_pool_max_tasks_per_child,
+)
+
+
+async def start_cpu_pool():
+    """Start the worker processes (skipped on Lambda, which has no /dev/shm for process pools)."""
+    is_lambda = bool(
+        os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+        or os.environ.get("IS_LAMBDA", "").lower() in ("true", "1", "yes")
+    )
+    if is_lambda:
+        logger.info("Lambda environment detected; CPU-bound document work runs in threads")
+        return
+    try:
+        await cpu_pool.start()
+    except Exception as e:
+        # The app still works without the pool, just with the old thread behaviour
+        await cpu_pool.stop()
+        logger.error(f"CPU pool failed to start, using threads: {e}")
+
+
+async def stop_cpu_pool():
+    await cpu_pool.stop()
@@ -0,0 +1,290 @@
+"""
+Two-tier, content-addressed cache of document file bytes.
+
+Tier 1 is an in-memory LRU and tier 2 an on-disk LRU under
+`settings.document_cache_dir`. Both are bounded by total bytes, not entry
+count. Blobs are stored under their SHA-256, and a small alias map resolves a
+document (id + file_key) to its hash. Identical files uploaded as different
+documents therefore share one copy. Deleting a document or replacing its file
+drops its alias, and its blob unless another document shares it
+(services.document_files.forget_cached_file).
+
+All index bookkeeping runs on the event loop. Only file reads and writes are
+pushed to a worker thread.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _ByteLRU:
+    """Size-bounded LRU bookkeeping: key -> size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.sizes
+
+    def touch(self, key: str):
+        self.sizes.move_to_end(key)
+
+    def add(self, key: str, size: int):
+        if key in self.sizes:
+            self.total_bytes -= self.sizes.pop(key)
+        self.sizes[key] = size
+        self.total_bytes += size
+
+    def remove(self, key: str) -> int:
+        size = self.sizes.pop(key, 0)
+        self.total_bytes -= size
+        return size
+
+    def evict_until_fits(self, incoming: int = 0):
+        """Pop least-recently-used keys until `incoming` more bytes fit; returns popped keys."""
+        evicted = []
+        while self.sizes and self.total_bytes + incoming > self.max_bytes:
+            key, size = self.sizes.popitem(last=False)
+            self.total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+
+class DocumentByteCache:
+    def __init__(
+        self,
+        memory_max_bytes: int,
+        disk_max_bytes: int,
+        disk_dir: Optional[str],
+        max_aliases: int = 10000,
+    ):
+        self._memory = _ByteLRU(memory_max_bytes)
+        self._blobs: Dict[str, bytes] = {}
+        self._disk = _ByteLRU(disk_max_bytes)
+        self._disk_dir = disk_dir if disk_max_bytes > 0 else None
+        self._disk_loaded = False
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._max_aliases = max_aliases
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+    # ---------- public API ----------
+
+    @staticmethod
+    def document_key(document) -> str:
+        return f"{document.id}:{document.file_key or ''}"
+
+    def digest_for(self, alias: str) -> Optional[str]:
+        """Content hash of a document seen before, without touching its bytes."""
+        return self._aliases.get(alias)
+
+    async def get(self, alias: str) -> Optional[bytes]:
+        digest = self._aliases.get(alias)
+        if digest is None:
+            self._stats["misses"] += 1
+            return None
+        self._aliases.move_to_end(alias)
+
+        data = self._blobs.get(digest)
+        if data is not None:
+            self._memory.touch(digest)
+            self._stats["memory_hits"] += 1
+            return data
+
+        data = await self._disk_read(digest)
+        if data is not None:
+            self._stats["disk_hits"] += 1
+            self._memory_put(digest, data)
+            return data
+
+        self._aliases.pop(alias, None)
+        self._stats["misses"] += 1
+        return None
+
+    async def put(self, alias: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        self._aliases[alias] = digest
+        self._aliases.move_to_end(alias)
+        while len(self._aliases) > self._max_aliases:
+            self._aliases.popitem(last=False)
+
+        self._memory_put(digest, data)
+        await self._disk_write(digest, data)
+        return digest
+
+    async def invalidate(self, alias: str) -> Optional[str]:
+        """Forget a document. Its blob is dropped from both tiers unless another alias shares it.
+
+        Returns the hash of a dropped blob, else None.
+        """
+        digest = self._aliases.pop(alias, None)
+        if digest is None or digest in self._aliases.values():
+            return None
+        self._blobs.pop(digest, None)
+        self._memory.remove(digest)
+        await self._ensure_disk_index()
+        if self._disk_dir and digest in self._disk:
+            self._disk.remove(digest)
+            await asyncio.to_thread(self._unlink, self._blob_path(digest))
+        return digest
+
+    async def invalidate_document(self, document_id: int) -> List[str]:
+        """invalidate() every alias of a document, whatever its file_key; hashes of dropped blobs."""
+        prefix = f"{document_id}:"
+        dropped = []
+        for alias in [alias for alias in self._aliases if alias.startswith(prefix)]:
+            digest = await self.invalidate(alias)
+            if digest:
+                dropped.append(digest)
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_bytes": self._memory.total_bytes,
+            "memory_max_bytes": self._memory.max_bytes,
+            "memory_entries": len(self._blobs),
+            "disk_bytes": self._disk.total_bytes,
+            "disk_max_bytes": self._disk.max_bytes if self._disk_dir else 0,
+            "disk_entries": len(self._disk.sizes),
+            "aliases": len(self._aliases),
+        }
+
+    # ---------- memory tier ----------
+
+    def _memory_put(self, digest: str, data: bytes):
+        size = len(data)
+        if size > self._memory.max_bytes:
+            return
+        if digest in self._memory:
+            self._memory.touch(digest)
+            return
+        for key in self._memory.evict_until_fits(size):
+            self._blobs.pop(key, None)
+            self._stats["memory_evictions"] += 1
+        self._memory.add(digest, size)
+        self._blobs[digest] = data
+
+    # ---------- disk tier ----------
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._disk_dir, digest[:2], digest)
+
+    async def _ensure_disk_index(self):
+        """Rebuild the disk LRU from the directory (oldest mtime first) on first use."""
+        if self._disk_loaded or not self._disk_dir:
+            return
+        self._disk_loaded = True
+
+        def scan():
+            found = []
+            os.makedirs(self._disk_dir, exist_ok=True)
+            for sub in os.listdir(self._disk_dir):
+                sub_path = os.path.join(self._disk_dir, sub)
+                if not os.path.isdir(sub_path):
+                    continue
+                for name in os.listdir(sub_path):
+                    path = os.path.join(sub_path, name)
+                    if name.endswith(".tmp"):
+                        continue
+                    st = os.stat(path)
+                    found.append((st.st_mtime, name, st.st_size))
+            return sorted(found)
+
+        try:
+            for _, digest, size in await asyncio.to_thread(scan):
+                self._disk.add(digest, size)
+            await self._disk_evict(0)
+        except Exception as e:
+            logger.warning(f"Document disk cache unavailable ({self._disk_dir}): {e}")
+            self._disk_dir = None
+
+    async def _disk_read(self, digest: str) -> Optional[bytes]:
+        await self._ensure_disk_index()
+        if not self._disk_dir or digest not in self._disk:
+            return None
+        expected = self._disk.sizes[digest]
+        path = self._blob_path(digest)
+
+        def read():
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as LRU order across restarts
+            return data
+
+        try:
+            data = await asyncio.to_thread(read)
+        except OSError:
+            self._disk.remove(digest)
+            return None
+        if len(data) != expected:
+            logger.warning(f"Discarding truncated disk cache entry {digest}")
+            self._disk.remove(digest)
+            await asyncio.to_thread(self._unlink, path)
+            return None
+        self._disk.touch(digest)
+        return data
+
+    async def _disk_write(self, digest: str, data: bytes):
+        await self._ensure_disk_index()
+        if not self._disk_dir or len(data) > self._disk.max_bytes:
+            return
+        if digest in self._disk:
+            self._disk.touch(digest)
+            return
+        await self._disk_evict(len(data))
+        # Reserve the space before yielding so concurrent writers see it
+        self._disk.add(digest, len(data))
+        path = self._blob_path(digest)
+
+        def write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                self._unlink(tmp)
+                raise
+
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            self._disk.remove(digest)
+            logger.warning(f"Failed to write document disk cache entry: {e}")
+
+    async def _disk_evict(self, incoming: int):
+        evicted = self._disk.evict_until_fits(incoming)
+        if not evicted:
+            return
+        self._stats["disk_evictions"] += len(evicted)
+        paths = [self._blob_path(d) for d in evicted]
+        await asyncio.to_thread(lambda: [self._unlink(p) for p in paths])
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+document_byte_cache = DocumentByteCache(
+    memory_max_bytes=settings.document_cache_memory_bytes,
+    disk_max_bytes=settings.document_cache_disk_bytes,
+    disk_dir=settings.document_cache_dir or None,
+)
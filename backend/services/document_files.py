@@ -0,0 +1,114 @@
+"""
+Database copy of uploaded files, the fallback when Supabase Storage has no object.
+
+Bytes live in the document_files table, keyed by document id, so selecting
+Documents rows never transfers them. They are stored through the core.codec
+binary envelope, compressed when that actually saves space. Rows not yet moved by the
+e6f7a8b9c0d1 migration still hold base64 in the deferred documents.file_data
+column; reads fall back to it.
+"""
+
+import asyncio
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_object_session
+
+from core.codec import decode_bytes, encode_large_bytes
+from core.config import settings
+from core.database import db_manager
+from models.document_files import Document_files
+from models.documents import Documents
+from services.document_cache import document_byte_cache
+from services.document_model import parsed_document_cache
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------ Service Layer ------------------
+class Document_filesService:
+    """Service layer for stored document bytes"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_bytes(self, document_id: int) -> Optional[bytes]:
+        try:
+            result = await self.db.execute(
+                select(Document_files.data).where(Document_files.document_id == document_id)
+            )
+            data = result.scalar_one_or_none()
+            if data is not None:
+                return await asyncio.to_thread(decode_bytes, data)
+
+            legacy = await self.db.execute(select(Documents.file_data).where(Documents.id == document_id))
+            encoded = legacy.scalar_one_or_none()
+            return base64.b64decode(encoded) if encoded else None
+        except Exception as e:
+            logger.error(f"Error fetching stored file for document {document_id}: {str(e)}")
+            raise
+
+    async def exists(self, document_id: int) -> bool:
+        """Whether a database copy exists, without reading it"""
+        try:
+            result = await self.db.execute(
+                select(Document_files.document_id).where(Document_files.document_id == document_id)
+            )
+            if result.scalar_one_or_none() is not None:
+                return True
+            legacy = await self.db.execute(
+                select(Documents.id).where(Documents.id == document_id, Documents.file_data.isnot(None))
+            )
+            return legacy.scalar_one_or_none() is not None
+        except Exception as e:
+            logger.error(f"Error checking stored file for document {document_id}: {str(e)}")
+            raise
+
+    async def put(self, document_id: int, data: bytes) -> None:
+        """Store (or replace) the bytes for a document (at most `max_upload_bytes`)"""
+        if len(data) > settings.max_upload_bytes:
+            raise ValueError(
+                f"File for document {document_id} is {len(data)} bytes; the limit is {settings.max_upload_bytes}"
+            )
+        try:
+            encoded = await asyncio.to_thread(encode_large_bytes, data)
+            await self.db.execute(delete(Document_files).where(Document_files.document_id == document_id))
+            self.db.add(Document_files(
+                document_id=document_id,
+                data=encoded,
+                size=len(data),
+                created_at=datetime.now(timezone.utc),
+            ))
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error storing file for document {document_id}: {str(e)}")
+            raise
+
+    async def delete(self, document_id: int) -> None:
+        try:
+            await self.db.execute(delete(Document_files).where(Document_files.document_id == document_id))
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error deleting stored file for document {document_id}: {str(e)}")
+            raise
+        await forget_cached_file(document_id)
+
+
+async def forget_cached_file(document_id: int) -> None:
+    """Drop a deleted or replaced file from this process's byte cache and parsed-document cache."""
+    for digest in await document_byte_cache.invalidate_document(document_id):
+        parsed_document_cache.discard(digest)
+
+
+async def read_document_file(document) -> Optional[bytes]:
+    """Stored bytes for a loaded Documents row, on the session it came from (or a fresh one)."""
+    db = async_object_session(document)
+    if db is not None:
+        return await Document_filesService(db).get_bytes(document.id)
+    async with db_manager.async_session_maker() as db:
+        return await Document_filesService(db).get_bytes(document.id)
@@ -0,0 +1,98 @@
+"""
+Page layout metadata on Documents (page_count, file_type, page_dims).
+
+Recorded at ingest from the parsed document model, so /doc-page-count can
+answer from the database. Rows created before these columns existed are
+filled by the batched backfill:
+
+    python -m services.document_layout --batch-size 50
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+
+from core.database import db_manager
+from models.documents import Documents
+from services import document_tasks
+from services.document_model import document_layout_fields
+
+logger = logging.getLogger(__name__)
+
+
+async def layout_from_bytes(file_bytes: bytes, file_name: str) -> Dict[str, Any]:
+    """Layout columns for a file (parse runs in the CPU pool, usually a cache hit)."""
+    parsed = await document_tasks.parse_document(file_bytes, file_name)
+    return document_layout_fields(parsed)
+
+
+async def backfill_document_layout(batch_size: int = 50, limit: Optional[int] = None) -> Dict[str, int]:
+    """Fill layout columns for documents that have none, in id order.
+
+    Each batch gets its own session and commit, and progress is keyed on the
+    last id seen, so the job can be stopped and rerun at any point. A document
+    whose file cannot be fetched or parsed is skipped and stays NULL.
+    """
+    from services.analysis_pipeline import fetch_document_bytes
+
+    stats = {"scanned": 0, "updated": 0, "skipped": 0}
+    last_id = 0
+    while limit is None or stats["scanned"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats["scanned"])
+        async with db_manager.async_session_maker() as db:
+            result = await db.execute(
+                select(Documents)
+                .where(Documents.page_count.is_(None), Documents.id > last_id)
+                .order_by(Documents.id)
+                .limit(size)
+            )
+            documents = result.scalars().all()
+            if not documents:
+                break
+
+            for document in documents:
+                last_id = document.id
+                stats["scanned"] += 1
+                file_bytes = await fetch_document_bytes(document, "[layout-backfill]")
+                if not file_bytes:
+                    stats["skipped"] += 1
+                    continue
+                try:
+                    fields = await layout_from_bytes(file_bytes, document.file_name)
+                except Exception as e:
+                    logger.warning(f"[layout-backfill] Could not parse document {document.id}: {e}")
+                    stats["skipped"] += 1
+                    continue
+                for key, value in fields.items():
+                    setattr(document, key, value)
+                stats["updated"] += 1
+
+            await db.commit()
+        logger.info(f"[layout-backfill] up to id {last_id}: {stats}")
+
+    return stats
+
+
+async def _run_backfill(batch_size: int, limit: Optional[int]):
+    from core.http_client import close_http_clients
+    from services.database import close_database, initialize_database
+
+    await initialize_database()
+    try:
+        stats = await backfill_document_layout(batch_size, limit)
+        logger.info(f"[layout-backfill] done: {stats}")
+    finally:
+        await close_http_clients()
+        await close_database()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Backfill page_count/file_type/page_dims on documents")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(_run_backfill(args.batch_size, args.limit))
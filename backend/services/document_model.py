@@ -0,0 +1,272 @@
+"""
+Parsed document model shared by the page viewer, page counts and source maps.
+
+A document is parsed once into its page texts and the positioned text the SVG
+viewer draws (services/text_layout.py). PDF pages keep their own size and the
+lines and coordinates of their text; Word paragraphs are wrapped at 85 chars,
+42 lines per US Letter page. Results are cached by content hash, so paging
+through a document or rebuilding its source map never parses it again.
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.text_layout import PageLayout, pdf_page_layouts, text_page_layout
+
+logger = logging.getLogger(__name__)
+
+# Synthetic page geometry, for Word files and pages without positioned text
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+PAGE_MARGIN = 54
+FONT_SIZE = 11
+LINE_HEIGHT = 16
+LINES_PER_PAGE = int((PAGE_HEIGHT - PAGE_MARGIN * 2) / LINE_HEIGHT)  # 42
+
+PDF_WRAP_WIDTH = 90
+DOCX_WRAP_WIDTH = 85
+
+# Bumped whenever the coordinates of stored source maps change meaning; maps
+# stored under another version are rebuilt from the file (expand_pages_meta).
+# 2: real page sizes and text positions (1: wrapped lines on a 612x792 frame)
+LAYOUT_VERSION = 2
+
+
+def document_file_type(file_name: str) -> str:
+    return "docx" if (file_name or "").lower().endswith((".docx", ".doc")) else "pdf"
+
+
+def wrap_paragraph(paragraph: str, width: int) -> List[str]:
+    """Greedy word wrap used by both the viewer and the source map."""
+    lines = []
+    line = ""
+    for word in paragraph.split():
+        test = f"{line} {word}".strip()
+        if len(test) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = test
+    if line:
+        lines.append(line)
+    return lines
+
+
+def wrap_page_text(text: str, width: int = PDF_WRAP_WIDTH) -> List[str]:
+    lines = []
+    for paragraph in text.split("\n"):
+        if not paragraph.strip():
+            lines.append("")
+            continue
+        lines.extend(wrap_paragraph(paragraph, width))
+    return lines
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    file_type: str                          # "pdf" or "docx"
+    content_hash: str
+    page_texts: Tuple[str, ...]             # raw extracted text per page
+    pages: Tuple[Tuple[str, ...], ...]      # text lines per viewer page
+    page_sizes: Tuple[Tuple[float, float], ...] = ()  # real (width, height) in points per page
+    layouts: Tuple[PageLayout, ...] = ()    # positioned lines per page, parallel to `pages`
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_lines(self, page_num: int) -> Tuple[str, ...]:
+        if page_num < 0 or page_num >= len(self.pages):
+            raise ValueError(f"Page {page_num} does not exist (total pages: {len(self.pages)})")
+        return self.pages[page_num]
+
+    def page_layout(self, page_num: int) -> PageLayout:
+        self.page_lines(page_num)  # range check
+        return self.layouts[page_num]
+
+
+def synthetic_layout(lines, width: float = PAGE_WIDTH, height: float = PAGE_HEIGHT) -> PageLayout:
+    """Layout of text without positions: one line every LINE_HEIGHT points from the margin."""
+    return text_page_layout(lines, width, height, PAGE_MARGIN, LINE_HEIGHT, FONT_SIZE)
+
+
+def parse_document(file_bytes: bytes, file_name: str, content_hash: Optional[str] = None) -> ParsedDocument:
+    """Parse PDF/Word bytes into page texts and viewer layout (CPU-bound)."""
+    content_hash = content_hash or hashlib.sha256(file_bytes).hexdigest()
+    file_type = document_file_type(file_name)
+
+    if file_type == "docx":
+        from services.document_extractor import _extract_docx_text
+
+        all_lines: List[str] = []
+        for para in _extract_docx_text(file_bytes):
+            if not para.strip():
+                all_lines.append("")
+                continue
+            all_lines.extend(wrap_paragraph(para, DOCX_WRAP_WIDTH))
+            all_lines.append("")  # blank line between paragraphs
+        pages = tuple(
+            tuple(all_lines[i:i + LINES_PER_PAGE])
+            for i in range(0, len(all_lines), LINES_PER_PAGE)
+        )
+        page_texts = tuple("\n".join(p) for p in pages)
+        # Word has no fixed pages; the viewer lays text out on US Letter
+        page_sizes = tuple((float(PAGE_WIDTH), float(PAGE_HEIGHT)) for _ in pages)
+        layouts = tuple(synthetic_layout(p) for p in pages)
+    else:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(file_bytes))
+        page_sizes = tuple(_pdf_page_size(page) for page in reader.pages)
+        layouts, page_texts = pdf_page_layouts(file_bytes, page_sizes, reader.pages)
+        # Text the layout pass could not place still gets wrapped lines on the page
+        layouts = tuple(
+            layout if layout.line_count or not text.strip()
+            else synthetic_layout(wrap_page_text(text, PDF_WRAP_WIDTH), *size)
+            for layout, text, size in zip(layouts, page_texts, page_sizes)
+        )
+        pages = tuple(layout.lines() for layout in layouts)
+
+    return ParsedDocument(
+        file_type=file_type,
+        content_hash=content_hash,
+        page_texts=page_texts,
+        pages=pages,
+        page_sizes=page_sizes,
+        layouts=layouts,
+    )
+
+
+def _pdf_page_size(page) -> Tuple[float, float]:
+    """Displayed page size in points (mediabox, swapped for 90/270 degree rotation)."""
+    box = page.mediabox
+    width, height = round(float(box.width), 1), round(float(box.height), 1)
+    if int(page.get("/Rotate", 0) or 0) % 180 == 90:
+        width, height = height, width
+    return width, height
+
+
+# ---------- compact page dimension encoding ----------
+# Run-length encoded "WxH" tokens: "612x792*18,792x612*2". A uniform 200-page
+# lease stores 11 characters instead of a 200-element JSON list.
+
+def encode_page_dims(page_sizes) -> str:
+    runs: List[List[Any]] = []
+    for width, height in page_sizes:
+        token = f"{width:g}x{height:g}"
+        if runs and runs[-1][0] == token:
+            runs[-1][1] += 1
+        else:
+            runs.append([token, 1])
+    return ",".join(token if count == 1 else f"{token}*{count}" for token, count in runs)
+
+
+def decode_page_dims(encoded: Optional[str]) -> List[Tuple[float, float]]:
+    sizes: List[Tuple[float, float]] = []
+    for run in (encoded or "").split(","):
+        if not run:
+            continue
+        token, _, count = run.partition("*")
+        width, _, height = token.partition("x")
+        sizes.extend([(float(width), float(height))] * int(count or 1))
+    return sizes
+
+
+def viewer_pages_meta(page_count: int) -> List[Dict[str, Any]]:
+    """pages_meta as the frontend expects it: the SVG frame that bbox coordinates live in."""
+    return [{"page": i, "width": PAGE_WIDTH, "height": PAGE_HEIGHT} for i in range(page_count)]
+
+
+def layout_pages_meta(layouts) -> List[Dict[str, Any]]:
+    """pages_meta of laid-out pages: each page's own size."""
+    return [{"page": i, "width": layout.width, "height": layout.height} for i, layout in enumerate(layouts)]
+
+
+def compact_pages_meta(pages_meta: Optional[list]) -> Any:
+    """Storage form of pages_meta: run-length page sizes tagged with LAYOUT_VERSION."""
+    pages_meta = pages_meta or []
+    return {
+        "page_dims": encode_page_dims((p.get("width"), p.get("height")) for p in pages_meta),
+        "layout": LAYOUT_VERSION,
+    }
+
+
+def expand_pages_meta(stored: Any) -> List[Dict[str, Any]]:
+    """Inverse of compact_pages_meta; also reads {"page_count": n} and the full list of older rows."""
+    if isinstance(stored, dict):
+        if "page_dims" in stored:
+            return [
+                {"page": i, "width": width, "height": height}
+                for i, (width, height) in enumerate(decode_page_dims(stored["page_dims"]))
+            ]
+        return viewer_pages_meta(int(stored.get("page_count") or 0))
+    return stored if isinstance(stored, list) else []
+
+
+def pages_meta_current(stored: Any) -> bool:
+    """Whether a stored pages_meta (and the source map stored with it) uses LAYOUT_VERSION coordinates."""
+    return isinstance(stored, dict) and stored.get("layout") == LAYOUT_VERSION
+
+
+def document_layout_fields(parsed: ParsedDocument) -> Dict[str, Any]:
+    """Documents columns recorded at ingest."""
+    return {
+        "page_count": max(1, parsed.page_count),
+        "file_type": parsed.file_type,
+        "page_dims": encode_page_dims(parsed.page_sizes),
+    }
+
+
+class ParsedDocumentCache:
+    """Thread-safe LRU of ParsedDocument keyed by (content hash, file type).
+
+    Used from the event loop (viewer) and from worker threads (source map
+    build during analysis), hence the lock.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], ParsedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash: str, file_type: str) -> Optional[ParsedDocument]:
+        with self._lock:
+            parsed = self._entries.get((content_hash, file_type))
+            if parsed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((content_hash, file_type))
+            self.hits += 1
+            return parsed
+
+    def put(self, parsed: ParsedDocument):
+        with self._lock:
+            key = (parsed.content_hash, parsed.file_type)
+            self._entries[key] = parsed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, content_hash: str):
+        """Drop the parses of a file, of any type."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == content_hash]:
+                del self._entries[key]
+
+    def get_or_parse(self, file_bytes: bytes, file_name: str, content_hash: Optional[str] = None) -> ParsedDocument:
+        content_hash = content_hash or hashlib.sha256(file_bytes).hexdigest()
+        parsed = self.get(content_hash, document_file_type(file_name))
+        if parsed is None:
+            parsed = parse_document(file_bytes, file_name, content_hash)
+            self.put(parsed)
+        return parsed
+
+
+parsed_document_cache = ParsedDocumentCache()
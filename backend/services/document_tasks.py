@@ -0,0 +1,89 @@
+"""
+CPU-bound document work, run in the CPU pool (services/cpu_pool.py).
+
+Each task is an async function for the event loop side and a module-level
+function of the same name with a leading underscore that runs in a worker.
+Arguments and results cross the process boundary pickled. The parsed-document
+cache lives in the web process, so a document is parsed in a worker once
+and then served from that cache.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.cpu_pool import cpu_pool
+from services.document_model import (
+    ParsedDocument,
+    document_file_type,
+    parse_document as _parse_document_sync,
+    parsed_document_cache,
+)
+from services.pdf_report import PDFReportGenerator
+from services.text_layout import PageLayout
+
+
+def _parse_document(file_bytes: bytes, file_name: str, content_hash: str) -> ParsedDocument:
+    return _parse_document_sync(file_bytes, file_name, content_hash)
+
+
+def _docx_paragraphs(file_bytes: bytes) -> List[str]:
+    from services.document_extractor import _extract_docx_text
+
+    return _extract_docx_text(file_bytes)
+
+
+def _source_map(layouts: Sequence[PageLayout], extracted_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    from services.gemini_extractor import GeminiExtractor
+
+    extractor = GeminiExtractor.__new__(GeminiExtractor)
+    return extractor._build_source_map_from_layouts(list(layouts), extracted_data)
+
+
+def _pdf_report(
+    extraction: Dict[str, Any],
+    risk_flags: Optional[List[Dict[str, Any]]],
+    compliance_data: Optional[Dict[str, Any]],
+    benchmark_data: Optional[Dict[str, Any]],
+    executive_summary: Optional[Dict[str, Any]],
+) -> Optional[bytes]:
+    return PDFReportGenerator().generate(
+        extraction=extraction,
+        risk_flags=risk_flags,
+        compliance_data=compliance_data,
+        benchmark_data=benchmark_data,
+        executive_summary=executive_summary,
+    )
+
+
+async def parse_document(file_bytes: bytes, file_name: str, content_hash: Optional[str] = None) -> ParsedDocument:
+    """parsed_document_cache.get_or_parse, with the parse in a worker process."""
+    if content_hash is None:
+        # hashlib releases the GIL on large buffers
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(file_bytes).hexdigest())
+    parsed = parsed_document_cache.get(content_hash, document_file_type(file_name))
+    if parsed is None:
+        parsed = await cpu_pool.run(_parse_document, file_bytes, file_name, content_hash)
+        parsed_document_cache.put(parsed)
+    return parsed
+
+
+async def docx_paragraphs(file_bytes: bytes) -> List[str]:
+    """Paragraph texts of a Word file (services.document_extractor._extract_docx_text)."""
+    return await cpu_pool.run(_docx_paragraphs, file_bytes)
+
+
+async def build_source_map(layouts: Sequence[PageLayout], extracted_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """(source_map, pages_meta) of extracted values on laid-out pages."""
+    return await cpu_pool.run(_source_map, tuple(layouts), extracted_data)
+
+
+async def pdf_report(
+    extraction: Dict[str, Any],
+    risk_flags: Optional[List[Dict[str, Any]]] = None,
+    compliance_data: Optional[Dict[str, Any]] = None,
+    benchmark_data: Optional[Dict[str, Any]] = None,
+    executive_summary: Optional[Dict[str, Any]] = None,
+) -> Optional[bytes]:
+    """PDFReportGenerator().generate(...): the report PDF, or None without reportlab."""
+    return await cpu_pool.run(_pdf_report, extraction, risk_flags, compliance_data, benchmark_data, executive_summary)
@@ -1,10 +1,13 @@
 import logging
 from typing import Optional, Dict, Any, List
 
-from sqlalchemy import select, func
+from sqlalchemy import delete, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from models.document_files import Document_files
 from models.documents import Documents
+from services.document_files import forget_cached_file
+from utils.pagination import count_key, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +63,14 @@ class DocumentsService:
         user_id: Optional[str] = None,
         query_dict: Optional[Dict[str, Any]] = None,
         sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         """Get paginated list of documentss (user can only see their own records)"""
         try:
-            query = select(Documents)
+            # With `fields`, select only those columns; rows come back as dicts
+            query = select(*[getattr(Documents, f) for f in fields]) if fields else select(Documents)
             count_query = select(func.count(Documents.id))
             
             if user_id:
@@ -76,8 +83,19 @@ class DocumentsService:
                         query = query.where(getattr(Documents, field) == value)
                         count_query = count_query.where(getattr(Documents, field) == value)
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            if cursor is not None:
+                # Keyset mode: fixed newest-first order, skip and sort do not apply
+                return await keyset_page(
+                    self.db, Documents, query, count_query, cursor, limit,
+                    include_total=include_total,
+                    total_key=count_key(Documents, user_id, query_dict),
+                    as_dicts=bool(fields),
+                )
+
+            total = None
+            if include_total:
+                count_result = await self.db.execute(count_query)
+                total = count_result.scalar()
 
             if sort:
                 if sort.startswith('-'):
@@ -91,7 +109,7 @@ class DocumentsService:
                 query = query.order_by(Documents.id.desc())
 
             result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
+            items = [dict(row) for row in result.mappings().all()] if fields else result.scalars().all()
 
             return {
                 "items": items,
@@ -110,12 +128,15 @@ class DocumentsService:
             if not obj:
                 logger.warning(f"Documents {obj_id} not found for update")
                 return None
+            file_replaced = "file_key" in update_data and update_data["file_key"] != obj.file_key
             for key, value in update_data.items():
                 if hasattr(obj, key) and key != 'user_id':
                     setattr(obj, key, value)
 
             await self.db.commit()
             await self.db.refresh(obj)
+            if file_replaced:
+                await forget_cached_file(obj_id)
             logger.info(f"Updated documents {obj_id}")
             return obj
         except Exception as e:
@@ -130,8 +151,10 @@ class DocumentsService:
             if not obj:
                 logger.warning(f"Documents {obj_id} not found for deletion")
                 return False
+            await self.db.execute(delete(Document_files).where(Document_files.document_id == obj_id))
             await self.db.delete(obj)
             await self.db.commit()
+            await forget_cached_file(obj_id)
             logger.info(f"Deleted documents {obj_id}")
             return True
         except Exception as e:
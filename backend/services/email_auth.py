@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import jwt
@@ -6,13 +7,13 @@ import string
 import hashlib
 import secrets
 import uuid
-import httpx
 import bcrypt
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple, Dict, Any
 
 from core.auth import create_access_token
 from core.config import settings
+from core.http_client import get_http_client
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.auth import User
@@ -80,27 +81,27 @@ def generate_verification_code() -> str:
 async def send_email_via_resend(to_email: str, subject: str, html_content: str) -> bool:
     """Send email using Resend API."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                RESEND_API_URL,
-                headers={
-                    "Authorization": f"Bearer {RESEND_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "from": f"{BRAND_NAME} <{FROM_EMAIL}>",
-                    "to": [to_email],
-                    "subject": subject,
-                    "html": html_content
-                },
-                timeout=30.0
-            )
-            if response.status_code == 200:
-                logger.info(f"[Resend] Email sent successfully to {to_email}")
-                return True
-            else:
-                logger.error(f"[Resend] Failed to send email: {response.status_code} - {response.text}")
-                return False
+        client = get_http_client("api")
+        response = await client.post(
+            RESEND_API_URL,
+            headers={
+                "Authorization": f"Bearer {RESEND_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "from": f"{BRAND_NAME} <{FROM_EMAIL}>",
+                "to": [to_email],
+                "subject": subject,
+                "html": html_content
+            },
+            timeout=30.0
+        )
+        if response.status_code == 200:
+            logger.info(f"[Resend] Email sent successfully to {to_email}")
+            return True
+        else:
+            logger.error(f"[Resend] Failed to send email: {response.status_code} - {response.text}")
+            return False
     except Exception as e:
         logger.error(f"[Resend] Error sending email: {str(e)}")
         return False
@@ -266,7 +267,8 @@ class EmailAuthService:
         
         # Create new user in database
         user_id = str(uuid.uuid4())
-        hashed_password = hash_password(password)
+        # bcrypt takes a few hundred ms of CPU but releases the GIL; keep it off the event loop
+        hashed_password = await asyncio.to_thread(hash_password, password)
         
         new_user = User(
             id=user_id,
@@ -317,7 +319,7 @@ class EmailAuthService:
             return False, "No account found with this email address."
 
         # Update password
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await asyncio.to_thread(hash_password, new_password)
         await self.db.commit()
 
         # Remove verified email tracking
@@ -343,12 +345,12 @@ class EmailAuthService:
             return False, "Invalid email or password.", None
         
         # Check password
-        if not verify_password(password, user.password_hash):
+        if not await asyncio.to_thread(verify_password, password, user.password_hash):
             return False, "Invalid email or password.", None
         
         # Auto-migrate legacy SHA-256 hash to bcrypt
         if not user.password_hash.startswith("$2b$"):
-            user.password_hash = hash_password(password)
+            user.password_hash = await asyncio.to_thread(hash_password, password)
         
         # Update last login
         user.last_login = datetime.now(timezone.utc)
@@ -0,0 +1,86 @@
+"""
+Columns derived from an extraction, stored on the row so that list and
+portfolio queries can filter, sort and count in SQL instead of parsing JSON
+per row.
+
+lease_start_on / lease_end_on are the extracted lease dates as real dates.
+They are NULL when the extracted text is not a recognisable date; the text
+itself stays in lease_start_date / lease_end_date. The counters summarise
+risk_flags and the compliance checks. state_code is the state resolved from
+property_address, the one whose regulations the compliance checks use.
+"""
+
+import ast
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+# Gemini is asked for YYYY-MM-DD; the others cover older and hand-edited rows
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%B %d, %Y", "%b %d, %Y")
+
+# Writes touching any of these refresh the derived columns
+DERIVED_FROM = ("lease_start_date", "lease_end_date", "risk_flags", "compliance_data")
+
+# JSON document columns; API clients may still send them as serialized strings
+JSON_FIELDS = ("risk_flags", "audit_checklist", "compliance_data", "raw_extraction", "source_map", "pages_meta")
+
+
+def parse_lease_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def load_json_value(value: Any) -> Any:
+    """Parsed form of a JSON column value that may still be text.
+
+    Handles rows written before the columns were JSON-typed, including
+    double-encoded JSON and Python reprs. Unparseable text is returned as is.
+    """
+    for _ in range(2):
+        if not isinstance(value, str):
+            return value
+        try:
+            value = json.loads(value)
+        except ValueError:
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                return value
+    return value
+
+
+def normalize_json_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: load_json_value(value) if key in JSON_FIELDS else value for key, value in data.items()}
+
+
+def count_violations(compliance_data: Any) -> int:
+    compliance = load_json_value(compliance_data)
+    checks = (compliance.get("compliance_checks") or []) if isinstance(compliance, dict) else []
+    return sum(1 for c in checks if isinstance(c, dict) and c.get("status") == "violation")
+
+
+def derived_extraction_fields(
+    lease_start_date: Any,
+    lease_end_date: Any,
+    risk_flags: Any,
+    compliance_data: Any,
+) -> Dict[str, Any]:
+    flags = load_json_value(risk_flags)
+    flags = [f for f in flags if isinstance(f, dict)] if isinstance(flags, list) else []
+    return {
+        "lease_start_on": parse_lease_date(lease_start_date),
+        "lease_end_on": parse_lease_date(lease_end_date),
+        "risk_count": len(flags),
+        "high_risk_count": sum(1 for f in flags if str(f.get("severity", "")).lower() == "high"),
+        "violation_count": count_violations(compliance_data),
+    }
@@ -5,6 +5,10 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.extractions import Extractions
+from services.address_state import state_from_address
+from services.extraction_fields import DERIVED_FROM, derived_extraction_fields, normalize_json_fields
+from services.portfolio_summaries import Portfolio_summariesService, portfolio_values
+from utils.pagination import count_key, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +25,12 @@ class ExtractionsService:
         try:
             if user_id:
                 data['user_id'] = user_id
-            obj = Extractions(**data)
+            data = normalize_json_fields(data)
+            derived = derived_extraction_fields(*(data.get(key) for key in DERIVED_FROM))
+            derived["state_code"] = state_from_address(data.get("property_address"))
+            obj = Extractions(**{**derived, **data})
             self.db.add(obj)
+            await Portfolio_summariesService(self.db).apply_change(obj.user_id, None, portfolio_values(obj))
             await self.db.commit()
             await self.db.refresh(obj)
             logger.info(f"Created extractions with id: {obj.id}")
@@ -60,10 +68,14 @@ class ExtractionsService:
         user_id: Optional[str] = None,
         query_dict: Optional[Dict[str, Any]] = None,
         sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         """Get paginated list of extractionss (user can only see their own records)"""
         try:
-            query = select(Extractions)
+            # With `fields`, select only those columns; rows come back as dicts
+            query = select(*[getattr(Extractions, f) for f in fields]) if fields else select(Extractions)
             count_query = select(func.count(Extractions.id))
             
             if user_id:
@@ -76,8 +88,19 @@ class ExtractionsService:
                         query = query.where(getattr(Extractions, field) == value)
                         count_query = count_query.where(getattr(Extractions, field) == value)
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            if cursor is not None:
+                # Keyset mode: fixed newest-first order, skip and sort do not apply
+                return await keyset_page(
+                    self.db, Extractions, query, count_query, cursor, limit,
+                    include_total=include_total,
+                    total_key=count_key(Extractions, user_id, query_dict),
+                    as_dicts=bool(fields),
+                )
+
+            total = None
+            if include_total:
+                count_result = await self.db.execute(count_query)
+                total = count_result.scalar()
 
             if sort:
                 if sort.startswith('-'):
@@ -91,7 +114,7 @@ class ExtractionsService:
                 query = query.order_by(Extractions.id.desc())
 
             result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
+            items = [dict(row) for row in result.mappings().all()] if fields else result.scalars().all()
 
             return {
                 "items": items,
@@ -110,9 +133,17 @@ class ExtractionsService:
             if not obj:
                 logger.warning(f"Extractions {obj_id} not found for update")
                 return None
-            for key, value in update_data.items():
+            before = portfolio_values(obj)
+            for key, value in normalize_json_fields(update_data).items():
                 if hasattr(obj, key) and key != 'user_id':
                     setattr(obj, key, value)
+            if any(key in update_data for key in DERIVED_FROM):
+                derived = derived_extraction_fields(*(getattr(obj, key) for key in DERIVED_FROM))
+                for key, value in derived.items():
+                    setattr(obj, key, value)
+            if "property_address" in update_data:
+                obj.state_code = state_from_address(obj.property_address)
+            await Portfolio_summariesService(self.db).apply_change(obj.user_id, before, portfolio_values(obj))
 
             await self.db.commit()
             await self.db.refresh(obj)
@@ -131,6 +162,7 @@ class ExtractionsService:
                 logger.warning(f"Extractions {obj_id} not found for deletion")
                 return False
             await self.db.delete(obj)
+            await Portfolio_summariesService(self.db).apply_change(obj.user_id, portfolio_values(obj), None)
             await self.db.commit()
             logger.info(f"Deleted extractions {obj_id}")
             return True
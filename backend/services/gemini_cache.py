@@ -0,0 +1,204 @@
+"""
+Content-addressed cache of Gemini extraction results.
+
+Key = sha256(file bytes) + model name + PROMPT_VERSION (hash of EXTRACTION_PROMPT),
+so re-uploads of the same lease skip the model call entirely, and a prompt or
+model change naturally misses. Rows expire after a TTL and the least recently
+read rows are evicted once the table exceeds `gemini_cache_max_entries`.
+
+The source map does not depend on the model, only on the page layout. A hit on
+a row stored under an older LAYOUT_VERSION rebuilds its source map from the
+file and the cached extraction, and updates the row.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.gemini_result_cache import Gemini_result_cache
+from services.document_model import compact_pages_meta, expand_pages_meta, pages_meta_current
+from services.gemini_extractor import GEMINI_MODEL, PROMPT_VERSION, GeminiExtractor
+
+logger = logging.getLogger(__name__)
+
+# Process-local counters, exposed via the admin stats endpoint
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
+
+def file_sha256(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def build_cache_key(file_hash: str, file_name: str) -> str:
+    """Word files go through text extraction, PDFs are sent natively; keep them apart."""
+    kind = "docx" if (file_name or "").lower().endswith((".docx", ".doc")) else "pdf"
+    return f"{file_hash}:{kind}:{GEMINI_MODEL}:{PROMPT_VERSION}"
+
+
+# ------------------ Service Layer ------------------
+class GeminiResultCacheService:
+    """Service layer for the Gemini result cache"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, file_bytes: bytes, file_name: str) -> Optional[Dict[str, Any]]:
+        """Return a cached analyze_pdf() result, or None on miss"""
+        if not settings.gemini_cache_enabled:
+            return None
+        cache_key = build_cache_key(file_sha256(file_bytes), file_name)
+        try:
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                select(Gemini_result_cache).where(
+                    Gemini_result_cache.cache_key == cache_key,
+                    Gemini_result_cache.expires_at > now,
+                )
+            )
+            row = result.scalar_one_or_none()
+            if not row:
+                _stats["misses"] += 1
+                return None
+
+            extracted_data = json.loads(row.extracted_data)
+            stored_pages_meta = json.loads(row.pages_meta) if row.pages_meta else None
+            values = {"hit_count": Gemini_result_cache.hit_count + 1, "last_accessed_at": now}
+            if pages_meta_current(stored_pages_meta):
+                pages_meta = expand_pages_meta(stored_pages_meta)
+                source_map = json.loads(row.source_map) if row.source_map else {}
+            else:
+                extractor = GeminiExtractor.__new__(GeminiExtractor)
+                source_map, pages_meta = await extractor.source_map_for_file(file_bytes, file_name, extracted_data)
+                values.update(
+                    source_map=json.dumps(source_map),
+                    pages_meta=json.dumps(compact_pages_meta(pages_meta)),
+                    page_count=len(pages_meta),
+                )
+                logger.info(f"Rebuilt source map of cached result {cache_key[:12]}… on the current page layout")
+
+            await self.db.execute(
+                update(Gemini_result_cache)
+                .where(Gemini_result_cache.id == row.id)
+                .values(**values)
+            )
+            await self.db.commit()
+            _stats["hits"] += 1
+            logger.info(f"Gemini cache hit for {cache_key[:12]}… ({len(pages_meta)} pages)")
+            return {
+                "extracted_data": extracted_data,
+                "full_text": row.full_text or "",
+                "source_blocks": [],
+                "pages_meta": pages_meta,
+                "source_map": source_map,
+            }
+        except Exception as e:
+            # A broken cache must never fail an analysis
+            await self.db.rollback()
+            _stats["misses"] += 1
+            logger.warning(f"Gemini cache lookup failed: {e}")
+            return None
+
+    async def put(self, file_bytes: bytes, file_name: str, analysis_result: Dict[str, Any]) -> None:
+        """Store an analyze_pdf() result; concurrent inserts of the same key are ignored"""
+        if not settings.gemini_cache_enabled:
+            return
+        file_hash = file_sha256(file_bytes)
+        now = datetime.now(timezone.utc)
+        pages_meta = analysis_result.get("pages_meta") or []
+        row = Gemini_result_cache(
+            cache_key=build_cache_key(file_hash, file_name),
+            file_sha256=file_hash,
+            model=GEMINI_MODEL,
+            prompt_version=PROMPT_VERSION,
+            extracted_data=json.dumps(analysis_result["extracted_data"]),
+            source_map=json.dumps(analysis_result.get("source_map") or {}),
+            pages_meta=json.dumps(compact_pages_meta(pages_meta)),
+            page_count=len(pages_meta),
+            full_text=analysis_result.get("full_text") or "",
+            hit_count=0,
+            created_at=now,
+            last_accessed_at=now,
+            expires_at=now + timedelta(seconds=settings.gemini_cache_ttl_seconds),
+        )
+        try:
+            # Savepoint: a duplicate key must not expire objects the caller still holds
+            async with self.db.begin_nested():
+                self.db.add(row)
+            await self.db.commit()
+            _stats["stores"] += 1
+        except IntegrityError:
+            await self.db.commit()
+            logger.debug("Gemini cache entry already stored by a concurrent request")
+            return
+        except Exception as e:
+            await self.db.rollback()
+            logger.warning(f"Failed to store Gemini cache entry: {e}")
+            return
+
+        await self.evict()
+
+    async def evict(self) -> int:
+        """Delete expired rows, then the least recently used rows above the size cap"""
+        try:
+            now = datetime.now(timezone.utc)
+            expired = await self.db.execute(
+                delete(Gemini_result_cache).where(Gemini_result_cache.expires_at <= now)
+            )
+            removed = expired.rowcount or 0
+
+            total = (await self.db.execute(select(func.count(Gemini_result_cache.id)))).scalar() or 0
+            overflow = total - settings.gemini_cache_max_entries
+            if overflow > 0:
+                oldest = (
+                    select(Gemini_result_cache.id)
+                    .order_by(Gemini_result_cache.last_accessed_at.asc())
+                    .limit(overflow)
+                )
+                lru = await self.db.execute(
+                    delete(Gemini_result_cache).where(Gemini_result_cache.id.in_(oldest))
+                )
+                removed += lru.rowcount or 0
+
+            await self.db.commit()
+            if removed:
+                _stats["evictions"] += removed
+                logger.info(f"Evicted {removed} Gemini cache entries")
+            return removed
+        except Exception as e:
+            await self.db.rollback()
+            logger.warning(f"Gemini cache eviction failed: {e}")
+            return 0
+
+    async def purge(self, file_hash: Optional[str] = None) -> int:
+        """Delete all entries, or only those for one file hash"""
+        try:
+            stmt = delete(Gemini_result_cache)
+            if file_hash:
+                stmt = stmt.where(Gemini_result_cache.file_sha256 == file_hash)
+            result = await self.db.execute(stmt)
+            await self.db.commit()
+            logger.info(f"Purged {result.rowcount} Gemini cache entries")
+            return result.rowcount or 0
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error purging Gemini cache: {str(e)}")
+            raise
+
+    async def count(self) -> int:
+        result = await self.db.execute(select(func.count(Gemini_result_cache.id)))
+        return result.scalar() or 0
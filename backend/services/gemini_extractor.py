@@ -5,17 +5,43 @@ Uses Google Gemini API to directly analyze PDF files without needing local text
 Gemini can process PDF files natively, eliminating the need for PyMuPDF.
 """
 
+import asyncio
+import hashlib
 import logging
 import os
-import re
+import random
 import json
-import time
 from typing import Dict, Any, List, Optional
+
+import httpx
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
 
+from core.timing import StageTimer
+from services import document_tasks
+from services.document_model import (
+    LINE_HEIGHT,
+    PAGE_MARGIN,
+    PAGE_WIDTH,
+    layout_pages_meta,
+    synthetic_layout,
+)
+from services.source_map_index import PageLineIndex
+
 logger = logging.getLogger(__name__)
 
+GEMINI_MODEL = "gemini-3-flash-preview"
+
+# Retry policy for generate_content (full-jitter exponential backoff)
+GEMINI_MAX_RETRIES = 2
+GEMINI_BACKOFF_BASE = 1.0   # seconds
+GEMINI_BACKOFF_MAX = 16.0   # seconds
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Fields whose value is prose worth locating by rank when it is not on the page verbatim
+RANKED_FALLBACK_FIELDS = {"pet_policy", "late_fee_terms"}
+
 EXTRACTION_PROMPT = """You are an expert lease agreement analyzer specializing in U.S. residential leases.
 Analyze the following lease document thoroughly and extract all key information.
 
@@ -117,6 +143,9 @@ Return your response as:
 }
 """
 
+# Changes to the prompt invalidate cached results (see services/gemini_cache.py)
+PROMPT_VERSION = hashlib.sha256(EXTRACTION_PROMPT.encode("utf-8")).hexdigest()[:16]
+
 
 class GeminiExtractor:
     """Extracts lease data from PDF files using Google Gemini API."""
@@ -130,17 +159,26 @@ class GeminiExtractor:
         self.client = genai.Client(api_key=api_key)
         logger.info("Gemini client initialized")
 
-    async def analyze_pdf(self, pdf_bytes: bytes, file_name: str) -> Dict[str, Any]:
+    async def analyze_pdf(self, pdf_bytes: bytes, file_name: str, timer: Optional[StageTimer] = None) -> Dict[str, Any]:
         """
         Analyze a PDF or Word file using Gemini API to extract lease information.
 
+        Page text for the source map does not depend on the model output, so it
+        is extracted in a worker thread while the Gemini call is in flight; only
+        the field matching waits for the response.
+
         Args:
             pdf_bytes: Raw file bytes (PDF or Word)
             file_name: Name of the file (used for MIME type detection)
+            timer: Optional StageTimer that receives per-stage timings
 
         Returns:
             Dictionary with extracted lease data and full text
         """
+        timer = timer or StageTimer("[gemini]")
+        page_layouts_task = asyncio.create_task(timer.timed(
+            "page_text", self._page_layouts(pdf_bytes, file_name)
+        ))
         try:
             file_name_lower = (file_name or "").lower()
             is_word = file_name_lower.endswith((".docx", ".doc"))
@@ -148,8 +186,8 @@ class GeminiExtractor:
             if is_word:
                 # Gemini doesn't support Word MIME types directly.
                 # Extract text from Word file and send as plain text.
-                from services.document_extractor import _extract_docx_text
-                paragraphs = _extract_docx_text(pdf_bytes)
+                with timer.stage("docx_text"):
+                    paragraphs = await document_tasks.docx_paragraphs(pdf_bytes)
                 doc_text = "\n\n".join(paragraphs)
                 if not doc_text.strip():
                     raise ValueError("Could not extract text from Word document")
@@ -167,33 +205,8 @@ class GeminiExtractor:
 
             text_part = types.Part.from_text(text=EXTRACTION_PROMPT)
 
-            # Generate content with retry logic (exponential backoff)
-            max_retries = 2
-            response = None
-            for attempt in range(max_retries + 1):
-                try:
-                    response = self.client.models.generate_content(
-                        model="gemini-3-flash-preview",
-                        contents=[
-                            types.Content(
-                                role="user",
-                                parts=[content_part, text_part]
-                            )
-                        ],
-                        config=types.GenerateContentConfig(
-                            max_output_tokens=8192,
-                            temperature=0.2,
-                        )
-                    )
-                    break  # Success, exit retry loop
-                except Exception as retry_err:
-                    if attempt < max_retries:
-                        wait_time = 2 ** attempt  # 1s, 2s
-                        logger.warning(f"Gemini API attempt {attempt + 1}/{max_retries + 1} failed: {retry_err}. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Gemini API failed after {max_retries + 1} attempts: {retry_err}")
-                        raise
+            with timer.stage("gemini"):
+                response = await self._generate_with_retry([content_part, text_part])
 
             # Parse the response
             response_text = response.text
@@ -274,14 +287,10 @@ class GeminiExtractor:
                 extracted_data["audit_checklist"] = self._generate_fallback_checklist(extracted_data)
 
             # Build source map and page info using actual file content
-            source_map, page_count = self._build_source_map_from_file(
-                pdf_bytes, file_name, extracted_data
-            )
-
-            pages_meta = [
-                {"page": i, "width": 612, "height": 792}
-                for i in range(page_count)
-            ]
+            # (page text was extracted concurrently; matching is CPU-bound too)
+            page_layouts = await page_layouts_task
+            with timer.stage("source_map"):
+                source_map, pages_meta = await document_tasks.build_source_map(page_layouts, extracted_data)
 
             logger.info(f"Successfully extracted data from PDF using Gemini ({len(extracted_data.get('risk_flags', []))} risks, {len(extracted_data.get('audit_checklist', []))} checklist items)")
             return {
@@ -293,9 +302,49 @@ class GeminiExtractor:
             }
 
         except Exception as e:
+            page_layouts_task.cancel()
             logger.error(f"Gemini PDF analysis error: {e}")
             raise ValueError(f"Failed to analyze PDF with Gemini: {e}")
 
+    async def _generate_with_retry(self, parts: list):
+        """Call Gemini through the SDK's async client, retrying transient failures.
+
+        Backoff is exponential with full jitter so that concurrent analyses hit
+        by the same 429/503 do not retry in lockstep.
+        """
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            try:
+                return await self.client.aio.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=[
+                        types.Content(
+                            role="user",
+                            parts=parts
+                        )
+                    ],
+                    config=types.GenerateContentConfig(
+                        max_output_tokens=8192,
+                        temperature=0.2,
+                    )
+                )
+            except Exception as err:
+                if attempt >= GEMINI_MAX_RETRIES or not self._is_retryable(err):
+                    logger.error(f"Gemini API failed after {attempt + 1} attempt(s): {err}")
+                    raise
+                wait_time = random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt))
+                logger.warning(
+                    f"Gemini API attempt {attempt + 1}/{GEMINI_MAX_RETRIES + 1} failed: {err}. "
+                    f"Retrying in {wait_time:.1f}s..."
+                )
+                await asyncio.sleep(wait_time)
+
+    @staticmethod
+    def _is_retryable(err: Exception) -> bool:
+        """Rate limits, server errors and transport failures are transient; bad requests are not."""
+        if isinstance(err, genai_errors.APIError):
+            return getattr(err, "code", None) in RETRYABLE_STATUS_CODES
+        return isinstance(err, (httpx.TransportError, asyncio.TimeoutError, ConnectionError))
+
     def _generate_fallback_checklist(self, extracted_data: dict) -> list:
         """Generate 12 standard audit checklist items based on extracted data fields.
         Used as fallback when Gemini does not return audit_checklist."""
@@ -514,85 +563,42 @@ class GeminiExtractor:
             pass
         return variants
 
-    def _build_source_map_from_file(self, file_bytes: bytes, file_name: str, extracted_data: dict) -> tuple:
-        """Build source_map with coordinates matching the SVG page rendering.
+    @staticmethod
+    async def _page_layouts(file_bytes: bytes, file_name: str) -> list:
+        """Positioned lines per page, from the same parsed model (and cache entry) the page
+        viewer renders from; the parse runs in the CPU pool."""
+        try:
+            parsed = await document_tasks.parse_document(file_bytes, file_name)
+            return list(parsed.layouts)
+        except Exception as e:
+            logger.warning(f"Failed to extract page text for source map: {e}")
+            # Fallback: single page with full_text
+            return [synthetic_layout(["(Could not extract page text)"])]
+
+    async def source_map_for_file(self, file_bytes: bytes, file_name: str, extracted_data: dict) -> tuple:
+        """Build source_map with coordinates matching the SVG page rendering; parse and
+        matching run in the CPU pool. Returns (source_map, pages_meta)."""
+        layouts = await self._page_layouts(file_bytes, file_name)
+        return await document_tasks.build_source_map(layouts, extracted_data)
+
+    def _build_source_map_from_layouts(self, layouts: list, extracted_data: dict) -> tuple:
+        """Returns (source_map, pages_meta) with bboxes on the pages' real coordinates."""
+        source_map, _ = self._build_source_map([list(layout.lines()) for layout in layouts], extracted_data, layouts)
+        pages_meta = layout_pages_meta(layouts or [synthetic_layout([])])
+        return source_map, pages_meta
+
+    def _build_source_map(self, page_texts: list, extracted_data: dict, layouts: Optional[list] = None) -> tuple:
+        """Match extracted values against the page lines and compute SVG bboxes.
         Returns (source_map, page_count).
 
-        The SVG renderer uses:
-        - Page: 612 x 792 (letter), margin: 54, font_size: 11, line_height: 16
-        - First text y = margin + font_size = 65
-        - Lines are wrapped at ~90 chars
-        - PDF: one actual page per SVG page (via pypdf)
-        - Word: ~42 lines per page (same as SVG max lines)
+        With `layouts` (one PageLayout per page), a bbox is the union of the
+        boxes of the matched lines, in the page's own points. Without, lines
+        are placed on the synthetic 612 x 792 frame: margin 54, line_height 16.
         """
         source_map = {}
-        page_texts = []  # list of (page_idx, list_of_lines)
-
-        file_name_lower = (file_name or "").lower()
-        is_word = file_name_lower.endswith((".docx", ".doc"))
 
-        # SVG rendering constants (must match _render_text_as_svg / _render_pdf_page)
-        margin = 54
-        line_height = 16
-        page_height = 792
-        max_lines_per_page = int((page_height - margin * 2) / line_height)
-
-        try:
-            if is_word:
-                # Extract text and paginate like _render_docx_page does
-                from services.document_extractor import _extract_docx_text
-                paragraphs = _extract_docx_text(file_bytes)
-                all_lines = []
-                for para in paragraphs:
-                    if not para.strip():
-                        all_lines.append("")
-                        continue
-                    words = para.split()
-                    line = ""
-                    for word in words:
-                        test = f"{line} {word}".strip()
-                        if len(test) > 85:  # matches _render_docx_page threshold
-                            all_lines.append(line)
-                            line = word
-                        else:
-                            line = test
-                    if line:
-                        all_lines.append(line)
-                    all_lines.append("")  # blank line between paragraphs
-
-                # Split into pages
-                for i in range(0, len(all_lines), max_lines_per_page):
-                    page_lines = all_lines[i:i + max_lines_per_page]
-                    page_texts.append(page_lines)
-            else:
-                # PDF: extract text per actual page
-                import io
-                from pypdf import PdfReader
-                reader = PdfReader(io.BytesIO(file_bytes))
-                for page in reader.pages:
-                    text = page.extract_text() or ""
-                    # Wrap lines the same way _render_pdf_page does
-                    lines = []
-                    for paragraph in text.split("\n"):
-                        if not paragraph.strip():
-                            lines.append("")
-                            continue
-                        words = paragraph.split()
-                        line = ""
-                        for word in words:
-                            test = f"{line} {word}".strip()
-                            if len(test) > 90:  # matches _render_pdf_page threshold
-                                lines.append(line)
-                                line = word
-                            else:
-                                line = test
-                        if line:
-                            lines.append(line)
-                    page_texts.append(lines)
-        except Exception as e:
-            logger.warning(f"Failed to extract page text for source map: {e}")
-            # Fallback: single page with full_text
-            page_texts = [["(Could not extract page text)"]]
+        margin = PAGE_MARGIN
+        line_height = LINE_HEIGHT
 
         page_count = max(1, len(page_texts))
 
@@ -641,114 +647,70 @@ class GeminiExtractor:
                 continue
             field_search_variants[field] = self._generate_money_variants(val)
 
-        def _normalize_ws(s: str) -> str:
-            """Collapse multiple whitespace into single space for matching."""
-            return re.sub(r'\s+', ' ', s).strip()
+        # Lowered and whitespace-collapsed once for the whole document, not per variant
+        index = PageLineIndex(page_texts)
 
-        def _make_bbox(page_idx: int, line_idx: int, matched: str) -> dict:
-            y0 = margin + (line_idx * line_height)
-            y1 = y0 + line_height
+        def _make_bbox(page_idx: int, line_idx: int, matched: str, last_line_idx: Optional[int] = None,
+                       match_type: str = "text_search", confidence: float = 1.0) -> dict:
+            last_line_idx = line_idx if last_line_idx is None else last_line_idx
+            layout = layouts[page_idx] if layouts else None
+            if layout is not None and last_line_idx < layout.line_count:
+                x0, y0, x1, y1 = layout.line_box(line_idx, last_line_idx)
+            else:
+                x0, x1 = float(margin), float(PAGE_WIDTH - margin)
+                y0, y1 = margin + line_idx * line_height, margin + (last_line_idx + 1) * line_height
             return {
                 "page": page_idx,
                 "bbox": {
-                    "x0": float(margin),
+                    "x0": round(x0, 1),
                     "y0": round(y0, 1),
-                    "x1": float(612 - margin),
+                    "x1": round(x1, 1),
                     "y1": round(y1, 1)
                 },
                 "matched_text": matched,
-                "match_type": "text_search"
+                "match_type": match_type,
+                "confidence": confidence
             }
 
-        def _search_variants_in_pages(variants: List[str], page_texts_list: list) -> Optional[dict]:
-            """Search for any of the variants in page_texts using 4-pass matching.
-            Returns bbox dict or None if not found."""
+        def _search_variants_in_pages(variants: List[str]) -> Optional[dict]:
+            """Search for any of the variants in page_texts: exact line, whitespace-normalized
+            line, joined page (see PageLineIndex.locate). Returns bbox dict or None if not found."""
             for search_value in variants:
-                search_lower = search_value.lower()
-                if not search_lower.strip() or len(search_lower.strip()) < 2:
-                    continue
-                search_normalized = _normalize_ws(search_lower)
-                for page_idx, lines in enumerate(page_texts_list):
-                    # Pass 1: exact substring in single line
-                    for line_idx, line in enumerate(lines):
-                        if search_lower in line.lower():
-                            return _make_bbox(page_idx, line_idx, search_value)
-                    # Pass 2: whitespace-normalized match in single line
-                    for line_idx, line in enumerate(lines):
-                        if search_normalized in _normalize_ws(line.lower()):
-                            return _make_bbox(page_idx, line_idx, search_value)
-                    # Pass 3: search in joined page text for multi-line values
-                    joined = " ".join(lines)
-                    joined_normalized = _normalize_ws(joined.lower())
-                    if search_normalized in joined_normalized:
-                        first_words = " ".join(search_normalized.split()[:3])
-                        if first_words:
-                            for line_idx, line in enumerate(lines):
-                                if first_words in _normalize_ws(line.lower()):
-                                    return _make_bbox(page_idx, line_idx, search_value)
-                        # Fallback: use the middle of the page
-                        return _make_bbox(page_idx, len(lines) // 2, search_value)
-            # Pass 4: try individual significant words (>=4 chars) from the first variant
-            if variants:
-                first_val = variants[0]
-                single_words = [w for w in first_val.split() if len(w) >= 4
-                                and w.lower() not in ("the", "and", "for", "with", "from",
-                                                       "this", "that", "will", "have", "been",
-                                                       "each", "after", "upon", "into", "also",
-                                                       "than", "such", "other", "only", "shall",
-                                                       "must", "does", "were", "like", "make",
-                                                       "made", "just", "over", "more", "most",
-                                                       "some", "what", "when", "your", "they",
-                                                       "them", "then", "here", "there", "where",
-                                                       "which", "their", "about", "would", "could",
-                                                       "should", "before", "during", "between",
-                                                       "under", "above", "below",
-                                                       "lease", "tenant", "landlord", "property",
-                                                       "agreement", "section", "specified", "none")]
-                for word in single_words:
-                    word_lower = word.lower()
-                    for page_idx, lines in enumerate(page_texts_list):
-                        for line_idx, line in enumerate(lines):
-                            if word_lower in line.lower():
-                                return _make_bbox(page_idx, line_idx, word)
+                found = index.locate(search_value)
+                if found:
+                    return _make_bbox(found[0], found[1], search_value)
             return None
 
+        # Free-text values not found verbatim are ranked together against line windows
+        # below. Names, dates and amounts are left unmapped: a ranked match on a part
+        # of them ("01" of a date) points at the wrong line.
+        ranked_queries: Dict[str, str] = {}
+
         # Search each page's lines for field values and compute SVG bbox
         for field_name, variants in field_search_variants.items():
-            result = _search_variants_in_pages(variants, page_texts)
+            result = _search_variants_in_pages(variants)
             if result:
                 source_map[field_name] = [result]
+            elif variants and field_name in RANKED_FALLBACK_FIELDS:
+                ranked_queries[field_name] = variants[0]
 
-        # Risk flags: search for each risk's title/description keywords in the document
+        # Risk flags paraphrase the clause, so they are always located by rank over title,
+        # category and description
         risk_flags = extracted_data.get("risk_flags", [])
         if isinstance(risk_flags, list):
             for risk_idx, risk in enumerate(risk_flags):
                 if not isinstance(risk, dict):
                     continue
-                field_key = f"risk_{risk_idx}"
-                # Build search variants from risk title and description keywords
-                risk_variants = []
-                title = risk.get("title", "")
-                desc = risk.get("description", "")
-                category = risk.get("category", "")
-                if title and len(title) >= 4:
-                    risk_variants.append(title)
-                if category and len(category) >= 4 and category != title:
-                    risk_variants.append(category)
-                if desc:
-                    first_sentence = desc.split('.')[0].strip()
-                    if len(first_sentence) >= 6:
-                        risk_variants.append(first_sentence)
-                    desc_words = desc.split()
-                    if len(desc_words) >= 4:
-                        risk_variants.append(" ".join(desc_words[:5]))
-                        risk_variants.append(" ".join(desc_words[:4]))
-                    if len(desc_words) >= 3:
-                        risk_variants.append(" ".join(desc_words[:3]))
-
-                result = _search_variants_in_pages(risk_variants, page_texts)
-                if result:
-                    source_map[field_key] = [result]
+                parts = (risk.get("title"), risk.get("category"), risk.get("description"))
+                query = " ".join(str(part) for part in parts if part)
+                if query.strip():
+                    ranked_queries[f"risk_{risk_idx}"] = query
+
+        for field_key, span in index.rank_spans(ranked_queries).items():
+            matched = " ".join(page_texts[span.page][span.first_line:span.last_line + 1])
+            source_map[field_key] = [
+                _make_bbox(span.page, span.first_line, matched, span.last_line, "ranked", span.confidence)
+            ]
 
         logger.info(f"Source map built: {len(source_map)} fields matched out of {len(field_search_variants) + len(risk_flags if isinstance(risk_flags, list) else [])} searched")
         return source_map, page_count
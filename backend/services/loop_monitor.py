@@ -0,0 +1,219 @@
+"""
+Event loop lag monitor.
+
+Synchronous work inside an async handler (a blocking client call, bcrypt,
+pypdf, time.sleep) stalls every request on the event loop, and nothing in the
+request logs says which handler did it. The monitor finds it:
+
+- A sampler task sleeps `loop_monitor_interval_seconds` at a time and records
+  how late it woke up. That lag is the time the loop spent running other
+  callbacks, and goes into a fixed-bucket histogram.
+- A watchdog thread checks that the sampler keeps ticking. Once it has not for
+  `loop_monitor_block_threshold_seconds`, the loop is stuck in one callback,
+  so the watchdog takes the loop thread's current stack, which is the code
+  doing the blocking, and logs it. The sampler fills in how long the stall
+  lasted when the loop comes back.
+
+The cost is one timer callback per interval on the loop and one thread that
+wakes as often, so it can stay on in production (`loop_monitor_enabled`).
+asyncio's debug mode reports slow callbacks as well, but slows every callback
+down and only names the callback, not the line it was stuck on.
+
+Stats (histogram, stalls by code site, the last stalls with their stacks) are
+served by the admin endpoint GET /api/v1/admin/event-loop/stats.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the lag histogram buckets, in milliseconds; the last bucket is unbounded
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+RECENT_STALLS = 20
+MAX_STALL_SITES = 100
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _stall_site(frames: List[traceback.FrameSummary]) -> str:
+    """Innermost frame in the application's own code, else the innermost frame."""
+    for frame in reversed(frames):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(_APP_ROOT) and path != os.path.abspath(__file__) and "site-packages" not in path:
+            return f"{os.path.relpath(path, _APP_ROOT)}:{frame.lineno} in {frame.name}"
+    if frames:
+        return f"{frames[-1].filename}:{frames[-1].lineno} in {frames[-1].name}"
+    return "unknown"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, block_threshold: float):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = 0.0
+        self._stall: Optional[Dict[str, Any]] = None  # the stall in progress, once captured
+
+        self._bucket_counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._samples = 0
+        self._lag_sum_ms = 0.0
+        self._lag_max_ms = 0.0
+        self._stalls = 0
+        self._stall_sites: Counter = Counter()
+        self._recent_stalls: deque = deque(maxlen=RECENT_STALLS)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        if self.is_running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started (sampling every {self.interval * 1000:.0f}ms, "
+            f"stacks of stalls over {self.block_threshold * 1000:.0f}ms)"
+        )
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stopping.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(self._watchdog.join)
+        self._watchdog = None
+
+    async def _sample(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            self._record((now - start - self.interval) * 1000)
+
+    def _record(self, lag_ms: float):
+        lag_ms = max(0.0, lag_ms)
+        self._bucket_counts[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+        self._samples += 1
+        self._lag_sum_ms += lag_ms
+        self._lag_max_ms = max(self._lag_max_ms, lag_ms)
+        with self._lock:
+            stall, self._stall = self._stall, None
+        if stall is not None:
+            stall["blocked_ms"] = round(lag_ms, 1)
+            logger.warning(f"Event loop was blocked for {lag_ms:.0f}ms at {stall['site']}")
+
+    def _watch(self):
+        check_every = min(self.interval, self.block_threshold / 2)
+        while not self._stopping.wait(check_every):
+            # The sampler ticks once per interval; anything beyond that is lag
+            stalled = time.monotonic() - self._last_tick - self.interval
+            if stalled < self.block_threshold or self._stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            frames = traceback.extract_stack(frame) if frame is not None else []
+            del frame
+            stall = {
+                "at": datetime.now(timezone.utc).isoformat(),
+                "site": _stall_site(frames),
+                "blocked_ms": None,  # filled in when the loop comes back
+                "stack": traceback.format_list(frames),
+            }
+            with self._lock:
+                self._stall = stall
+                self._stalls += 1
+                if stall["site"] in self._stall_sites or len(self._stall_sites) < MAX_STALL_SITES:
+                    self._stall_sites[stall["site"]] += 1
+                self._recent_stalls.append(stall)
+            logger.warning(
+                f"Event loop blocked for over {stalled * 1000:.0f}ms at {stall['site']}:\n"
+                + "".join(stall["stack"])
+            )
+
+    def _percentile_ms(self, share: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given share of samples (None: unbounded)."""
+        target = share * self._samples
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self._bucket_counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(LAG_BUCKETS_MS + ("+Inf",), self._bucket_counts):
+            cumulative += count
+            buckets.append({"le_ms": bound, "count": cumulative})
+        with self._lock:
+            stall_sites = dict(self._stall_sites.most_common())
+            recent_stalls = [dict(stall) for stall in reversed(self._recent_stalls)]
+        return {
+            "running": self.is_running,
+            "interval_ms": round(self.interval * 1000, 1),
+            "block_threshold_ms": round(self.block_threshold * 1000, 1),
+            "lag_ms": {
+                "samples": self._samples,
+                "sum": round(self._lag_sum_ms, 1),
+                "max": round(self._lag_max_ms, 1),
+                "mean": round(self._lag_sum_ms / self._samples, 2) if self._samples else 0.0,
+                "p50_le": self._percentile_ms(0.5) if self._samples else 0,
+                "p99_le": self._percentile_ms(0.99) if self._samples else 0,
+                "buckets": buckets,
+            },
+            "stalls": self._stalls,
+            "stall_sites": stall_sites,
+            "recent_stalls": recent_stalls,
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval_seconds,
+    block_threshold=settings.loop_monitor_block_threshold_seconds,
+)
+
+
+async def start_loop_monitor():
+    """Start sampling if `loop_monitor_enabled` (skipped on Lambda, where frozen sandboxes read as stalls)."""
+    if not settings.loop_monitor_enabled:
+        return
+    is_lambda = bool(
+        os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+        or os.environ.get("IS_LAMBDA", "").lower() in ("true", "1", "yes")
+    )
+    if is_lambda:
+        logger.info("Lambda environment detected; event loop monitor disabled")
+        return
+    await loop_monitor.start()
+
+
+async def stop_loop_monitor():
+    await loop_monitor.stop()
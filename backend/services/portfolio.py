@@ -0,0 +1,159 @@
+"""
+Portfolio dashboard queries: status buckets, upcoming lease ends and the
+filtered, sorted lease page. Everything is computed in SQL on the typed
+extraction columns. The totals come from the per-user summary row
+(services.portfolio_summaries).
+
+A lease's status depends on today's date: "expired" before today,
+"expiring_soon" up to EXPIRING_WINDOW_DAYS ahead, "active" after that or
+with no end date, and "unknown" when the extracted end date is not a date.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.extractions import Extractions
+from services.portfolio_summaries import Portfolio_summariesService
+
+EXPIRING_WINDOW_DAYS = 90
+LEASE_STATUSES = ("active", "expiring_soon", "expired", "unknown")
+SORT_COLUMNS = {
+    "created_at": Extractions.created_at,
+    "lease_end_date": Extractions.lease_end_on,
+    "lease_start_date": Extractions.lease_start_on,
+    "monthly_rent": Extractions.monthly_rent,
+    "security_deposit": Extractions.security_deposit,
+    "property_address": Extractions.property_address,
+}
+LEASE_COLUMNS = (
+    Extractions.id, Extractions.document_id, Extractions.property_address, Extractions.tenant_name,
+    Extractions.monthly_rent, Extractions.security_deposit, Extractions.lease_start_date,
+    Extractions.lease_end_date, Extractions.lease_end_on,
+)
+
+
+def _status_conditions(today: date) -> Dict[str, Any]:
+    window_end = today + timedelta(days=EXPIRING_WINDOW_DAYS)
+    end_on = Extractions.lease_end_on
+    has_end_text = and_(Extractions.lease_end_date.isnot(None), Extractions.lease_end_date != "")
+    return {
+        "expired": end_on < today,
+        "expiring_soon": end_on.between(today, window_end),
+        "active": or_(end_on > window_end, and_(end_on.is_(None), ~has_end_text)),
+        "unknown": and_(end_on.is_(None), has_end_text),
+    }
+
+
+def _status_expression(today: date):
+    conditions = _status_conditions(today)
+    return case(*[(conditions[s], s) for s in ("expired", "expiring_soon", "unknown")], else_="active")
+
+
+def _lease_item(row) -> Dict[str, Any]:
+    return {
+        "extraction_id": row.id,
+        "document_id": row.document_id,
+        "property_address": row.property_address,
+        "tenant_name": row.tenant_name,
+        "monthly_rent": row.monthly_rent,
+        "security_deposit": row.security_deposit,
+        "lease_start_date": row.lease_start_date,
+        "lease_end_date": row.lease_end_date,
+        "status": row.status,
+    }
+
+
+class PortfolioService:
+    """Read side of the portfolio dashboard"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def summary(self, user_id: str, today: date) -> Dict[str, Any]:
+        totals = await Portfolio_summariesService(self.db).get(user_id)
+        if totals is None:
+            totals = await Portfolio_summariesService(self.db).rebuild(user_id)
+
+        status = _status_expression(today).label("status")
+        result = await self.db.execute(
+            select(status, func.count()).where(Extractions.user_id == user_id).group_by(status)
+        )
+        buckets = dict(result.all())
+        return {
+            "total_properties": totals.lease_count,
+            "active_leases": buckets.get("active", 0),
+            "expiring_soon": buckets.get("expiring_soon", 0),
+            "expired": buckets.get("expired", 0),
+            "total_monthly_rent": round(totals.total_monthly_rent, 2),
+            "total_annual_rent": round(totals.total_monthly_rent * 12, 2),
+            "total_deposits_held": round(totals.total_deposits, 2),
+        }
+
+    async def leases(
+        self,
+        user_id: str,
+        today: date,
+        status: Optional[str] = None,
+        expiring_within_days: Optional[int] = None,
+        min_rent: Optional[float] = None,
+        max_rent: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """One page of the user's leases. Raises ValueError for an unknown status or sort."""
+        filters = [Extractions.user_id == user_id]
+        if status:
+            if status not in LEASE_STATUSES:
+                raise ValueError(f"Unknown status: {status}")
+            filters.append(_status_conditions(today)[status])
+        if expiring_within_days is not None:
+            filters.append(Extractions.lease_end_on.between(today, today + timedelta(days=expiring_within_days)))
+        if min_rent is not None:
+            filters.append(Extractions.monthly_rent >= min_rent)
+        if max_rent is not None:
+            filters.append(Extractions.monthly_rent <= max_rent)
+
+        if sort:
+            column = SORT_COLUMNS.get(sort.lstrip("-"))
+            if column is None:
+                raise ValueError(f"Unknown sort field: {sort.lstrip('-')}")
+            direction = column.desc() if sort.startswith("-") else column.asc()
+            order = [direction.nullslast(), Extractions.id.desc()]
+        else:
+            order = [Extractions.created_at.desc().nullslast(), Extractions.id.desc()]
+
+        total = (await self.db.execute(select(func.count(Extractions.id)).where(*filters))).scalar()
+        result = await self.db.execute(
+            select(*LEASE_COLUMNS, _status_expression(today).label("status"))
+            .where(*filters)
+            .order_by(*order)
+            .offset(skip)
+            .limit(limit)
+        )
+        return {
+            "items": [_lease_item(row) for row in result.all()],
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+        }
+
+    async def upcoming_lease_ends(self, user_id: str, today: date, limit: int = 10) -> List[Dict[str, Any]]:
+        result = await self.db.execute(
+            select(Extractions.id, Extractions.property_address, Extractions.lease_end_on)
+            .where(Extractions.user_id == user_id, Extractions.lease_end_on >= today)
+            .order_by(Extractions.lease_end_on, Extractions.id)
+            .limit(limit)
+        )
+        return [
+            {
+                "date": row.lease_end_on.isoformat(),
+                "type": "lease_end",
+                "label": f"Lease ends – {row.property_address or 'Unknown'}",
+                "extraction_id": row.id,
+            }
+            for row in result.all()
+        ]
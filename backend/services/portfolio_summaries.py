@@ -0,0 +1,162 @@
+"""
+Per-user portfolio totals (lease count, monthly rent, deposits).
+
+ExtractionsService adjusts the user's row in the same transaction as every
+extraction insert, update and delete, so /portfolio reads the totals without
+touching extractions. Status buckets depend on today's date and are counted
+in SQL per request instead (services.portfolio).
+
+A user's first write builds the row from an aggregate over their
+extractions. Rows can be rebuilt from scratch at any time:
+
+    python -m services.portfolio_summaries --batch-size 200
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.extractions import Extractions
+from models.portfolio_summaries import Portfolio_summaries
+
+logger = logging.getLogger(__name__)
+
+
+def _amount(extraction, field: str) -> float:
+    value = getattr(extraction, field, None) if extraction is not None else None
+    return float(value or 0)
+
+
+def portfolio_values(extraction) -> Dict[str, float]:
+    """The summed values one extraction contributes (all zero for None)."""
+    return {
+        "lease_count": 1 if extraction is not None else 0,
+        "total_monthly_rent": _amount(extraction, "monthly_rent"),
+        "total_deposits": _amount(extraction, "security_deposit"),
+    }
+
+
+class Portfolio_summariesService:
+    """Service layer for Portfolio_summaries operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, user_id: str) -> Optional[Portfolio_summaries]:
+        return await self.db.get(Portfolio_summaries, user_id)
+
+    async def apply_change(self, user_id: str, before: Optional[Dict[str, float]], after: Optional[Dict[str, float]]):
+        """Adjust the user's totals by `after - before` (portfolio_values of the row).
+
+        Does not commit; the caller's commit covers the extraction write and this.
+        """
+        before = before or portfolio_values(None)
+        after = after or portfolio_values(None)
+        delta = {key: after[key] - before[key] for key in after}
+        if not any(delta.values()):
+            return
+        if await self._add(user_id, delta):
+            return
+        # No row yet: build it from the extractions table, which already holds this change
+        inserted = await self.db.execute(self._insert_ignoring_conflict(
+            {"user_id": user_id, **await self.aggregate(user_id), "updated_at": datetime.now(timezone.utc)}
+        ))
+        if inserted.rowcount == 0:
+            # A concurrent first write created the row from rows that exclude this change
+            await self._add(user_id, delta)
+
+    async def aggregate(self, user_id: str) -> Dict[str, float]:
+        result = await self.db.execute(
+            select(
+                func.count(Extractions.id),
+                func.coalesce(func.sum(Extractions.monthly_rent), 0),
+                func.coalesce(func.sum(Extractions.security_deposit), 0),
+            ).where(Extractions.user_id == user_id)
+        )
+        count, rent, deposits = result.one()
+        return {"lease_count": count, "total_monthly_rent": float(rent), "total_deposits": float(deposits)}
+
+    async def rebuild(self, user_id: str) -> Portfolio_summaries:
+        """Recompute one user's row from their extractions and commit."""
+        try:
+            totals = await self.aggregate(user_id)
+            await self.db.execute(delete(Portfolio_summaries).where(Portfolio_summaries.user_id == user_id))
+            summary = Portfolio_summaries(user_id=user_id, updated_at=datetime.now(timezone.utc), **totals)
+            self.db.add(summary)
+            await self.db.commit()
+            return summary
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error rebuilding portfolio summary for {user_id}: {str(e)}")
+            raise
+
+    async def _add(self, user_id: str, delta: Dict[str, float]) -> bool:
+        result = await self.db.execute(
+            update(Portfolio_summaries)
+            .where(Portfolio_summaries.user_id == user_id)
+            .values(
+                lease_count=Portfolio_summaries.lease_count + delta["lease_count"],
+                total_monthly_rent=Portfolio_summaries.total_monthly_rent + delta["total_monthly_rent"],
+                total_deposits=Portfolio_summaries.total_deposits + delta["total_deposits"],
+                updated_at=datetime.now(timezone.utc),
+            )
+        )
+        return result.rowcount > 0
+
+    def _insert_ignoring_conflict(self, values: Dict[str, Any]):
+        dialect = self.db.bind.dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(Portfolio_summaries).values(**values).on_conflict_do_nothing(index_elements=["user_id"])
+        if dialect == "sqlite":
+            return sqlite.insert(Portfolio_summaries).values(**values).on_conflict_do_nothing(index_elements=["user_id"])
+        return insert(Portfolio_summaries).values(**values)
+
+
+async def rebuild_all_portfolio_summaries(batch_size: int = 200) -> int:
+    """Rebuild every user's row, one session per batch of users."""
+    from core.database import db_manager
+
+    rebuilt = 0
+    last_user = ""
+    while True:
+        async with db_manager.async_session_maker() as db:
+            result = await db.execute(
+                select(Extractions.user_id).distinct()
+                .where(Extractions.user_id > last_user)
+                .order_by(Extractions.user_id)
+                .limit(batch_size)
+            )
+            user_ids = result.scalars().all()
+            if not user_ids:
+                break
+            service = Portfolio_summariesService(db)
+            for user_id in user_ids:
+                await service.rebuild(user_id)
+            rebuilt += len(user_ids)
+            last_user = user_ids[-1]
+        logger.info(f"[portfolio-summaries] rebuilt {rebuilt} users")
+    return rebuilt
+
+
+async def _run_rebuild(batch_size: int):
+    from services.database import close_database, initialize_database
+
+    await initialize_database()
+    try:
+        await rebuild_all_portfolio_summaries(batch_size)
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Rebuild the per-user portfolio summary rows")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run_rebuild(args.batch_size))
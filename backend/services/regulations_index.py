@@ -0,0 +1,123 @@
+"""
+In-process index of the state regulations, keyed by state code.
+
+The whole table (a few hundred rows that change about once a month) is
+loaded once at startup. After that ComplianceChecker reads it from memory
+instead of querying per analysis. The index is frozen: each load builds a
+new read-only mapping of state code -> tuple of read-only rows, which
+replaces the old one in a single assignment. Readers therefore never see a
+half-built index.
+
+State_regulationsService invalidates it after every committed create,
+update and delete, so this process reloads on the next lookup. Other
+processes serving the same database only see such writes after
+`regulations_index_max_age_seconds`, when they reload anyway.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.state_regulations import State_regulations
+
+logger = logging.getLogger(__name__)
+
+
+def regulation_row(reg: State_regulations) -> Dict[str, Any]:
+    """The dict shape ComplianceChecker and /regulations/{state_code} work with."""
+    return {
+        "id": reg.id,
+        "state_code": reg.state_code,
+        "state_name": reg.state_name,
+        "category": reg.regulation_category,
+        "title": reg.regulation_title,
+        "content": reg.regulation_content,
+        "max_amount": reg.max_amount,
+        "max_multiplier": reg.max_multiplier,
+        "required_days": reg.required_days,
+        "source_url": reg.source_url,
+    }
+
+
+async def fetch_state_regulations(db: AsyncSession, state_code: str) -> List[Dict[str, Any]]:
+    """One state's regulations straight from the database, bypassing the index."""
+    result = await db.execute(
+        select(State_regulations).where(State_regulations.state_code == state_code).order_by(State_regulations.id)
+    )
+    return [regulation_row(reg) for reg in result.scalars().all()]
+
+
+class RegulationsIndex:
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        self._by_state: Optional[Mapping[str, Tuple[Mapping[str, Any], ...]]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._stats = {"lookups": 0, "loads": 0, "invalidations": 0}
+
+    def is_fresh(self) -> bool:
+        return self._by_state is not None and time.monotonic() - self._loaded_at < self.max_age_seconds
+
+    async def get(self, db: AsyncSession, state_code: str) -> List[Dict[str, Any]]:
+        """The state's regulations, in id order, as fresh dicts the caller may modify."""
+        if not self.is_fresh():
+            await self.load(db)
+        self._stats["lookups"] += 1
+        return [dict(reg) for reg in self._by_state.get(state_code, ())]
+
+    async def load(self, db: AsyncSession, force: bool = False):
+        async with self._lock:
+            # Another request may have reloaded while this one waited
+            if self.is_fresh() and not force:
+                return
+            generation = self._generation
+            result = await db.execute(select(State_regulations).order_by(State_regulations.id))
+            by_state = defaultdict(list)
+            for reg in result.scalars().all():
+                by_state[reg.state_code].append(MappingProxyType(regulation_row(reg)))
+            index = MappingProxyType({code: tuple(rows) for code, rows in by_state.items()})
+
+            if generation != self._generation:
+                # A write committed during the query; serve this once and reload on the next lookup
+                self._by_state, self._loaded_at = index, 0.0
+                return
+            self._by_state, self._loaded_at = index, time.monotonic()
+            self._stats["loads"] += 1
+            logger.debug(f"Loaded regulations index: {sum(map(len, index.values()))} rows, {len(index)} states")
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = 0.0
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "states": len(self._by_state) if self._by_state is not None else 0,
+            "fresh": self.is_fresh(),
+        }
+
+
+regulations_index = RegulationsIndex(settings.regulations_index_max_age_seconds)
+
+
+async def load_regulations_index():
+    """Warm the index at startup. A failure here only means the first lookup loads it."""
+    from core.database import db_manager
+
+    if not db_manager.async_session_maker:
+        return
+    try:
+        async with db_manager.async_session_maker() as db:
+            await regulations_index.load(db, force=True)
+        logger.info(f"Regulations index loaded ({regulations_index.stats()['states']} states)")
+    except Exception as e:
+        logger.warning(f"Could not preload regulations index: {e}")
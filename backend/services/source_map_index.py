@@ -0,0 +1,274 @@
+"""
+Per-document line index for locating extracted values on the viewer pages.
+
+GeminiExtractor._build_source_map looks up each search variant of each
+field. It tries the pages in order, and on each page an exact
+lower-case substring of a line, then a whitespace-collapsed substring of a
+line, then a substring of the whole collapsed page. Done line by line, every
+variant lowers and collapses every line of the document again.
+
+The index does that work once per document. Each text form (lower-cased
+lines, collapsed lines, collapsed pages) is joined with "\\n" into one string
+with the start offset of every part. A single str.find then returns the first
+part containing a needle, and bisecting the offsets maps it back to its
+(page, line). A needle without "\\n" cannot match across two parts, so the
+result is the same as scanning the parts in order. Collapsed text never
+contains "\\n"; lower-cased lines are scanned one by one for the rare needle
+that does.
+
+Risk flags, which paraphrase their clause, and free-text field values found
+nowhere verbatim are ranked instead (`rank_spans`). Every
+window of RANK_WINDOW_LINES consecutive lines on a page is scored against the
+value's terms with BM25, and the best window is trimmed to its lines that
+hold a query term. The term postings are per line and built on first use; a
+window's term frequency is the sum over its lines. All queries of a document
+are ranked in one call, which computes each term's window weights once
+however many queries use it. The reported confidence is the share of the
+query's IDF weight that the window covers. A window that shares only numbers
+with the query (a "01" of a date, a clause number) is no match.
+"""
+
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+RANK_WINDOW_LINES = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+# In long documents, terms in more than this share of the windows barely move a
+# BM25 score but cost the most to score
+RANK_MAX_DF_SHARE = 0.5
+RANK_DF_CUT_MIN_WINDOWS = 200
+# Weaker spans share too little of the value to be worth pointing at
+RANK_MIN_CONFIDENCE = 0.1
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+_RANK_STOPWORDS = frozenset(
+    "a an and are as at be been by for from has have if in into is it its may must no not of on or "
+    "shall should such than that the their then there these this to upon was were will with within "
+    "without would any all each".split()
+)
+_SUFFIXES = ("ations", "ation", "ally", "ings", "ing", "ates", "ate", "edly", "ed", "ly", "al", "es", "s")
+
+_SEPARATOR = "\n"
+
+
+@lru_cache(maxsize=65536)
+def _stem(term: str) -> str:
+    """Crude suffix stripping, enough for "renews"/"renewal" or "notice"/"notices" to meet."""
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3 and not term.endswith("ss"):
+            term = term[:-len(suffix)]
+            break
+    return term[:-1] if len(term) > 3 and term.endswith("e") else term
+
+
+def rank_terms(text: str) -> List[str]:
+    """Lower-cased, stemmed word terms of `text` for ranking, without stopwords."""
+    return [_stem(term) for term in _TERM_RE.findall(text.lower()) if len(term) >= 2 and term not in _RANK_STOPWORDS]
+
+
+def _is_word(term: str) -> bool:
+    return any(char.isalpha() for char in term)
+
+
+class RankedSpan(NamedTuple):
+    page: int
+    first_line: int
+    last_line: int
+    confidence: float
+
+
+def normalize_ws(s: str) -> str:
+    """Collapse multiple whitespace into single space for matching.
+
+    Same result as collapsing runs of regex whitespace and stripping: str.split
+    and re use the same Unicode whitespace set.
+    """
+    return " ".join(s.split())
+
+
+class _JoinedParts:
+    """Strings joined into one, searchable for the first part containing a needle."""
+
+    __slots__ = ("parts", "text", "starts")
+
+    def __init__(self, parts: List[str]):
+        self.parts = parts
+        self.text = _SEPARATOR.join(parts)
+        starts = []
+        offset = 0
+        for part in parts:
+            starts.append(offset)
+            offset += len(part) + 1
+        self.starts = starts
+
+    def find(self, needle: str, first: int = 0, end: Optional[int] = None) -> int:
+        """Index of the first part in parts[first:end] that contains `needle`, or -1."""
+        end = len(self.parts) if end is None else end
+        if first >= end:
+            return -1
+        if _SEPARATOR in needle:
+            for i in range(first, end):
+                if needle in self.parts[i]:
+                    return i
+            return -1
+        # The end offset is the separator after part end-1, so a match stays inside the range
+        stop = self.starts[end] - 1 if end < len(self.parts) else len(self.text)
+        pos = self.text.find(needle, self.starts[first], stop)
+        if pos < 0:
+            return -1
+        return bisect.bisect_right(self.starts, pos, first, end) - 1
+
+
+class PageLineIndex:
+    """Lower-cased and whitespace-collapsed forms of a document's viewer lines."""
+
+    def __init__(self, pages: Sequence[Sequence[str]]):
+        self.line_counts = [len(lines) for lines in pages]
+        # Global line number of each page's first line; one extra entry for the end
+        self.page_starts = [0]
+        for count in self.line_counts:
+            self.page_starts.append(self.page_starts[-1] + count)
+
+        lower_lines = [line.lower() for lines in pages for line in lines]
+        self.lower_lines = _JoinedParts(lower_lines)
+        self.normalized_lines = _JoinedParts([normalize_ws(line) for line in lower_lines])
+        self.normalized_pages = _JoinedParts([normalize_ws(" ".join(lines).lower()) for lines in pages])
+        self._located: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._line_postings: Optional[Dict[str, List[Tuple[int, int]]]] = None
+
+    def _page_line(self, global_line: int) -> Tuple[int, int]:
+        # Empty pages share their start with the next page; bisect_right picks the last of them
+        page_idx = bisect.bisect_right(self.page_starts, global_line) - 1
+        return page_idx, global_line - self.page_starts[page_idx]
+
+    def locate(self, search_value: str) -> Optional[Tuple[int, int]]:
+        """(page, line) of `search_value` by the page-ordered three-pass match, or None.
+
+        Values shorter than two characters are never matched.
+        """
+        if search_value not in self._located:
+            self._located[search_value] = self._locate(search_value)
+        return self._located[search_value]
+
+    def _locate(self, search_value: str) -> Optional[Tuple[int, int]]:
+        search_lower = search_value.lower()
+        if len(search_lower.strip()) < 2:
+            return None
+        search_normalized = normalize_ws(search_lower)
+
+        # Pages are tried in order, and on each page the passes in order. A later pass
+        # therefore only wins on an earlier page than the passes before it.
+        exact = self.lower_lines.find(search_lower)
+        bound = self._page_line(exact)[0] if exact >= 0 else len(self.line_counts)
+        collapsed = self.normalized_lines.find(search_normalized, 0, self.page_starts[bound])
+        if collapsed >= 0:
+            bound = self._page_line(collapsed)[0]
+        page_idx = self.normalized_pages.find(search_normalized, 0, bound)
+        if page_idx < 0:
+            if collapsed >= 0:
+                return self._page_line(collapsed)
+            return self._page_line(exact) if exact >= 0 else None
+
+        # The value spans lines: point at the line holding its first words, or the middle of the page
+        first_words = " ".join(search_normalized.split()[:3])
+        start, end = self.page_starts[page_idx], self.page_starts[page_idx + 1]
+        line = self.normalized_lines.find(first_words, start, end)
+        if line >= 0:
+            return page_idx, line - start
+        return page_idx, self.line_counts[page_idx] // 2
+
+    def _window_range(self, page_idx: int) -> Tuple[int, int]:
+        """First and last global start line of the page's windows."""
+        start, end = self.page_starts[page_idx], self.page_starts[page_idx + 1]
+        return start, max(start, end - RANK_WINDOW_LINES)
+
+    def _build_rank_postings(self):
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        line_lengths = []
+        for line_idx, line in enumerate(self.lower_lines.parts):
+            counts = Counter(rank_terms(line))
+            line_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].append((line_idx, tf))
+
+        # Windows are keyed by their first line; a page shorter than a window is one window
+        self._line_page = []
+        self._window_length: Dict[int, int] = {}
+        for page_idx, count in enumerate(self.line_counts):
+            self._line_page.extend([page_idx] * count)
+            if not count:
+                continue
+            first, last = self._window_range(page_idx)
+            end = self.page_starts[page_idx + 1]
+            for window in range(first, last + 1):
+                self._window_length[window] = sum(line_lengths[window:min(window + RANK_WINDOW_LINES, end)])
+        total = sum(self._window_length.values())
+        self._avg_window_length = total / len(self._window_length) if total else 1.0
+        self._line_postings = dict(postings)
+
+    def _window_tf(self, term: str) -> Dict[int, int]:
+        """Window start line -> frequency of `term` in that window."""
+        window_tf: Dict[int, int] = {}
+        for line_idx, tf in self._line_postings.get(term, ()):
+            first, last = self._window_range(self._line_page[line_idx])
+            for window in range(max(first, line_idx - RANK_WINDOW_LINES + 1), min(last, line_idx) + 1):
+                window_tf[window] = window_tf.get(window, 0) + tf
+        return window_tf
+
+    def rank_spans(self, queries: Mapping[str, str]) -> Dict[str, RankedSpan]:
+        """Best-scoring line span for each query text, keyed like `queries`.
+
+        Queries without a span of at least RANK_MIN_CONFIDENCE that shares a
+        word (not just a number) with them are left out.
+        """
+        if self._line_postings is None:
+            self._build_rank_postings()
+        window_count = len(self._window_length)
+        if not window_count:
+            return {}
+
+        query_terms = {key: Counter(rank_terms(text)) for key, text in queries.items()}
+        # Each term's windows and BM25 weights, computed once for all the queries that use it
+        term_windows: Dict[str, Dict[int, int]] = {}
+        term_weights: Dict[str, Dict[int, float]] = {}
+        idf: Dict[str, float] = {}
+        for term in set().union(*query_terms.values()):
+            window_tf = self._window_tf(term)
+            if window_count >= RANK_DF_CUT_MIN_WINDOWS and len(window_tf) > window_count * RANK_MAX_DF_SHARE:
+                continue
+            idf[term] = math.log(1 + (window_count - len(window_tf) + 0.5) / (len(window_tf) + 0.5))
+            weights = {}
+            for window, tf in window_tf.items():
+                norm = 1 - BM25_B + BM25_B * self._window_length[window] / self._avg_window_length
+                weights[window] = idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+            term_windows[term], term_weights[term] = window_tf, weights
+
+        spans = {}
+        for key, terms in query_terms.items():
+            scores: Dict[int, float] = {}
+            for term, query_tf in terms.items():
+                for window, weight in term_weights.get(term, {}).items():
+                    scores[window] = scores.get(window, 0.0) + weight * query_tf
+            if not scores:
+                continue
+            # Highest score, earliest window on ties
+            window = min(scores, key=lambda w: (-scores[w], w))
+            total = sum(idf[term] * query_tf for term, query_tf in terms.items() if term in idf)
+            covered = sum(idf[term] * query_tf for term, query_tf in terms.items() if window in term_windows.get(term, ()))
+            confidence = covered / total
+            if confidence < RANK_MIN_CONFIDENCE:
+                continue
+            if not any(_is_word(term) for term in terms if window in term_windows.get(term, ())):
+                continue
+            page_idx = self._line_page[window]
+            end = min(window + RANK_WINDOW_LINES, self.page_starts[page_idx + 1])
+            hits = [line for line in range(window, end) if not terms.keys().isdisjoint(rank_terms(self.lower_lines.parts[line]))]
+            start = self.page_starts[page_idx]
+            spans[key] = RankedSpan(page_idx, hits[0] - start, hits[-1] - start, round(confidence, 2))
+        return spans
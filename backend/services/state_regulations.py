@@ -5,6 +5,9 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.state_regulations import State_regulations
+from services.compliance_reevaluation_worker import request_compliance_reevaluation
+from services.regulations_index import regulations_index
+from utils.pagination import count_key, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +19,21 @@ class State_regulationsService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _after_write(self, *state_codes: str):
+        """Refresh the regulations index and queue re-evaluation of the affected states' leases"""
+        regulations_index.invalidate()
+        try:
+            await request_compliance_reevaluation(self.db, state_codes)
+        except Exception as e:
+            logger.error(f"Could not request compliance re-evaluation for {state_codes}: {str(e)}")
+
     async def create(self, data: Dict[str, Any]) -> Optional[State_regulations]:
         """Create a new state_regulations"""
         try:
             obj = State_regulations(**data)
             self.db.add(obj)
             await self.db.commit()
+            await self._after_write(obj.state_code)
             await self.db.refresh(obj)
             logger.info(f"Created state_regulations with id: {obj.id}")
             return obj
@@ -46,10 +58,14 @@ class State_regulationsService:
         limit: int = 20, 
         query_dict: Optional[Dict[str, Any]] = None,
         sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         """Get paginated list of state_regulationss"""
         try:
-            query = select(State_regulations)
+            # With `fields`, select only those columns; rows come back as dicts
+            query = select(*[getattr(State_regulations, f) for f in fields]) if fields else select(State_regulations)
             count_query = select(func.count(State_regulations.id))
             
             if query_dict:
@@ -58,8 +74,19 @@ class State_regulationsService:
                         query = query.where(getattr(State_regulations, field) == value)
                         count_query = count_query.where(getattr(State_regulations, field) == value)
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            if cursor is not None:
+                # Keyset mode: fixed newest-first order, skip and sort do not apply
+                return await keyset_page(
+                    self.db, State_regulations, query, count_query, cursor, limit,
+                    include_total=include_total,
+                    total_key=count_key(State_regulations, None, query_dict),
+                    as_dicts=bool(fields),
+                )
+
+            total = None
+            if include_total:
+                count_result = await self.db.execute(count_query)
+                total = count_result.scalar()
 
             if sort:
                 if sort.startswith('-'):
@@ -73,7 +100,7 @@ class State_regulationsService:
                 query = query.order_by(State_regulations.id.desc())
 
             result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
+            items = [dict(row) for row in result.mappings().all()] if fields else result.scalars().all()
 
             return {
                 "items": items,
@@ -92,11 +119,13 @@ class State_regulationsService:
             if not obj:
                 logger.warning(f"State_regulations {obj_id} not found for update")
                 return None
+            previous_state = obj.state_code
             for key, value in update_data.items():
                 if hasattr(obj, key):
                     setattr(obj, key, value)
 
             await self.db.commit()
+            await self._after_write(previous_state, obj.state_code)
             await self.db.refresh(obj)
             logger.info(f"Updated state_regulations {obj_id}")
             return obj
@@ -112,8 +141,10 @@ class State_regulationsService:
             if not obj:
                 logger.warning(f"State_regulations {obj_id} not found for deletion")
                 return False
+            state_code = obj.state_code
             await self.db.delete(obj)
             await self.db.commit()
+            await self._after_write(state_code)
             logger.info(f"Deleted state_regulations {obj_id}")
             return True
         except Exception as e:
@@ -5,6 +5,7 @@ from urllib.parse import urljoin
 import httpx
 import mimetypes
 from core.config import settings
+from core.http_client import get_http_client
 from schemas.storage import (
     BucketInfo,
     BucketListResponse,
@@ -212,24 +213,24 @@ class StorageService:
         url = urljoin(settings.oss_service_url, endpoint)
 
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=self.headers,
-                    params=params,
-                    json=payload,
-                )
-                response.raise_for_status()
-                result = response.json()
+            client = get_http_client("oss")
+            response = await client.request(
+                method=method,
+                url=url,
+                headers=self.headers,
+                params=params,
+                json=payload,
+            )
+            response.raise_for_status()
+            result = response.json()
 
-                if result.get("code") != 0:
-                    logger.warning(f"ObjectStorage service error: {result}")
-                    error_msg = result.get("error", "Unknown error")
-                    message = result.get("message", "")
-                    raise ValueError(f"ObjectStorage service error: {error_msg}. {message}")
+            if result.get("code") != 0:
+                logger.warning(f"ObjectStorage service error: {result}")
+                error_msg = result.get("error", "Unknown error")
+                message = result.get("message", "")
+                raise ValueError(f"ObjectStorage service error: {error_msg}. {message}")
 
-                return result.get("data", [])
+            return result.get("data", [])
         except httpx.HTTPStatusError as e:
             error_msg = f"ObjectStorage service HTTP error: {e.response.status_code} - {e.response.text}"
             logger.error(error_msg)
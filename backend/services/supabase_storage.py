@@ -2,15 +2,104 @@
 Supabase Storage service - replaces the Atoms Cloud OSS StorageService.
 Uses Supabase Storage for file uploads/downloads.
 """
+import asyncio
 import logging
 import os
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
-import httpx
+from core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 
+class SignedUrlCache:
+    """In-process TTL cache of signed download URLs, keyed by (bucket, object_key).
+
+    An entry is served only while it still has `min_remaining` seconds of
+    validity left, so callers never receive a URL that is about to expire.
+    Concurrent misses for the same key share one in-flight signing request.
+    """
+
+    def __init__(self, max_entries: int = 2048, min_remaining: float = 300.0):
+        self.max_entries = max_entries
+        self.min_remaining = min_remaining
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Bumped on invalidate while a signing request is in flight, so a request that
+        # raced a delete/re-upload is not cached; dropped when that request finishes
+        self._generation: Dict[Tuple[str, str], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        url, expires_at = entry
+        if expires_at - time.monotonic() < self.min_remaining:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return url
+
+    def put(self, key: Tuple[str, str], url: str, expires_at: float):
+        self._entries[key] = (url, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, bucket_name: str, object_key: str):
+        key = (bucket_name, object_key)
+        self._entries.pop(key, None)
+        if key in self._inflight:
+            self._generation[key] = self._generation.get(key, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generation.clear()
+
+    async def get_or_sign(self, key: Tuple[str, str], expires_in: int, sign) -> str:
+        url = self.get(key)
+        if url is not None:
+            self.hits += 1
+            return url
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation.get(key, 0)
+        # Measure validity from before the request, so expiry is never overestimated
+        started = time.monotonic()
+        try:
+            url = await sign()
+            # Too short-lived to be worth caching once the safety margin is applied
+            if url and expires_in > self.min_remaining and self._generation.get(key, 0) == generation:
+                self.put(key, url, started + expires_in)
+            future.set_result(url)
+            return url
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            self._generation.pop(key, None)
+
+
+signed_url_cache = SignedUrlCache()
+
+
 class SupabaseStorageService:
     """Service for file storage using Supabase Storage REST API."""
 
@@ -37,63 +126,78 @@ class SupabaseStorageService:
         """Upload a file to Supabase Storage. Returns the object key."""
         url = f"{self.supabase_url}/storage/v1/object/{bucket_name}/{object_key}"
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
+        client = get_http_client("supabase")
+        response = await client.post(
+            url,
+            headers=self._headers(content_type, use_service_role=True),
+            content=file_data,
+        )
+
+        if response.status_code in (409, 400):
+            # File might already exist, try upsert via PUT
+            response = await client.put(
                 url,
                 headers=self._headers(content_type, use_service_role=True),
                 content=file_data,
             )
 
-            if response.status_code in (409, 400):
-                # File might already exist, try upsert via PUT
-                response = await client.put(
-                    url,
-                    headers=self._headers(content_type, use_service_role=True),
-                    content=file_data,
-                )
-
-            if response.status_code not in (200, 201):
-                logger.error(f"Supabase storage upload failed: {response.status_code} {response.text}")
-                raise ValueError(f"Failed to upload file: {response.text}")
+        if response.status_code not in (200, 201):
+            logger.error(f"Supabase storage upload failed: {response.status_code} {response.text}")
+            raise ValueError(f"Failed to upload file: {response.text}")
 
+        signed_url_cache.invalidate(bucket_name, object_key)
         logger.info(f"File uploaded to Supabase: {bucket_name}/{object_key}")
         return object_key
 
     async def get_download_url(self, bucket_name: str, object_key: str, expires_in: int = 3600) -> str:
-        """Get a signed download URL for a file in Supabase Storage."""
+        """Get a signed download URL for a file in Supabase Storage (cached until shortly before expiry)."""
+        return await signed_url_cache.get_or_sign(
+            (bucket_name, object_key),
+            expires_in,
+            lambda: self._sign_download_url(bucket_name, object_key, expires_in),
+        )
+
+    async def _sign_download_url(self, bucket_name: str, object_key: str, expires_in: int) -> str:
         url = f"{self.supabase_url}/storage/v1/object/sign/{bucket_name}/{object_key}"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                url,
-                headers={**self._headers("application/json", use_service_role=True)},
-                json={"expiresIn": expires_in},
-            )
+        client = get_http_client("supabase")
+        response = await client.post(
+            url,
+            headers={**self._headers("application/json", use_service_role=True)},
+            json={"expiresIn": expires_in},
+            timeout=30.0,
+        )
 
-            if response.status_code != 200:
-                logger.error(f"Supabase signed URL failed: {response.status_code} {response.text}")
-                raise ValueError(f"Failed to get download URL: {response.text}")
+        if response.status_code != 200:
+            logger.error(f"Supabase signed URL failed: {response.status_code} {response.text}")
+            raise ValueError(f"Failed to get download URL: {response.text}")
 
-            data = response.json()
-            signed_url = data.get("signedURL", "")
-            if signed_url and not signed_url.startswith("http"):
-                signed_url = f"{self.supabase_url}/storage/v1{signed_url}"
-            return signed_url
+        data = response.json()
+        signed_url = data.get("signedURL", "")
+        if signed_url and not signed_url.startswith("http"):
+            signed_url = f"{self.supabase_url}/storage/v1{signed_url}"
+        return signed_url
 
     async def delete_file(self, bucket_name: str, object_key: str) -> bool:
         """Delete a file from Supabase Storage."""
         url = f"{self.supabase_url}/storage/v1/object/{bucket_name}"
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.delete(
-                url,
-                headers={**self._headers("application/json", use_service_role=True)},
-                json={"prefixes": [object_key]},
-            )
-
-            if response.status_code != 200:
-                logger.error(f"Supabase delete failed: {response.status_code} {response.text}")
-                return False
+        signed_url_cache.invalidate(bucket_name, object_key)
+
+        client = get_http_client("supabase")
+        # httpx's delete() takes no body; the bulk-delete endpoint needs one
+        response = await client.request(
+            "DELETE",
+            url,
+            headers={**self._headers("application/json", use_service_role=True)},
+            json={"prefixes": [object_key]},
+            timeout=30.0,
+        )
+        # Again once the object is gone: a URL signed during the request may have been cached
+        signed_url_cache.invalidate(bucket_name, object_key)
+
+        if response.status_code != 200:
+            logger.error(f"Supabase delete failed: {response.status_code} {response.text}")
+            return False
 
         logger.info(f"File deleted from Supabase: {bucket_name}/{object_key}")
         return True
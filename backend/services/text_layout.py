@@ -0,0 +1,267 @@
+"""
+Positioned text of a document page, as the page viewer draws it.
+
+A page is a list of spans (a run of text with its box, baseline and font size)
+grouped into lines. Coordinates are PDF points with the origin at the top-left
+corner of the page as displayed, the frame the frontend scales highlights in.
+The page renderer draws the spans, and the source map points at the boxes of
+the lines a value was found on.
+
+PDF pages are laid out from their real text positions, once per parse:
+
+- with PyMuPDF, when installed, from its span boxes;
+- otherwise from pypdf's extract_text(visitor_text=...). It reports the text
+  matrix of every text run, so baselines and x positions are exact. Widths
+  come from pypdf's font metrics where this pypdf version has them (which
+  covers the standard 14 fonts), else from the font's /Widths, else half an
+  em per character. Boxes extend 0.8 em above and 0.2 em below the baseline.
+
+Word files and unreadable pages have no positions. They get a synthetic
+layout: one full-width line every LINE_HEIGHT points from the margin, the
+layout the viewer has always used for them.
+
+PageLayout keeps a page in a few flat arrays instead of one object per span.
+For a 300-page lease that means some thirty objects per page rather than
+several thousand.
+"""
+
+import io
+import logging
+import math
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fitz  # PyMuPDF, optional
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    from pypdf.generic._font import Font as _PypdfFont  # recent pypdf only
+except ImportError:
+    _PypdfFont = None
+
+logger = logging.getLogger(__name__)
+
+ASCENT = 0.8
+DESCENT = 0.2
+DEFAULT_CHAR_WIDTH = 0.5  # em, for fonts without /Widths
+
+# Per span: x0, y0, x1, y1, baseline, font size
+_SPAN_FIELDS = 6
+
+Box = Tuple[float, float, float, float]
+
+
+class PageLayout:
+    """Spans of one page in flat arrays; lines are runs of consecutive spans."""
+
+    __slots__ = ("width", "height", "fixed_pitch", "text", "text_offsets", "spans", "line_offsets")
+
+    def __init__(self, width: float, height: float, fixed_pitch: bool = False):
+        self.width = width
+        self.height = height
+        # Synthetic layouts are drawn in a monospace font at their natural width
+        self.fixed_pitch = fixed_pitch
+        self.text = ""
+        self.text_offsets = array("I", [0])   # span i is text[text_offsets[i]:text_offsets[i + 1]]
+        self.spans = array("f")               # _SPAN_FIELDS floats per span
+        self.line_offsets = array("I", [0])   # line j is spans line_offsets[j]:line_offsets[j + 1]
+
+    @property
+    def span_count(self) -> int:
+        return len(self.text_offsets) - 1
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_offsets) - 1
+
+    def span(self, i: int) -> Tuple[str, float, float, float, float, float, float]:
+        """(text, x0, y0, x1, y1, baseline, font size) of span i."""
+        base = i * _SPAN_FIELDS
+        return (self.text[self.text_offsets[i]:self.text_offsets[i + 1]],) + tuple(self.spans[base:base + _SPAN_FIELDS])
+
+    def iter_spans(self):
+        for i in range(self.span_count):
+            yield self.span(i)
+
+    def line_text(self, j: int) -> str:
+        first, end = self.line_offsets[j], self.line_offsets[j + 1]
+        return self.text[self.text_offsets[first]:self.text_offsets[end]]
+
+    def lines(self) -> Tuple[str, ...]:
+        return tuple(self.line_text(j) for j in range(self.line_count))
+
+    def line_box(self, first_line: int, last_line: Optional[int] = None) -> Box:
+        """Union of the boxes of lines first_line..last_line."""
+        last_line = first_line if last_line is None else last_line
+        first, end = self.line_offsets[first_line], self.line_offsets[last_line + 1]
+        boxes = self.spans
+        x0 = min(boxes[i * _SPAN_FIELDS] for i in range(first, end))
+        y0 = min(boxes[i * _SPAN_FIELDS + 1] for i in range(first, end))
+        x1 = max(boxes[i * _SPAN_FIELDS + 2] for i in range(first, end))
+        y1 = max(boxes[i * _SPAN_FIELDS + 3] for i in range(first, end))
+        return x0, y0, x1, y1
+
+    def add_line(self, spans: Iterable[Tuple[str, float, float, float, float, float, float]]):
+        """Append a line of (text, x0, y0, x1, y1, baseline, size) spans, in reading order."""
+        parts = [self.text]
+        offset = len(self.text)
+        for text, *geometry in spans:
+            parts.append(text)
+            offset += len(text)
+            self.text_offsets.append(offset)
+            self.spans.extend(geometry)
+        if len(self.text_offsets) - 1 > self.line_offsets[-1]:
+            self.text = "".join(parts)
+            self.line_offsets.append(len(self.text_offsets) - 1)
+
+
+def text_page_layout(lines: Sequence[str], width: float, height: float, margin: float,
+                     line_height: float, font_size: float) -> PageLayout:
+    """Synthetic layout: line i spans the text width at margin + i * line_height."""
+    layout = PageLayout(width, height, fixed_pitch=True)
+    for i, line in enumerate(lines):
+        y0 = margin + i * line_height
+        layout.add_line([(line, margin, y0, width - margin, y0 + line_height, y0 + font_size, font_size)])
+    return layout
+
+
+# ---------- PDF ----------
+
+def _display_transform(width: float, height: float, rotation: int):
+    """Map unrotated page coordinates (origin bottom-left) to the displayed page (origin top-left)."""
+    if rotation == 90:
+        return lambda x, y: (y, x)
+    if rotation == 180:
+        return lambda x, y: (width - x, y)
+    if rotation == 270:
+        return lambda x, y: (height - y, width - x)
+    return lambda x, y: (x, height - y)
+
+
+def _font_widths(font_dict):
+    """Width lookup of a font: a pypdf Font, (first char code, /Widths in 1/1000 em), or None."""
+    if not font_dict:
+        return None
+    if _PypdfFont is not None:
+        try:
+            return _PypdfFont.from_font_resource(font_dict)
+        except Exception:
+            pass
+    try:
+        widths = font_dict.get("/Widths")
+        if widths is None:
+            return None
+        return int(font_dict.get("/FirstChar", 0)), [float(w) for w in widths.get_object()]
+    except Exception:
+        return None
+
+
+def _text_width(text: str, widths) -> float:
+    """Advance width of `text` in em."""
+    if widths is None:
+        return len(text) * DEFAULT_CHAR_WIDTH
+    if not isinstance(widths, tuple):
+        return widths.get_text_width(text) / 1000 or len(text) * DEFAULT_CHAR_WIDTH
+    first_char, table = widths
+    total = 0.0
+    for char in text:
+        index = ord(char) - first_char
+        width = table[index] if 0 <= index < len(table) else 0.0
+        total += width / 1000 if width else DEFAULT_CHAR_WIDTH
+    return total
+
+
+def _pypdf_page_layout(page, width: float, height: float, rotation: int) -> Tuple[PageLayout, str]:
+    box = page.mediabox
+    left, bottom = float(box.left), float(box.bottom)
+    unrotated_width, unrotated_height = float(box.width), float(box.height)
+    to_display = _display_transform(unrotated_width, unrotated_height, rotation)
+    widths_by_font = {}
+    lines: List[list] = [[]]
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if not text:
+            return
+        # Text space -> user space: the text matrix times the current transformation matrix
+        a = tm[0] * cm[0] + tm[1] * cm[2]
+        b = tm[0] * cm[1] + tm[1] * cm[3]
+        c = tm[2] * cm[0] + tm[3] * cm[2]
+        d = tm[2] * cm[1] + tm[3] * cm[3]
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4] - left
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5] - bottom
+        size = (font_size or 0) * math.hypot(c, d) or 1.0
+        x_scale = (font_size or 0) * math.hypot(a, b) or size
+        font_key = id(font_dict)
+        if font_key not in widths_by_font:
+            widths_by_font[font_key] = _font_widths(font_dict)
+        x, baseline = to_display(x, y)
+
+        pieces = text.split("\n")
+        for n, piece in enumerate(pieces):
+            if piece.strip():
+                x1 = x + _text_width(piece, widths_by_font[font_key]) * x_scale
+                lines[-1].append((piece, x, baseline - ASCENT * size, x1, baseline + DESCENT * size, baseline, size))
+            if n < len(pieces) - 1:
+                lines.append([])
+                # pypdf only reports the position of a run; later lines in it go one leading lower
+                baseline += 1.2 * size
+
+    page_text = page.extract_text(visitor_text=visit) or ""
+    layout = PageLayout(width, height)
+    for spans in lines:
+        layout.add_line(spans)
+    return layout, page_text
+
+
+def _pymupdf_page_layout(page) -> Tuple[PageLayout, str]:
+    rect = page.rect
+    layout = PageLayout(round(rect.width, 1), round(rect.height, 1))
+    matrix = page.rotation_matrix if page.rotation else None
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block.get("lines", []):
+            spans = []
+            for span in line.get("spans", []):
+                if not span["text"].strip():
+                    continue
+                bbox, origin = fitz.Rect(span["bbox"]), fitz.Point(span["origin"])
+                if matrix is not None:
+                    bbox, origin = bbox * matrix, origin * matrix
+                spans.append((span["text"], bbox.x0, bbox.y0, bbox.x1, bbox.y1, origin.y, span["size"]))
+            layout.add_line(spans)
+    return layout, page.get_text()
+
+
+def pdf_page_layouts(file_bytes: bytes, page_sizes: Sequence[Tuple[float, float]],
+                     pypdf_pages=None) -> Tuple[Tuple[PageLayout, ...], Tuple[str, ...]]:
+    """(layout, extracted text) of every page of a PDF.
+
+    `page_sizes` are the displayed page sizes; `pypdf_pages` an open reader's
+    pages, used when PyMuPDF is not installed.
+    """
+    layouts, texts = [], []
+    if HAS_PYMUPDF:
+        try:
+            with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+                for page in doc:
+                    layout, text = _pymupdf_page_layout(page)
+                    layouts.append(layout)
+                    texts.append(text)
+            return tuple(layouts), tuple(texts)
+        except Exception as e:
+            logger.warning(f"PyMuPDF layout failed, using pypdf: {e}")
+            layouts, texts = [], []
+
+    if pypdf_pages is None:
+        from pypdf import PdfReader
+        pypdf_pages = PdfReader(io.BytesIO(file_bytes)).pages
+    for page, (width, height) in zip(pypdf_pages, page_sizes):
+        rotation = int(page.get("/Rotate", 0) or 0) % 360
+        layout, text = _pypdf_page_layout(page, width, height, rotation)
+        layouts.append(layout)
+        texts.append(text)
+    return tuple(layouts), tuple(texts)
@@ -5,6 +5,7 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.user_credentials import User_credentials
+from utils.pagination import count_key, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +61,14 @@ class User_credentialsService:
         user_id: Optional[str] = None,
         query_dict: Optional[Dict[str, Any]] = None,
         sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         """Get paginated list of user_credentialss (user can only see their own records)"""
         try:
-            query = select(User_credentials)
+            # With `fields`, select only those columns; rows come back as dicts
+            query = select(*[getattr(User_credentials, f) for f in fields]) if fields else select(User_credentials)
             count_query = select(func.count(User_credentials.id))
             
             if user_id:
@@ -76,8 +81,19 @@ class User_credentialsService:
                         query = query.where(getattr(User_credentials, field) == value)
                         count_query = count_query.where(getattr(User_credentials, field) == value)
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            if cursor is not None:
+                # Keyset mode: fixed newest-first order, skip and sort do not apply
+                return await keyset_page(
+                    self.db, User_credentials, query, count_query, cursor, limit,
+                    include_total=include_total,
+                    total_key=count_key(User_credentials, user_id, query_dict),
+                    as_dicts=bool(fields),
+                )
+
+            total = None
+            if include_total:
+                count_result = await self.db.execute(count_query)
+                total = count_result.scalar()
 
             if sort:
                 if sort.startswith('-'):
@@ -91,7 +107,7 @@ class User_credentialsService:
                 query = query.order_by(User_credentials.id.desc())
 
             result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
+            items = [dict(row) for row in result.mappings().all()] if fields else result.scalars().all()
 
             return {
                 "items": items,
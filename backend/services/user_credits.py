@@ -5,6 +5,7 @@ from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.user_credits import User_credits
+from utils.pagination import count_key, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +61,14 @@ class User_creditsService:
         user_id: Optional[str] = None,
         query_dict: Optional[Dict[str, Any]] = None,
         sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
     ) -> Dict[str, Any]:
         """Get paginated list of user_creditss (user can only see their own records)"""
         try:
-            query = select(User_credits)
+            # With `fields`, select only those columns; rows come back as dicts
+            query = select(*[getattr(User_credits, f) for f in fields]) if fields else select(User_credits)
             count_query = select(func.count(User_credits.id))
             
             if user_id:
@@ -76,8 +81,19 @@ class User_creditsService:
                         query = query.where(getattr(User_credits, field) == value)
                         count_query = count_query.where(getattr(User_credits, field) == value)
             
-            count_result = await self.db.execute(count_query)
-            total = count_result.scalar()
+            if cursor is not None:
+                # Keyset mode: fixed newest-first order, skip and sort do not apply
+                return await keyset_page(
+                    self.db, User_credits, query, count_query, cursor, limit,
+                    include_total=include_total,
+                    total_key=count_key(User_credits, user_id, query_dict),
+                    as_dicts=bool(fields),
+                )
+
+            total = None
+            if include_total:
+                count_result = await self.db.execute(count_query)
+                total = count_result.scalar()
 
             if sort:
                 if sort.startswith('-'):
@@ -91,7 +107,7 @@ class User_creditsService:
                 query = query.order_by(User_credits.id.desc())
 
             result = await self.db.execute(query.offset(skip).limit(limit))
-            items = result.scalars().all()
+            items = [dict(row) for row in result.mappings().all()] if fields else result.scalars().all()
 
             return {
                 "items": items,
@@ -218,6 +234,20 @@ class User_creditsService:
             logger.error(f"Error deducting credit for user {user_id}: {str(e)}")
             raise
 
+    async def can_analyze(self, user_id: str) -> bool:
+        """Whether a user has a credit left or an active monthly subscription."""
+        from datetime import datetime, timezone
+        user_credits = await self.get_by_field("user_id", user_id)
+        if not user_credits:
+            return False
+        if (user_credits.free_credits or 0) + (user_credits.paid_credits or 0) > 0:
+            return True
+        return bool(
+            user_credits.subscription_type == "monthly"
+            and user_credits.subscription_expires_at
+            and user_credits.subscription_expires_at > datetime.now(timezone.utc)
+        )
+
     async def add_credits(self, user_id: str, credits_to_add: int) -> Optional[User_credits]:
         """Add paid credits to a user's account."""
         from datetime import datetime, timezone
@@ -0,0 +1,148 @@
+"""
+Keyset (cursor) pagination for the generic entity list endpoints.
+
+Pages are ordered newest first by (created_at, id), or by id alone for
+tables without created_at. The cursor is an opaque token that holds the sort
+key of the last row served. The next page is a range scan that starts after
+that key, so page 500 costs the same as page 1, unlike offset pagination.
+
+Rows with a NULL created_at sort last. The cursor records the NULL, so the
+scan continues through them by id.
+
+Totals are optional in cursor mode. When a total is requested, it is served
+from a short-lived in-process cache so that walking the pages does not run
+count(*) on every page.
+"""
+
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+
+
+class InvalidCursorError(ValueError):
+    """The cursor is malformed or was issued for a different ordering."""
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    payload = {"c": created_at.isoformat() if created_at else None, "i": row_id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"]) if payload.get("c") else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}") from e
+
+
+class CountCache:
+    """TTL cache of list totals, keyed by table and filter."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return entry[1]
+
+    def put(self, key: Hashable, total: int):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+count_cache = CountCache(settings.list_count_cache_ttl_seconds)
+
+
+def count_key(model, user_id: Optional[str], query_dict: Optional[Dict[str, Any]]) -> Hashable:
+    return (model.__tablename__, user_id, json.dumps(query_dict or {}, sort_keys=True, default=str))
+
+
+async def keyset_page(
+    db: AsyncSession,
+    model,
+    query,
+    count_query,
+    cursor: str,
+    limit: int,
+    include_total: bool = False,
+    total_key: Optional[Hashable] = None,
+    as_dicts: bool = False,
+) -> Dict[str, Any]:
+    """Run one cursor page of `query` (already filtered); an empty cursor means the first page.
+
+    Returns the same shape as the offset-mode get_list, plus next_cursor
+    (None on the last page). `as_dicts` is for column-level selects.
+    """
+    has_created_at = hasattr(model, "created_at")
+    if cursor:
+        after_created_at, after_id = decode_cursor(cursor)
+        if not has_created_at:
+            query = query.where(model.id < after_id)
+        elif after_created_at is None:
+            query = query.where(model.created_at.is_(None), model.id < after_id)
+        else:
+            query = query.where(or_(
+                model.created_at < after_created_at,
+                and_(model.created_at == after_created_at, model.id < after_id),
+                model.created_at.is_(None),
+            ))
+
+    order = [model.created_at.desc().nullslast(), model.id.desc()] if has_created_at else [model.id.desc()]
+    extra_columns: List[str] = []
+    if as_dicts:
+        # The cursor needs the sort key even when `fields` left it out
+        selected = {c.key for c in query.selected_columns}
+        for name in (["created_at", "id"] if has_created_at else ["id"]):
+            if name not in selected:
+                query = query.add_columns(getattr(model, name))
+                extra_columns.append(name)
+
+    result = await db.execute(query.order_by(*order).limit(limit + 1))
+    if as_dicts:
+        rows = [dict(row) for row in result.mappings().all()]
+    else:
+        rows = list(result.scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        get = last.get if as_dicts else lambda name: getattr(last, name)
+        next_cursor = encode_cursor(get("created_at") if has_created_at else None, get("id"))
+    for row in rows if extra_columns else ():
+        for name in extra_columns:
+            row.pop(name, None)
+
+    total = None
+    if include_total:
+        total = count_cache.get(total_key) if total_key is not None else None
+        if total is None:
+            total = (await db.execute(count_query)).scalar()
+            if total_key is not None:
+                count_cache.put(total_key, total)
+
+    return {
+        "items": rows,
+        "total": total,
+        "skip": 0,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,39 @@
+"""
+Column projection for the generic entity list endpoints (`?fields=a,b,c`).
+
+The services turn the parsed field list into a column-level select, so only
+the requested columns leave the database. Rows come back as dicts and are
+validated against a partial response model with every field optional.
+Combined with response_model_exclude_unset, only the requested keys reach the
+client.
+"""
+
+from typing import List, Optional, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+def parse_fields(fields: Optional[str], response_model: Type[BaseModel], orm_model) -> Optional[List[str]]:
+    """Validated field list for `fields`, or None for full rows.
+
+    Only fields that are both exposed by the response model and mapped
+    columns are accepted; `id` is always included. Raises ValueError for
+    unknown names.
+    """
+    if not fields or not fields.strip():
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(response_model.model_fields) & set(orm_model.__table__.columns.keys())
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+
+def partial_model(response_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Copy of `response_model` with every field optional, for projected rows."""
+    return create_model(
+        f"{response_model.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (Optional[field.annotation], None) for name, field in response_model.model_fields.items()},
+    )